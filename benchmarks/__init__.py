@@ -0,0 +1 @@
+"""Generator danych syntetycznych i testy wydajności Magazynu Złota (python -m benchmarks.run_benchmarks)."""
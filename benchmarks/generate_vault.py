@@ -0,0 +1,197 @@
+"""
+Generator realistycznych, powtarzalnych baz Magazynu Złota.
+
+Tworzy tysiące typów złota (sztabki, monety, złom, biżuteria) i dowolną liczbę
+transakcji kupna/sprzedaży rozłożonych na kilka lat. Sprzedaż nigdy nie
+przekracza stanu magazynu, a końcowe stany w tabeli inventory zgadzają się
+z historią. Ten sam seed daje identyczną bazę.
+
+    python -m benchmarks.generate_vault vault_1m.db --transactions 1000000 --gold-types 2000 --seed 42
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+# Pozwala uruchamiać moduł z katalogu repozytorium (python -m benchmarks.generate_vault)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import GoldDatabase
+from units import MILLIGRAMS, QUANTITY_SCALE, line_weight, parse_money, parse_weight, price_per_gram as gram_price
+
+BAR_WEIGHTS = (1, 2, 2.5, 5, 10, 20, 31.1, 50, 100, 250, 500, 1000)
+BAR_MINTS = ("", "Valcambi", "PAMP", "Heraeus", "Umicore", "Argor-Heraeus", "Mennica Polska", "Perth Mint")
+COINS = (("Krugerrand", 91.67), ("Maple Leaf", 99.99), ("Wiedeński Filharmonik", 99.99),
+         ("American Eagle", 91.67), ("Britannia", 99.99), ("Kangur", 99.99), ("Orzeł Bielik", 99.99),
+         ("Suweren", 91.67), ("Dukat", 98.60))
+COIN_SIZES = (("1 oz", 31.103), ("1/2 oz", 15.552), ("1/4 oz", 7.776), ("1/10 oz", 3.110))
+SCRAP_ASSAYS = ((333, 33.3), (375, 37.5), (500, 50.0), (585, 58.5), (750, 75.0), (916, 91.6), (960, 96.0))
+JEWELRY = ("Pierścionek", "Łańcuszek", "Obrączka", "Bransoleta", "Kolczyki", "Wisiorek", "Sygnet")
+DESCRIPTIONS = ("", "", "Klient detaliczny", "Skup od klienta", "Sprzedaż hurtowa", "Zamówienie telefoniczne",
+                "Klient stały", "Wymiana", "Faktura VAT", "Odbiór osobisty")
+
+BASE_PRICE_PER_GRAM = 180.0  # zł za gram czystego złota na początku okresu
+
+
+def generate_gold_types(rng: random.Random, count: int) -> List[Tuple]:
+    """Zwraca listę unikalnych typów (kategoria, typ, waga jedn., czystość, jednostka, notatki)."""
+    candidates = []
+    for weight in BAR_WEIGHTS:
+        for mint in BAR_MINTS:
+            name = f"Sztabka {weight:g}g" + (f" {mint}" if mint else "")
+            candidates.append(("Sztabka", name, float(weight), 99.99, "szt", mint))
+    for coin, purity in COINS:
+        for size, weight in COIN_SIZES:
+            candidates.append(("Moneta", f"{coin} {size}", weight, purity, "szt", ""))
+            for year in range(1980, 2026, 5):
+                candidates.append(("Moneta", f"{coin} {size} {year}", weight, purity, "szt", f"Rocznik {year}"))
+    for assay, purity in SCRAP_ASSAYS:
+        candidates.append(("Złom", f"Złom próba {assay}", 1.0, purity, "g", ""))
+    for item in JEWELRY:
+        for assay, purity in SCRAP_ASSAYS[1:]:
+            for weight in (1.5, 2, 3, 4, 5, 7.5, 10, 15):
+                candidates.append(("Biżuteria", f"{item} {weight:g}g", float(weight), purity, "szt", f"Próba {assay}"))
+
+    rng.shuffle(candidates)
+    gold_types = candidates[:count]
+    series = 1
+    while len(gold_types) < count:
+        # Zabrakło naturalnych nazw - kolejne serie tych samych produktów
+        for category, name, weight, purity, unit, notes in candidates:
+            if len(gold_types) >= count:
+                break
+            gold_types.append((category, f"{name} seria {series}", weight, purity, unit, notes))
+        series += 1
+    return gold_types
+
+
+def generate_vault(path: str, transactions: int = 100_000, gold_types: int = 2000, years: int = 5,
+                   seed: int = 42, end_date: str = "2025-12-31", batch_size: int = 50_000) -> dict:
+    """
+    Tworzy nową bazę w pliku path i wypełnia ją danymi syntetycznymi.
+    Zwraca podsumowanie (liczby wierszy, zakres dat).
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    GoldDatabase(path)  # schemat tworzony tak samo jak w aplikacji
+
+    rng = random.Random(seed)
+    types = generate_gold_types(rng, gold_types)
+
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA journal_mode=MEMORY")
+        conn.executemany(
+            "INSERT INTO inventory (category, type, unit_weight, purity, quantity, unit, notes) VALUES (?, ?, ?, ?, 0, ?, ?)",
+            [(c, t, parse_weight(w), p, u, n) for c, t, w, p, u, n in types]
+        )
+        ids = [row[0] for row in conn.execute("SELECT id FROM inventory ORDER BY id")]
+        unit_weights = [parse_weight(t[2]) for t in types]
+        purities = [t[3] for t in types]
+        units = [t[4] for t in types]
+
+        # Popularność typów według rozkładu zbliżonego do Zipfa - kilka produktów dominuje obrót
+        popularity = [1.0 / (rank + 1) ** 0.8 for rank in range(len(ids))]
+        rng.shuffle(popularity)
+        cumulative = []
+        total = 0.0
+        for weight in popularity:
+            total += weight
+            cumulative.append(total)
+
+        end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(hours=18)
+        start = end - timedelta(days=365 * years)
+        step = (end - start).total_seconds() / max(transactions, 1)
+
+        picks = rng.choices(range(len(ids)), cum_weights=cumulative, k=transactions)
+        stock = [0] * len(ids)  # tysięczne części jednostki, jak w bazie (units)
+        price_per_gram = BASE_PRICE_PER_GRAM
+        rows = []
+        sells = 0
+        for n, index in enumerate(picks):
+            # Cena złota jako błądzenie losowe z lekkim trendem wzrostowym
+            price_per_gram *= 1 + rng.gauss(0.00002, 0.002)
+            moment = start + timedelta(seconds=n * step + rng.random() * step)
+            fine_grams = unit_weights[index] / MILLIGRAMS * purities[index] / 100.0
+
+            if stock[index] >= QUANTITY_SCALE and rng.random() < 0.45:
+                transaction_type = "Sprzedaż"
+                if units[index] == "g":
+                    quantity = rng.randint(10, stock[index] // 10) * 10
+                else:
+                    quantity = rng.randint(1, min(stock[index] // QUANTITY_SCALE, 5)) * QUANTITY_SCALE
+                quantity = min(quantity, stock[index])
+                stock[index] -= quantity
+                margin = 1.04
+                sells += 1
+            else:
+                transaction_type = "Kupno"
+                if units[index] == "g":
+                    quantity = rng.randint(100, 25_000) * 10
+                else:
+                    quantity = rng.randint(1, 10) * QUANTITY_SCALE
+                stock[index] += quantity
+                margin = 0.97
+
+            price_per_unit = parse_money(round(fine_grams * price_per_gram * margin, 2))
+            unit_weight = unit_weights[index]
+            rows.append((
+                ids[index], transaction_type, quantity, line_weight(quantity, unit_weight), price_per_unit,
+                gram_price(price_per_unit, unit_weight),
+                moment.strftime("%Y-%m-%d %H:%M:%S"), rng.choice(DESCRIPTIONS)
+            ))
+            if len(rows) >= batch_size:
+                _insert_transactions(conn, rows)
+                rows = []
+        if rows:
+            _insert_transactions(conn, rows)
+
+        conn.executemany("UPDATE inventory SET quantity = ? WHERE id = ?",
+                         [(quantity, gold_id) for gold_id, quantity in zip(ids, stock)])
+        conn.commit()
+    finally:
+        conn.close()
+
+    return {
+        "path": path,
+        "seed": seed,
+        "gold_types": len(ids),
+        "transactions": transactions,
+        "sales": sells,
+        "date_from": start.strftime("%Y-%m-%d"),
+        "date_to": end.strftime("%Y-%m-%d"),
+    }
+
+
+def _insert_transactions(conn: sqlite3.Connection, rows: List[Tuple]):
+    """Wstawia paczkę transakcji."""
+    conn.executemany("""
+        INSERT INTO transactions
+        (gold_type_id, transaction_type, quantity, weight_total, price_per_unit, price_per_gram, transaction_date, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punkt wejścia generatora."""
+    parser = argparse.ArgumentParser(prog="generate_vault", description="Generator syntetycznych baz Magazynu Złota")
+    parser.add_argument("path", help="plik bazy do utworzenia (zostanie nadpisany)")
+    parser.add_argument("--transactions", type=int, default=100_000)
+    parser.add_argument("--gold-types", type=int, default=2000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end-date", default="2025-12-31", help="data ostatniej transakcji (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    summary = generate_vault(args.path, args.transactions, args.gold_types, args.years, args.seed, args.end_date)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,430 @@
+"""
+Testy wydajności metod GoldDatabase i wypełniania tabel Treeview.
+
+Dla każdego rozmiaru (liczby transakcji) generowana jest powtarzalna baza
+(benchmarks.generate_vault, ten sam seed), kopiowana do pliku roboczego
+i mierzona. Raport JSON zawiera commit, wersje Pythona/SQLite i medianę
+oraz minimum czasów, więc raporty z różnych commitów można porównywać.
+
+    python -m benchmarks.run_benchmarks --sizes 10000,100000,1000000 --output bench.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import AUDIT_COLUMNS, GoldDatabase, value_sql
+from benchmarks.generate_vault import generate_vault
+from units import QUANTITY_SCALE
+from vault_stats import load_dashboard_stats
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+# Liczba wierszy historii w pomiarach formatowania (odświeżenie dużej tabeli)
+FORMAT_ROWS = 100_000
+
+
+def measure(func: Callable, repeat: int) -> dict:
+    """Wywołuje func repeat razy i zwraca statystyki czasu w milisekundach."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(times), 3), "min_ms": round(min(times), 3), "repeat": repeat}
+
+
+def dataset_path(data_dir: str, size: int, gold_types: int, seed: int) -> str:
+    """Zwraca ścieżkę bazy danego rozmiaru, generując ją przy pierwszym użyciu."""
+    path = os.path.join(data_dir, f"vault_{size}_{gold_types}_{seed}.db")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"Generowanie bazy {path}...")
+        generate_vault(path, transactions=size, gold_types=gold_types, seed=seed)
+    return path
+
+
+def added_transaction_id(db: GoldDatabase) -> int:
+    """
+    Zwraca id transakcji dodanej ostatnim zapisem (wg dziennika zmian). Najnowsza transakcja historii może
+    nią nie być - dodana z samą datą dostaje bieżącą godzinę, wcześniejszą niż transakcje z tego dnia.
+    """
+    return db.get_audit_log("transaction", limit=1)[0][AUDIT_COLUMNS.index("entity_id")]
+
+
+def database_benchmarks(db: GoldDatabase, repeat: int) -> Dict[str, dict]:
+    """Mierzy wszystkie publiczne metody GoldDatabase."""
+    gold_types = db.get_gold_types()
+    gold_id = gold_types[len(gold_types) // 2].id
+    category = gold_types[0].category
+    newest = db.get_all_transactions_for_history(limit=1)[0]
+    transaction_id = newest.id
+    detail = db.get_transaction_by_id(transaction_id)
+    date_to = newest.date[:10]
+    date_from = f"{int(date_to[:4]) - 1}{date_to[4:]}"
+
+    results = {}
+    results["init_database"] = measure(db.init_database, repeat)
+    for sort_by in ("category", "type", "purity", "quantity", "weight"):
+        results[f"get_inventory[{sort_by}]"] = measure(lambda: db.get_inventory(sort_by), repeat)
+    results["get_inventory[type, limit=50]"] = measure(lambda: db.get_inventory("type", 50), repeat)
+    results["get_gold_types"] = measure(db.get_gold_types, repeat)
+    results["get_gold_quantity"] = measure(lambda: db.get_gold_quantity(gold_id), repeat * 20)
+    results["get_gold_categories"] = measure(db.get_gold_categories, repeat)
+    results["get_transaction_by_id"] = measure(lambda: db.get_transaction_by_id(transaction_id), repeat * 20)
+    for sort_by in ("date", "value"):
+        results[f"get_transactions_with_id[{sort_by}]"] = measure(lambda: db.get_transactions_with_id(sort_by), repeat)
+    results["get_transactions_with_id[last_year]"] = measure(
+        lambda: db.get_transactions_with_id("date", date_from, date_to), repeat)
+    results["get_transactions_with_id[page]"] = measure(lambda: db.get_transactions_with_id("date", limit=200), repeat)
+    results["get_transactions_with_id[page, offset=10000]"] = measure(
+        lambda: db.get_transactions_with_id("date", limit=200, offset=10000), repeat)
+    results["get_all_transactions_for_history"] = measure(db.get_all_transactions_for_history, repeat)
+    results["get_all_transactions_for_history[filtered]"] = measure(
+        lambda: db.get_all_transactions_for_history("date", {"date_from": date_from, "category": category,
+                                                             "trans_type": "Kupno"}), repeat)
+    results["get_all_transactions_for_history[search]"] = measure(
+        lambda: db.get_all_transactions_for_history("relevance", {"search": gold_types[0].type}, 1000), repeat)
+    results["get_all_transactions_for_history[page]"] = measure(
+        lambda: db.get_all_transactions_for_history(limit=100, offset=1000), repeat)
+    results["load_history_columns"] = measure(db.load_history_columns, repeat)
+    columns = db.load_history_columns()
+    results["HistoryColumns.summary"] = measure(columns.summary, repeat)
+    results["HistoryColumns.totals_by_category"] = measure(columns.totals_by_category, repeat)
+    results["get_monthly_totals"] = measure(db.get_monthly_totals, repeat)
+    results["load_dashboard_stats"] = measure(lambda: load_dashboard_stats(db), repeat)
+    results["get_audit_log"] = measure(lambda: db.get_audit_log("transaction", transaction_id), repeat)
+    results["get_valuation"] = measure(db.get_valuation, repeat)
+    results["verify_balances"] = measure(db.verify_balances, repeat)
+
+    def add_and_delete():
+        db.add_transaction(gold_id, "Kupno", QUANTITY_SCALE, 100_000, date_to, "benchmark")
+        last_id = added_transaction_id(db)
+        db.delete_transaction(last_id)
+
+    results["add_transaction+delete_transaction"] = measure(add_and_delete, repeat * 4)
+
+    # Cofnięcie i ponowienie zapisu (Ctrl+Z / Ctrl+Y): każde revert_changes zwraca wpisy do cofnięcia następnym
+    db.add_transaction(gold_id, "Kupno", QUANTITY_SCALE, 100_000, date_to, "benchmark")
+    last_write = {"audit_ids": db.take_last_write()}
+
+    def undo_and_redo():
+        for _ in range(2):
+            db.revert_changes(last_write["audit_ids"])
+            last_write["audit_ids"] = db.take_last_write()
+
+    results["revert_changes[undo+redo add_transaction]"] = measure(undo_and_redo, repeat * 4)
+    db.revert_changes(last_write["audit_ids"])
+
+    # Zmiany drugiego stanowiska na tym samym pliku: bez nich sprawdzenie to jedno PRAGMA data_version
+    other = GoldDatabase(db.db_name)
+    db.poll_changes()
+    results["poll_changes[idle]"] = measure(db.poll_changes, repeat * 20)
+
+    def other_add_and_delete():
+        other.add_transaction(gold_id, "Kupno", QUANTITY_SCALE, 100_000, date_to, "benchmark")
+        other.delete_transaction(added_transaction_id(other))
+
+    def other_add_and_delete_then_poll():
+        other_add_and_delete()
+        db.poll_changes()
+
+    results["add+delete[other connection]"] = measure(other_add_and_delete, repeat * 4)
+    results["add+delete[other connection]+poll_changes"] = measure(other_add_and_delete_then_poll, repeat * 4)
+    other.close()
+
+    _, detail_gold_id, _, _, _, detail_type, quantity, price, date, description = detail
+    results["update_transaction"] = measure(
+        lambda: db.update_transaction(transaction_id, detail_gold_id, detail_type, quantity, price, date,
+                                      description or ""), repeat * 4)
+    batch_ids = [row.id for row in db.get_all_transactions_for_history(limit=1000)]
+    results["update_transactions[1000]"] = measure(
+        lambda: db.update_transactions(batch_ids, description="benchmark"), repeat)
+    return results
+
+
+def update_transaction_benchmarks(db: GoldDatabase, repeat: int) -> Dict[str, dict]:
+    """
+    Mierzy edycję transakcji ze zmianą rodzaju (kupno <-> sprzedaż) i typu złota.
+    Poprawność edycji sprawdzają testy (tests/test_update_transaction.py).
+    """
+    gold_types = db.get_gold_types()
+    first, second = gold_types[0].id, gold_types[1].id
+    date = "2000-01-03 12:00:00"
+    unit = QUANTITY_SCALE
+    # Zapas na pierwszym typie, żeby sprzedaż w edycji nie zależała od stanu wygenerowanej bazy
+    db.add_transaction(first, "Kupno", 5 * unit, 100_000, date, "benchmark zapas")
+    reserve_id = added_transaction_id(db)
+    db.add_transaction(first, "Kupno", unit, 100_000, date, "benchmark edycja")
+    transaction_id = added_transaction_id(db)
+
+    # Każde wywołanie zmienia rodzaj (albo typ złota) na przeciwny
+    state = {"type": "Kupno", "gold_id": first}
+
+    def toggle():
+        state["type"] = "Sprzedaż" if state["type"] == "Kupno" else "Kupno"
+        db.update_transaction(transaction_id, first, state["type"], unit, 100_000, date, "")
+
+    def move():
+        state["gold_id"] = first if state["gold_id"] == second else second
+        db.update_transaction(transaction_id, state["gold_id"], "Kupno", unit, 100_000, date, "")
+
+    results = {
+        "update_transaction[transaction type change]": measure(toggle, repeat * 4),
+        "update_transaction[gold type change]": measure(move, repeat * 4),
+    }
+    db.delete_transaction(transaction_id)
+    db.delete_transaction(reserve_id)
+    return results
+
+
+def allocated(func: Callable) -> dict:
+    """Mierzy pamięć zajętą przez wynik func (tracemalloc): łącznie i na wiersz."""
+    tracemalloc.start()
+    try:
+        rows = func()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return {"rows": len(rows), "mib": round(size / 2 ** 20, 1),
+            "bytes_per_row": round(size / len(rows), 1) if rows else 0}
+
+
+def format_benchmarks(db: GoldDatabase, repeat: int) -> Dict[str, dict]:
+    """
+    Mierzy formatowanie wierszy tabel przy odświeżeniu (bez Treeview, więc nie wymaga ekranu):
+    sam formatter, FormatCache przy niezmienionych wierszach i przy 1% wierszy zmienionych między odświeżeniami.
+    """
+    from gold_vault import GoldVaultApp
+    from gold_dialogs import format_history_row
+    from format_cache import FormatCache
+    from records import TransactionRow
+
+    app = GoldVaultApp.__new__(GoldVaultApp)
+    app.create_format_caches()
+    rows = db.get_transactions_with_id(limit=FORMAT_ROWS)
+    # Co setny wiersz z inną wartością - naprzemienne odświeżanie obu list to 1% zmienionych wierszy
+    edited = [TransactionRow(*row) for row in rows]
+    for row in edited[::100]:
+        row.total_value += 1
+    versions = [rows, edited]
+
+    def refresh(formatter: Callable) -> Callable:
+        def run():
+            versions.reverse()
+            return [formatter(row) for row in versions[0]]
+        return run
+
+    dialog_formats = FormatCache(format_history_row, "id", TransactionRow._fields)
+    inventory = db.get_inventory()
+    results = {}
+    for name, formatter, cache, data in (
+            ("history", app._format_history_item, app.history_formats, rows),
+            ("history window", format_history_row, dialog_formats, rows),
+            ("inventory", app._format_inventory_item, app.inventory_formats, inventory)):
+        label = f"{name}, {len(data)} rows"
+        results[f"format[{label}]"] = measure(lambda: [formatter(row) for row in data], repeat)
+        results[f"FormatCache[{label}, cold]"] = measure(lambda: (cache.clear(), [cache(row) for row in data]), repeat)
+        results[f"FormatCache[{label}, unchanged]"] = measure(lambda: [cache(row) for row in data], repeat)
+    results[f"FormatCache[history, {len(rows)} rows, 1% changed]"] = measure(refresh(app.history_formats), repeat)
+    return results
+
+
+def memory_benchmarks(db: GoldDatabase) -> Dict[str, dict]:
+    """
+    Mierzy pamięć pełnej historii i stanu magazynu zwracanych jako rekordy (records.py),
+    historii w kolumnach (load_history_columns) oraz - dla porównania - tych samych
+    kolumn historii pobranych jako krotki.
+    """
+    results = {
+        "memory[get_all_transactions_for_history]": allocated(db.get_all_transactions_for_history),
+        "memory[get_inventory]": allocated(db.get_inventory),
+        "memory[load_history_columns]": allocated(db.load_history_columns),
+    }
+
+    def history_tuples():
+        with sqlite3.connect(db.db_name) as conn:
+            return conn.execute(f"""
+                SELECT t.id, t.transaction_date, gt.category, gt.type, gt.purity, t.transaction_type, t.quantity,
+                       gt.unit, t.weight_total, t.price_per_unit, t.price_per_gram,
+                       {value_sql("t")}, t.description, t.gold_type_id
+                FROM transactions t JOIN inventory gt ON t.gold_type_id = gt.id
+            """).fetchall()
+
+    results["memory[history as tuples]"] = allocated(history_tuples)
+    return results
+
+
+def backup_benchmarks(db: GoldDatabase, repeat: int) -> Dict[str, dict]:
+    """
+    Mierzy kopię zapasową (krokową i jednorazową), jej weryfikację oraz czas zapisu
+    transakcji wykonywanego w trakcie kopiowania krokowego.
+    """
+    import vault_backup
+
+    gold_id = db.get_gold_types()[0].id
+    results = {}
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(db.db_name))) as backup_dir:
+        paths = []
+        results["backup_database[steps]"] = measure(
+            lambda: paths.append(vault_backup.backup_database(db.db_name, backup_dir, keep=1)), 1)
+        results["backup_database[all pages]"] = measure(
+            lambda: paths.append(vault_backup.backup_database(db.db_name, backup_dir, keep=1, pages=-1)), 1)
+        results["verify_backup"] = measure(lambda: vault_backup.verify_backup(paths[-1]), 1)
+
+        # Zapisy z innego połączenia w trakcie kopii - czas odpowiedzi aplikacji
+        latencies = []
+        worker = threading.Thread(target=vault_backup.backup_database, args=(db.db_name, backup_dir, 1))
+        worker.start()
+        while worker.is_alive():
+            start = time.perf_counter()
+            db.add_transaction(gold_id, "Kupno", QUANTITY_SCALE, 100_000, "2000-01-01", "benchmark")
+            latencies.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.05)
+        worker.join()
+        if latencies:
+            results["add_transaction[during backup]"] = {
+                "median_ms": round(statistics.median(latencies), 3), "max_ms": round(max(latencies), 3),
+                "repeat": len(latencies)}
+    return results
+
+
+def archive_benchmarks(db: GoldDatabase, repeat: int) -> Dict[str, dict]:
+    """Mierzy archiwizację roku i zapytania po niej (zmienia bazę roboczą - uruchamiane na końcu)."""
+    date_to = db.get_all_transactions_for_history(limit=1)[0].date[:10]
+    archived_year = int(date_to[:4]) - 3
+    results = {f"archive_year[{archived_year}]": measure(lambda: db.archive_year(archived_year), 1)}
+    results["get_transactions_with_id[after archive]"] = measure(db.get_transactions_with_id, repeat)
+    results["get_transactions_with_id[archived year]"] = measure(
+        lambda: db.get_transactions_with_id("date", f"{archived_year}-01-01", f"{archived_year}-12-31"), repeat)
+    return results
+
+
+def treeview_benchmarks(db: GoldDatabase, repeat: int) -> Dict[str, dict]:
+    """Mierzy wypełnianie tabel głównego okna (wymaga ekranu - w przeciwnym razie pomijane)."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+        root.withdraw()
+    except Exception as e:
+        return {"skipped": f"Tkinter niedostępny: {e}"}
+
+    from gold_vault import GoldVaultApp
+    try:
+        app = GoldVaultApp.__new__(GoldVaultApp)
+        app.create_format_caches()
+        app.root = root
+        app.db = db
+        app.inventory_limit = None
+        app.history_page_size = None
+        app._history_complete = True
+        app.create_widgets()
+
+        inventory = db.get_inventory()
+        ledger = db.get_transactions_with_id()
+        app._populate_treeview(app.history_tree, ledger, "", app._format_history_item, app.history_sorter)
+        sort_results = {
+            "TreeviewSorter.sort[history value]": measure(lambda: app.history_sorter.sort("value"), repeat),
+            "TreeviewSorter.sort[history type]": measure(lambda: app.history_sorter.sort("type"), repeat),
+        }
+        return {
+            **sort_results,
+            "_populate_treeview[inventory]": measure(
+                lambda: app._populate_treeview(app.tree, inventory, "", app._format_inventory_item), repeat),
+            "_populate_treeview[history]": measure(
+                lambda: app._populate_treeview(app.history_tree, ledger, "", app._format_history_item), repeat),
+            "_populate_treeview[history, FormatCache]": measure(
+                lambda: app._populate_treeview(app.history_tree, ledger, "", app.history_formats), repeat),
+            "refresh_inventory": measure(app.refresh_inventory, repeat),
+            "refresh_transaction_history": measure(app.refresh_transaction_history, repeat),
+        }
+    finally:
+        root.destroy()
+
+
+def git_commit() -> Optional[str]:
+    """Zwraca skrót bieżącego commita (jeśli dostępny)."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: List[int], repeat: int, data_dir: str, gold_types: int, seed: int, with_treeview: bool) -> dict:
+    """Uruchamia wszystkie pomiary i zwraca raport."""
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "seed": seed,
+        "gold_types": gold_types,
+        "results": {},
+        "statement_cache": {},
+    }
+    for size in sizes:
+        source = dataset_path(data_dir, size, gold_types, seed)
+        work = os.path.join(data_dir, f"work_{size}.db")
+        shutil.copyfile(source, work)
+        try:
+            db = GoldDatabase(work)
+            print(f"Pomiary dla {size} transakcji...")
+            results = database_benchmarks(db, repeat)
+            results.update(update_transaction_benchmarks(db, repeat))
+            results.update(memory_benchmarks(db))
+            results.update(format_benchmarks(db, repeat))
+            if with_treeview:
+                results.update(treeview_benchmarks(db, repeat))
+            results.update(backup_benchmarks(db, repeat))
+            results.update(archive_benchmarks(db, repeat))
+            report["results"][str(size)] = results
+            report["statement_cache"][str(size)] = db.statement_cache_stats()
+            db.close()
+        finally:
+            for path in [work] + glob.glob(os.path.join(data_dir, f"work_{size}_archive_*.db")):
+                os.remove(path)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punkt wejścia testów wydajności."""
+    parser = argparse.ArgumentParser(prog="run_benchmarks", description="Testy wydajności Magazynu Złota")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="liczby transakcji oddzielone przecinkami")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--gold-types", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="katalog na wygenerowane bazy")
+    parser.add_argument("--no-treeview", action="store_true", help="pomiń pomiary Treeview")
+    parser.add_argument("--output", "-o", help="plik raportu JSON (domyślnie stdout)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    report = run(sizes, args.repeat, args.data_dir, args.gold_types, args.seed, not args.no_treeview)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
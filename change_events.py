@@ -0,0 +1,80 @@
+"""
+Powiadomienia o zmianach w magazynie danych.
+
+Po zatwierdzeniu zapisu magazyn danych (GoldStorage.changes) publikuje listę
+zdarzeń: który wiersz stanu magazynu lub która transakcja została dodana,
+zmieniona albo usunięta. Otwarte okna subskrybują zdarzenia i poprawiają tylko
+dotknięte wiersze tabel zamiast wczytywać je od nowa.
+
+Subskrybenci są wywoływani w wątku, który wykonał zapis - w aplikacji okienkowej
+jest to wątek Tk.
+"""
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from records import Record
+
+# Rodzaje wierszy
+INVENTORY = "inventory"
+TRANSACTION = "transaction"
+
+# Rodzaje zmian; RELOAD - zmiana wielu wierszy naraz (archiwizacja, przywrócenie kopii), do wczytania od nowa
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+RELOAD = "reload"
+
+
+class ChangeEvent(Record):
+    """
+    Zmiana wierszy jednego rodzaju: entity (INVENTORY - id typu złota, TRANSACTION - id transakcji),
+    action (INSERT/UPDATE/DELETE/RELOAD) i ids. Pusta krotka ids oznacza nieznane wiersze
+    (np. id nadane przez serwer) - subskrybent wczytuje wtedy dane tego rodzaju od nowa.
+    """
+
+    __slots__ = ("entity", "action", "ids")
+    _fields = __slots__
+
+    def __init__(self, entity: str, action: str, ids: Iterable[int] = ()):
+        self.entity = entity
+        self.action = action
+        self.ids: Tuple[int, ...] = tuple(dict.fromkeys(ids))
+
+
+class ChangeBus:
+    """Lista subskrybentów zmian; publish wywołuje każdego z nich z listą zdarzeń jednego zapisu."""
+
+    def __init__(self):
+        self._subscribers: List[Callable[[List[ChangeEvent]], None]] = []
+
+    def subscribe(self, callback: Callable[[List[ChangeEvent]], None]):
+        """Dodaje subskrybenta (np. metodę okna); ten sam subskrybent jest dodawany tylko raz."""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[List[ChangeEvent]], None]):
+        """Usuwa subskrybenta (przy zamykaniu okna)."""
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def publish(self, events: List[ChangeEvent]):
+        """Przekazuje zdarzenia subskrybentom; błąd jednego z nich nie zatrzymuje pozostałych."""
+        if not events:
+            return
+        for callback in list(self._subscribers):
+            try:
+                callback(events)
+            except Exception as e:
+                print(f"Błąd obsługi powiadomienia o zmianach: {e}")
+
+
+def in_date_range(date: str, date_from: Optional[str], date_to: Optional[str]) -> bool:
+    """
+    Sprawdza, czy data transakcji mieści się w filtrze dat widoku - tak jak zapytania
+    (porównanie tekstów; "RRRR-MM-DD" oznacza brak filtra). Służy do oceny, czy zmieniona
+    transakcja powinna być widoczna w przefiltrowanej tabeli.
+    """
+    if date_from and date_from != "RRRR-MM-DD" and date < date_from:
+        return False
+    if date_to and date_to != "RRRR-MM-DD" and date > date_to:
+        return False
+    return True
@@ -1,8 +1,33 @@
 import sqlite3
 import os
 import re
+import json
+import sys
+import threading
+from collections import OrderedDict
+from contextlib import closing, contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from functools import lru_cache, wraps
+from types import FunctionType
+from typing import Collection, Iterator, List, Dict, Optional, Sequence, Tuple
+from storage import GoldStorage
+from change_events import ChangeBus, ChangeEvent, INVENTORY, TRANSACTION, INSERT, UPDATE, DELETE, RELOAD
+from query_profiler import QueryProfiler, profiled
+from records import GoldType, InventoryItem, TransactionRow, record_factory
+from units import GROSZE, MILLIGRAMS, QUANTITY_SCALE, line_weight, price_per_gram
+
+# Nazwy kolumn zwracanych krotek i rekordów - używane przy eksporcie i serializacji do JSON.
+# Historia i lista transakcji zwracają rekordy TransactionRow; w JSON mają kolumny HISTORY/LEDGER_COLUMNS.
+INVENTORY_COLUMNS = InventoryItem._fields
+GOLD_TYPE_COLUMNS = GoldType._fields
+HISTORY_COLUMNS = ("id", "date", "category", "type", "purity", "transaction_type", "quantity", "unit",
+                   "weight_total", "price_per_unit", "price_per_gram", "total_value", "description")
+LEDGER_COLUMNS = ("id", "date", "category", "type", "purity", "transaction_type", "quantity", "price_per_unit",
+                  "total_value", "description", "gold_type_id")
+TRANSACTION_DETAIL_COLUMNS = ("id", "gold_type_id", "category", "type", "purity", "transaction_type",
+                              "quantity", "price_per_unit", "date", "description")
+BALANCE_MISMATCH_COLUMNS = ("id", "category", "type", "quantity", "expected")
+VALUATION_COLUMNS = ("category", "quantity", "total_weight", "fine_weight", "book_value")
 
 def natural_sort_key(text):
     """
@@ -16,19 +41,342 @@ def natural_sort_key(text):
     # Podziel tekst na części alfanumeryczne
     return [convert(c) for c in re.split('([0-9]+)', str(text))]
 
-class GoldDatabase:
+@lru_cache(maxsize=16384)
+def _cached_natural_key(text: str) -> tuple:
+    """Klucz naturalny w pamięci podręcznej - kolacja porównuje te same nazwy wielokrotnie."""
+    return tuple(natural_sort_key(text))
+
+def natural_compare(a: str, b: str) -> int:
+    """Kolacja SQLite "NATSORT": porównuje teksty tak jak natural_sort_key ('Sztabka 2g' < 'Sztabka 10g')."""
+    key_a, key_b = _cached_natural_key(a), _cached_natural_key(b)
+    return (key_a > key_b) - (key_a < key_b)
+
+# Klauzule ORDER BY dla sortowania magazynu; ostatni klucz (id) zapewnia stabilną kolejność
+INVENTORY_ORDER_BY = {
+    "category": "category, purity DESC, type COLLATE NATSORT, id",
+    "type": "type COLLATE NATSORT, purity DESC, id",
+    "purity": "purity DESC, category, type COLLATE NATSORT, id",
+    "quantity": "quantity DESC, category, type COLLATE NATSORT, id",
+    "weight": "total_weight DESC, category, type COLLATE NATSORT, id",
+}
+
+AUDIT_COLUMNS = ("id", "changed_at", "period", "entity", "entity_id", "action", "changes")
+ARCHIVE_COLUMNS = ("year", "path", "transactions", "archived_at")
+# Podsumowania miesięczne (monthly_rollups); weighed_value to wartość transakcji o znanej wadze (cena za gram)
+MONTHLY_COLUMNS = ("month", "transaction_type", "transactions", "quantity", "weight_total", "value", "weighed_value")
+# Dopisanie wartości do istniejącego wiersza podsumowania miesiąca
+MONTHLY_UPSERT = """
+    ON CONFLICT (month, transaction_type) DO UPDATE SET
+        transactions = transactions + excluded.transactions,
+        quantity = quantity + excluded.quantity,
+        weight_total = weight_total + excluded.weight_total,
+        value = value + excluded.value,
+        weighed_value = weighed_value + excluded.weighed_value
+"""
+
+# Kolumny tabeli transactions - w tej kolejności wiersze są kopiowane do archiwów rocznych
+TRANSACTION_TABLE_COLUMNS = ("id", "gold_type_id", "transaction_type", "quantity", "weight_total", "price_per_unit",
+                             "price_per_gram", "transaction_date", "description")
+
+# Kolumny transakcji zapisywane w dzienniku zmian (pola wyliczane - waga, cena za gram - są pomijane)
+AUDITED_TRANSACTION_FIELDS = ("gold_type_id", "transaction_type", "quantity", "price_per_unit",
+                              "transaction_date", "description")
+
+# Kolumny tabel z kwotami, wagami i ilościami (liczby całkowite - patrz units) - wspólne dla tworzenia
+# tabel i migracji starych baz, w których te kolumny były typu REAL
+INVENTORY_TABLE = """
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    category TEXT NOT NULL,
+    type TEXT NOT NULL,
+    unit_weight INTEGER NOT NULL,
+    purity REAL NOT NULL,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    unit TEXT NOT NULL DEFAULT 'szt',
+    notes TEXT,
+    UNIQUE(category, type, purity)
+"""
+TRANSACTIONS_TABLE = """
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    gold_type_id INTEGER,
+    transaction_type TEXT NOT NULL CHECK(transaction_type IN ('Kupno', 'Sprzedaż')),
+    quantity INTEGER NOT NULL,
+    weight_total INTEGER,
+    price_per_unit INTEGER NOT NULL,
+    price_per_gram INTEGER,
+    transaction_date TEXT NOT NULL,
+    description TEXT,
+    FOREIGN KEY (gold_type_id) REFERENCES inventory(id)
+"""
+ARCHIVE_TRANSACTIONS_TABLE = """
+    id INTEGER PRIMARY KEY,
+    gold_type_id INTEGER,
+    transaction_type TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    weight_total INTEGER,
+    price_per_unit INTEGER NOT NULL,
+    price_per_gram INTEGER,
+    transaction_date TEXT NOT NULL,
+    description TEXT
+"""
+TRANSACTION_ROLLUPS_TABLE = """
+    year INTEGER NOT NULL,
+    gold_type_id INTEGER NOT NULL,
+    transactions INTEGER NOT NULL,
+    bought_quantity INTEGER NOT NULL,
+    sold_quantity INTEGER NOT NULL,
+    bought_value INTEGER NOT NULL,
+    sold_value INTEGER NOT NULL,
+    PRIMARY KEY (gold_type_id, year)
+"""
+
+# Skale kolumn przeliczanych przy migracji z REAL (złote, gramy, jednostki) na liczby całkowite
+MINOR_UNIT_COLUMNS = {
+    "inventory": {"unit_weight": MILLIGRAMS, "quantity": QUANTITY_SCALE},
+    "transactions": {"quantity": QUANTITY_SCALE, "weight_total": MILLIGRAMS,
+                     "price_per_unit": GROSZE, "price_per_gram": GROSZE},
+    "transaction_rollups": {"bought_quantity": QUANTITY_SCALE, "sold_quantity": QUANTITY_SCALE,
+                            "bought_value": GROSZE, "sold_value": GROSZE},
+}
+
+# Archiwa roczne dołączane (ATTACH) do jednego zapytania; przy większej liczbie lat z zakresu dat
+# transakcje archiwów są kopiowane do tabeli tymczasowej (limit SQLite: 10 dołączonych baz)
+MAX_ATTACHED_ARCHIVES = 8
+
+# PRAGMA user_version bazy po migracji do liczb całkowitych - przy otwieraniu takiej bazy migracja jest pomijana
+MINOR_UNITS_SCHEMA_VERSION = 1
+# PRAGMA user_version bazy z pełnym bieżącym schematem (tabele, indeksy, wyzwalacze, FTS5) - przy otwieraniu
+# takiej bazy init_database nie wykonuje żadnych poleceń DDL; zmiana schematu wymaga zwiększenia wersji
+SCHEMA_VERSION = 2
+
+# Łączna waga pozycji magazynu w miligramach (jak units.line_weight)
+TOTAL_WEIGHT_SQL = f"(unit_weight * quantity + {QUANTITY_SCALE // 2}) / {QUANTITY_SCALE}"
+
+
+def balance_mismatch_sql(tolerance: float = 0, rollups: bool = True) -> str:
+    """
+    Zapytanie o rozbieżności stanów magazynu z historią transakcji i podsumowaniami archiwów
+    (BALANCE_MISMATCH_COLUMNS). Przy liczbach całkowitych tolerance 0 oznacza porównanie dokładne;
+    tolerancja i rollups=False są potrzebne tylko plikom ze starszych wersji (kolumny REAL, brak
+    tabeli transaction_rollups), np. sprawdzanym bez otwierania kopiom zapasowym.
+    """
+    archived = """
+               + COALESCE((SELECT SUM(r.bought_quantity - r.sold_quantity) FROM transaction_rollups r
+                           WHERE r.gold_type_id = i.id), 0)""" if rollups else ""
+    return f"""
+        SELECT i.id, i.category, i.type, i.quantity,
+               COALESCE(SUM(CASE WHEN t.transaction_type = 'Kupno' THEN t.quantity ELSE -t.quantity END), 0){archived}
+               AS expected
+        FROM inventory i
+        LEFT JOIN transactions t ON t.gold_type_id = i.id
+        GROUP BY i.id
+        HAVING ABS(i.quantity - expected) > {tolerance}
+        ORDER BY i.id
+    """
+
+
+def value_sql(row: str) -> str:
+    """Wartość transakcji w groszach w SQL (row - alias tabeli lub new/old), zaokrąglona jak units.line_value."""
+    return f"(({row}.quantity * {row}.price_per_unit + {QUANTITY_SCALE // 2}) / {QUANTITY_SCALE})"
+
+
+# Maksymalna liczba identyfikatorów w jednym warunku IN przy operacjach na wielu transakcjach
+BATCH_CHUNK_SIZE = 500
+
+# Maksymalna liczba wpisów dziennika zamienianych na zdarzenia przy jednym sprawdzeniu zmian - przy większej
+# liczbie widoki są wczytywane od nowa (RELOAD)
+CHANGES_LIMIT = 1000
+
+# Obiekty dziennika zmian odpowiadające rodzajom zdarzeń ChangeEvent
+AUDIT_EVENT_ENTITIES = {"gold_type": INVENTORY, "transaction": TRANSACTION}
+
+# Indeksy pełnotekstowe: (tabela FTS5, tabela źródłowa, indeksowane kolumny)
+SEARCH_INDEXES = (
+    ("transactions_fts", "transactions", ("description",)),
+    ("inventory_fts", "inventory", ("type", "notes")),
+)
+
+def fts_query(text: str) -> str:
+    """
+    Zamienia tekst wpisany przez użytkownika na zapytanie FTS5: każde słowo jako prefiks,
+    wszystkie słowa wymagane. Cudzysłowy są usuwane, więc składnia FTS5 nie jest interpretowana.
+    """
+    words = text.replace('"', " ").split()
+    return " ".join(f'"{word}"*' for word in words)
+
+TRANSACTION_TYPES = ("Kupno", "Sprzedaż")
+
+
+def transaction_input_error(transaction_type: Optional[str] = None, quantity: Optional[int] = None,
+                            price_per_unit: Optional[int] = None, transaction_date: Optional[str] = None) -> Optional[str]:
+    """
+    Sprawdza pola zapisywanej transakcji (pola None są pomijane). Zwraca opis pierwszego błędu
+    albo None. Data: YYYY-MM-DD (godzina jest dopisywana przy zapisie) lub YYYY-MM-DD HH:MM:SS.
+    """
+    if transaction_type is not None and transaction_type not in TRANSACTION_TYPES:
+        return "rodzaj transakcji musi mieć wartość 'Kupno' lub 'Sprzedaż'"
+    if quantity is not None and quantity <= 0:
+        return "ilość musi być dodatnia"
+    if price_per_unit is not None and price_per_unit <= 0:
+        return "cena musi być dodatnia"
+    if transaction_date is not None:
+        date_format = (isinstance(transaction_date, str)
+                       and {10: "%Y-%m-%d", 19: "%Y-%m-%d %H:%M:%S"}.get(len(transaction_date)))
+        try:
+            if not date_format:
+                raise ValueError(transaction_date)
+            datetime.strptime(transaction_date, date_format)
+        except ValueError:
+            return "data musi być w formacie YYYY-MM-DD lub YYYY-MM-DD HH:MM:SS"
+    return None
+
+# Liczba skompilowanych zapytań trzymanych przez każde połączenie: stałe zapytania metod
+# oraz warianty zapytań historii dla różnych kombinacji filtrów
+STATEMENT_CACHE_SIZE = 128
+
+
+class StatementCacheStats:
+    """
+    Trafienia i chybienia pamięci skompilowanych zapytań jednego połączenia.
+    sqlite3 trzyma skompilowane zapytania w LRU według tekstu SQL (cached_statements),
+    ale nie udostępnia liczników - to LRU jest tu odtwarzane na samych tekstach zapytań.
+    """
+
+    __slots__ = ("size", "hits", "misses", "_recent")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+
+    def record(self, sql: str):
+        """Notuje wykonanie zapytania."""
+        recent = self._recent
+        if sql in recent:
+            recent.move_to_end(sql)
+            self.hits += 1
+        else:
+            self.misses += 1
+            recent[sql] = None
+            if len(recent) > self.size:
+                recent.popitem(last=False)
+
+
+class StatementCursor(sqlite3.Cursor):
+    """Kursor notujący wykonywane zapytania w statystykach pamięci zapytań połączenia."""
+
+    def execute(self, sql, parameters=()):
+        self.connection.statement_stats.record(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.connection.statement_stats.record(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+
+class StatementConnection(sqlite3.Connection):
+    """Połączenie z licznikami trafień pamięci skompilowanych zapytań (StatementCacheStats)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statement_stats = StatementCacheStats(kwargs.get("cached_statements", STATEMENT_CACHE_SIZE))
+        # Profiler, którego callback SQL jest zainstalowany (GoldDatabase._traced)
+        self.profiler: Optional[QueryProfiler] = None
+
+    def cursor(self, factory=StatementCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        self.statement_stats.record(sql)
+        return super().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self.statement_stats.record(sql)
+        return super().executemany(sql, seq_of_parameters)
+
+
+class GoldDatabase(GoldStorage):
     """Klasa odpowiedzialna za zarządzanie bazą danych złota."""
     
-    def __init__(self, db_name: str = "gold_vault.db"):
-        """Inicjalizuje połączenie z bazą danych."""
+    def __init__(self, db_name: str = "gold_vault.db", profiler: Optional[QueryProfiler] = None):
+        """Inicjalizuje połączenie z bazą danych. Opcjonalny profiler mierzy wywołania metod."""
         self.db_name = db_name
+        self.profiler = profiler
+        self.fts_enabled = False
+        self._audit_period: Optional[str] = None
+        self._local = threading.local()
+        self._statement_stats: List[StatementCacheStats] = []
+        self._stats_lock = threading.Lock()
+        self.changes = ChangeBus()
+        # Sprawdzanie zmian innych procesów (poll_changes): ostatni znany wpis dziennika
+        # i wpisy zapisane przez ten proces, już opublikowane przez metody zapisu
+        self._audit_seen: Optional[int] = None
+        self._own_audit_ids: set = set()
+        self._audit_lock = threading.Lock()
         self.init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Zwraca połączenie z bazą danych używane przez metody klasy. Każdy wątek ma własne,
+        długotrwałe połączenie, więc skompilowane zapytania są używane ponownie między wywołaniami.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._open_connection(self.db_name)
+        return self._traced(conn)
+
+    def _traced(self, conn: StatementConnection) -> StatementConnection:
+        """Instaluje w połączeniu callback SQL bieżącego profilera (włączonego lub wyłączonego po otwarciu)."""
+        if conn.profiler is not self.profiler:
+            conn.set_trace_callback(self.profiler.trace if self.profiler is not None else None)
+            conn.profiler = self.profiler
+        return conn
+
+    def _open_connection(self, database: str, **kwargs) -> StatementConnection:
+        """Otwiera połączenie z pamięcią skompilowanych zapytań, sortowaniem NATSORT i profilerem."""
+        conn = sqlite3.connect(database, factory=StatementConnection, cached_statements=STATEMENT_CACHE_SIZE, **kwargs)
+        conn.create_collation("NATSORT", natural_compare)
+        self._traced(conn)
+        with self._stats_lock:
+            self._statement_stats.append(conn.statement_stats)
+        return conn
+
+    def set_profiler(self, profiler: Optional[QueryProfiler]):
+        """
+        Włącza (QueryProfiler) lub wyłącza (None) profilowanie działającej bazy, np. z okna DIAGNOSTYKA.
+        Połączenia wątków dostają nowy callback SQL przy najbliższym użyciu.
+        """
+        self.profiler = profiler
+
+    def close(self):
+        """Zamyka połączenie bieżącego wątku (następne wywołanie metody otworzy nowe)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def statement_cache_stats(self) -> dict:
+        """Łączne trafienia i chybienia pamięci skompilowanych zapytań wszystkich połączeń."""
+        with self._stats_lock:
+            stats = list(self._statement_stats)
+        hits = sum(item.hits for item in stats)
+        misses = sum(item.misses for item in stats)
+        return {"connections": len(stats), "size": STATEMENT_CACHE_SIZE, "hits": hits, "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0}
+    
+    @profiled
     def init_database(self):
-        """Tworzy tabele bazy danych jeśli nie istnieją."""
+        """
+        Tworzy tabele bazy danych jeśli nie istnieją. Baza ze schematem w wersji SCHEMA_VERSION
+        (PRAGMA user_version) jest tylko sprawdzana, czy ma indeksy FTS5 - bez migracji i DDL.
+        """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
+                if cursor.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                    self.fts_enabled = cursor.execute(
+                        "SELECT 1 FROM sqlite_master WHERE name = 'transactions_fts'").fetchone() is not None
+                    return
                 
                 # Sprawdź czy tabela inventory istnieje i ma starą strukturę
                 cursor.execute("PRAGMA table_info(inventory)")
@@ -36,7 +384,7 @@ class GoldDatabase:
                 
                 if columns and 'category' not in columns:
                     # Tabela istnieje ale ma starą strukturę - migracja
-                    print("Migracja bazy danych...")
+                    print("Migracja bazy danych...", file=sys.stderr)
                     
                     # Utwórz nową tabelę z nową strukturą
                     cursor.execute("""
@@ -64,22 +412,10 @@ class GoldDatabase:
                     cursor.execute("DROP TABLE inventory")
                     cursor.execute("ALTER TABLE inventory_new RENAME TO inventory")
                     
-                    print("Migracja zakończona.")
+                    print("Migracja zakończona.", file=sys.stderr)
                 else:
                     # Tabela inventory - nowa struktura
-                    cursor.execute("""
-                        CREATE TABLE IF NOT EXISTS inventory (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            category TEXT NOT NULL,
-                            type TEXT NOT NULL,
-                            unit_weight REAL NOT NULL,
-                            purity REAL NOT NULL,
-                            quantity REAL NOT NULL DEFAULT 0,
-                            unit TEXT NOT NULL DEFAULT 'szt',
-                            notes TEXT,
-                            UNIQUE(category, type, purity)
-                        )
-                    """)
+                    cursor.execute(f"CREATE TABLE IF NOT EXISTS inventory ({INVENTORY_TABLE})")
                 
                 # Sprawdź czy tabela transactions istnieje i ma starą strukturę
                 cursor.execute("PRAGMA table_info(transactions)")
@@ -87,7 +423,7 @@ class GoldDatabase:
                 
                 if trans_columns and 'weight_total' not in trans_columns:
                     # Tabela transactions istnieje ale ma starą strukturę - migracja
-                    print("Migracja tabeli transactions...")
+                    print("Migracja tabeli transactions...", file=sys.stderr)
                     
                     # Utwórz nową tabelę z nową strukturą
                     cursor.execute("""
@@ -116,100 +452,495 @@ class GoldDatabase:
                     cursor.execute("DROP TABLE transactions")
                     cursor.execute("ALTER TABLE transactions_new RENAME TO transactions")
                     
-                    print("Migracja tabeli transactions zakończona.")
+                    print("Migracja tabeli transactions zakończona.", file=sys.stderr)
                 else:
                     # Tabela transactions - rozszerzona o wagę i jednostkę
-                    cursor.execute("""
-                        CREATE TABLE IF NOT EXISTS transactions (
-                            id INTEGER PRIMARY KEY AUTOINCREMENT,
-                            gold_type_id INTEGER,
-                            transaction_type TEXT NOT NULL CHECK(transaction_type IN ('Kupno', 'Sprzedaż')),
-                            quantity REAL NOT NULL,
-                            weight_total REAL,
-                            price_per_unit REAL NOT NULL,
-                            price_per_gram REAL,
-                            transaction_date TEXT NOT NULL,
-                            description TEXT,
-                            FOREIGN KEY (gold_type_id) REFERENCES inventory(id)
-                        )
-                    """)
+                    cursor.execute(f"CREATE TABLE IF NOT EXISTS transactions ({TRANSACTIONS_TABLE})")
+                
+                # Dziennik zmian - tylko dopisywanie. Id rośnie z czasem (wpisów nie można usuwać),
+                # więc miesiąc (period) to zakres id zapisany w audit_periods - bez indeksu na każdym wpisie.
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS audit_log (
+                        id INTEGER PRIMARY KEY,
+                        changed_at TEXT NOT NULL,
+                        period TEXT NOT NULL,
+                        entity TEXT NOT NULL,
+                        entity_id INTEGER NOT NULL,
+                        action TEXT NOT NULL CHECK(action IN ('insert', 'update', 'delete')),
+                        changes TEXT
+                    )
+                """)
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_audit_entity ON audit_log(entity, entity_id)")
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS audit_periods (
+                        period TEXT PRIMARY KEY,
+                        first_id INTEGER NOT NULL
+                    )
+                """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS audit_log_no_update BEFORE UPDATE ON audit_log BEGIN
+                        SELECT RAISE(ABORT, 'audit_log: wpisy nie mogą być zmieniane');
+                    END
+                """)
+                cursor.execute("""
+                    CREATE TRIGGER IF NOT EXISTS audit_log_no_delete BEFORE DELETE ON audit_log BEGIN
+                        SELECT RAISE(ABORT, 'audit_log: wpisy nie mogą być usuwane');
+                    END
+                """)
+                
+                # Archiwa roczne: zamknięte lata przeniesione do osobnych plików (ścieżka względem pliku bazy)
+                # oraz ich podsumowania na typ złota, potrzebne do weryfikacji stanów i wyceny
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS archives (
+                        year INTEGER PRIMARY KEY,
+                        path TEXT NOT NULL,
+                        transactions INTEGER NOT NULL,
+                        archived_at TEXT NOT NULL
+                    )
+                """)
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS transaction_rollups ({TRANSACTION_ROLLUPS_TABLE})")
+                
+                # Kwoty, wagi i ilości jako liczby całkowite (grosze, miligramy) - migracja baz z kolumnami REAL
+                self._migrate_to_minor_units(cursor)
+                
+                # Wyszukiwanie po typie złota łączy trafienia z transakcjami tego typu
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_gold_type ON transactions(gold_type_id)")
+                # Najnowsze transakcje (strony historii w głównym oknie) bez sortowania całej tabeli
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(transaction_date)")
                 
+                self._init_monthly_rollups(cursor)
+                self.fts_enabled = self._init_search_index(cursor)
+                if self.fts_enabled:
+                    # Bez FTS5 schemat jest sprawdzany przy każdym otwarciu - indeksy powstaną, gdy SQLite je obsłuży
+                    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
                 conn.commit()
         except sqlite3.Error as e:
             print(f"Błąd inicjalizacji bazy danych: {e}")
             raise
-    
-    def add_gold_type(self, category: str, gold_type: str, unit_weight: float, purity: float, unit: str = "szt", notes: str = "") -> bool:
-        """Dodaje nowy typ złota do bazy danych."""
+
+    @staticmethod
+    def _has_real_columns(cursor: sqlite3.Cursor, table: str, schema: str = "main") -> bool:
+        """Sprawdza, czy kolumny kwot, wag lub ilości tabeli (MINOR_UNIT_COLUMNS) są jeszcze typu REAL."""
+        return any(column[1] in MINOR_UNIT_COLUMNS[table] and column[2].upper() == "REAL"
+                   for column in cursor.execute(f"PRAGMA {schema}.table_info({table})").fetchall())
+
+    @staticmethod
+    def _rebuild_in_minor_units(cursor: sqlite3.Cursor, schema: str, table: str, definition: str):
+        """
+        Przebudowuje tabelę według definicji kolumn definition, przeliczając kolumny MINOR_UNIT_COLUMNS
+        na liczby całkowite. Wiersze zachowują id, a licznik AUTOINCREMENT - wartość sprzed migracji.
+        """
+        scales = MINOR_UNIT_COLUMNS[table]
+        columns = [column[1] for column in cursor.execute(f"PRAGMA {schema}.table_info({table})").fetchall()]
+        values = ", ".join(f"CAST(ROUND({column} * {scales[column]}) AS INTEGER)" if column in scales else column
+                           for column in columns)
+        sequence = None
+        if "AUTOINCREMENT" in definition:
+            sequence = cursor.execute(f"SELECT seq FROM {schema}.sqlite_sequence WHERE name = ?", (table,)).fetchone()
+        cursor.execute(f"CREATE TABLE {schema}.{table}_minor_units ({definition})")
+        cursor.execute(f"INSERT INTO {schema}.{table}_minor_units ({', '.join(columns)}) "
+                       f"SELECT {values} FROM {schema}.{table}")
+        cursor.execute(f"DROP TABLE {schema}.{table}")
+        cursor.execute(f"ALTER TABLE {schema}.{table}_minor_units RENAME TO {table}")
+        if sequence is not None:
+            # Licznik znika razem z usuniętą tabelą - id usuniętych wierszy nie mogą zostać użyte ponownie
+            cursor.execute(f"UPDATE {schema}.sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?", (sequence[0], table))
+            if not cursor.rowcount:
+                cursor.execute(f"INSERT INTO {schema}.sqlite_sequence (name, seq) VALUES (?, ?)", (table, sequence[0]))
+
+    def _migrate_to_minor_units(self, cursor: sqlite3.Cursor):
+        """
+        Przelicza kwoty, wagi i ilości zapisane jako REAL (złote, gramy, jednostki) na liczby całkowite
+        (grosze, miligramy, tysięczne części jednostki - patrz units). Tabele są przebudowywane w jednej
+        transakcji, a podsumowania miesięczne usuwane - _init_monthly_rollups policzy je od nowa.
+        Zakończenie migracji (także w nowej bazie) zapisuje PRAGMA user_version, więc kolejne otwarcia
+        jej nie sprawdzają. Kopia zapasowa sprzed migracji ma wcześniejszą wersję - po przywróceniu
+        przeliczona zostanie razem ze skopiowanymi z nią archiwami. Wpisy dziennika zmian sprzed
+        migracji zostają w starych jednostkach (dziennika nie można zmieniać).
+        """
+        if cursor.execute("PRAGMA user_version").fetchone()[0] >= MINOR_UNITS_SCHEMA_VERSION:
+            return
+        conn = cursor.connection
+        # ATTACH nie działa w otwartej transakcji
+        if conn.in_transaction:
+            conn.commit()
+        # Archiwa najpierw - podsumowania miesięczne są liczone także z nich
+        for (path,) in cursor.execute("SELECT path FROM archives").fetchall():
+            path = self._archive_file(path)
+            if not os.path.exists(path):
+                continue
+            cursor.execute("ATTACH DATABASE ? AS unit_migration", (path,))
+            try:
+                if self._has_real_columns(cursor, "transactions", "unit_migration"):
+                    print(f"Przeliczanie archiwum {os.path.basename(path)} na grosze i miligramy...", file=sys.stderr)
+                    cursor.execute("BEGIN IMMEDIATE")
+                    self._rebuild_in_minor_units(cursor, "unit_migration", "transactions", ARCHIVE_TRANSACTIONS_TABLE)
+                    cursor.execute("CREATE INDEX unit_migration.idx_transactions_date ON transactions(transaction_date)")
+                    conn.commit()
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                cursor.execute("DETACH DATABASE unit_migration")
+
+        definitions = {"inventory": INVENTORY_TABLE, "transactions": TRANSACTIONS_TABLE,
+                       "transaction_rollups": TRANSACTION_ROLLUPS_TABLE}
+        tables = [table for table in definitions if self._has_real_columns(cursor, table)]
+        if tables:
+            print("Migracja kwot i wag do groszy i miligramów...", file=sys.stderr)
+        cursor.execute("BEGIN IMMEDIATE")
+        for table in tables:
+            self._rebuild_in_minor_units(cursor, "main", table, definitions[table])
+        if tables:
+            cursor.execute("DROP TABLE IF EXISTS monthly_rollups")
+        # Wersja zapisana w tej samej transakcji co przebudowane tabele
+        cursor.execute(f"PRAGMA user_version = {MINOR_UNITS_SCHEMA_VERSION}")
+        conn.commit()
+        if tables:
+            print("Migracja zakończona.", file=sys.stderr)
+
+    def _write_audit(self, cursor: sqlite3.Cursor, entries: List[Tuple[str, int, str, Optional[dict]]]):
+        """
+        Dopisuje wpisy (obiekt, id, akcja, zmiany) do dziennika w bieżącej transakcji bazy.
+        Zmiany zapisywane są zwięźle: dla update tylko zmienione pola {pole: [przed, po]},
+        dla delete pełny obraz usuniętego wiersza, dla insert nic (wiersz jest w tabeli).
+        """
+        changed_at = datetime.now().isoformat(sep=" ", timespec="seconds")
+        period = changed_at[:7]
+        cursor.executemany(
+            "INSERT INTO audit_log (changed_at, period, entity, entity_id, action, changes) VALUES (?, ?, ?, ?, ?, ?)",
+            [(changed_at, period, entity, entity_id, action,
+              json.dumps(changes, ensure_ascii=False, separators=(",", ":")) if changes else None)
+             for entity, entity_id, action, changes in entries]
+        )
+        first_id = cursor.execute("SELECT MAX(id) FROM audit_log").fetchone()[0] - len(entries) + 1
+        if period != self._audit_period:
+            # Pierwszy wpis miesiąca (w tym procesie) - zapamiętaj początek zakresu id
+            cursor.execute("INSERT OR IGNORE INTO audit_periods (period, first_id) VALUES (?, ?)", (period, first_id))
+            self._audit_period = period
+        # Wpisy bieżącego zapisu (każdy zapis wywołuje _write_audit raz) - po zatwierdzeniu przejmuje je _publish
+        self._local.audit_ids = tuple(range(first_id, first_id + len(entries)))
+
+    def _publish(self, events: List[ChangeEvent]):
+        """
+        Publikuje zdarzenia zatwierdzonego zapisu. Jego wpisy dziennika stają się ostatnim zapisem wątku
+        (take_last_write) i - gdy sprawdzane są zmiany innych procesów - nie wrócą z poll_changes.
+        """
+        audit_ids = getattr(self._local, "audit_ids", ())
+        self._local.audit_ids = ()
+        self._local.last_write = audit_ids
+        if audit_ids and self._audit_seen is not None:
+            with self._audit_lock:
+                self._own_audit_ids.update(audit_ids)
+        self.changes.publish(events)
+
+    def take_last_write(self) -> Tuple[int, ...]:
+        """
+        Zwraca (i zapomina) wpisy dziennika ostatniego zapisu wykonanego w bieżącym wątku - wywoływane przez
+        subskrybentów changes, by zapamiętać zapis do cofnięcia (revert_changes). Pusta krotka - zdarzenia
+        nie pochodzą z zapisu tego wątku (zmiany innych stanowisk, przywrócenie kopii).
+        """
+        audit_ids = getattr(self._local, "last_write", ())
+        self._local.last_write = ()
+        return audit_ids
+
+    @staticmethod
+    def _diff(before: dict, after: dict) -> dict:
+        """Zwraca pola, które się zmieniły: {pole: [przed, po]}."""
+        return {field: [before[field], value] for field, value in after.items() if before.get(field) != value}
+
+    @staticmethod
+    def _monthly_values(row: str, sign: str = "") -> str:
+        """Wartości MONTHLY_COLUMNS jednej transakcji (row - new/old w wyzwalaczu lub alias tabeli)."""
+        value = value_sql(row)
+        return (f"substr({row}.transaction_date, 1, 7), {row}.transaction_type, {sign}1, {sign}{row}.quantity, "
+                f"{sign}COALESCE({row}.weight_total, 0), {sign}({value}), "
+                f"{sign}(CASE WHEN {row}.weight_total IS NULL THEN 0 ELSE {value} END)")
+
+    def _monthly_aggregate(self, source: str, where: str = "") -> str:
+        """Zapytanie dopisujące do monthly_rollups sumy transakcji z tabeli source (WHERE true - składnia UPSERT)."""
+        columns = ", ".join(MONTHLY_COLUMNS)
+        return f"""
+            INSERT INTO main.monthly_rollups ({columns})
+            SELECT substr(t.transaction_date, 1, 7), t.transaction_type, COUNT(*), SUM(t.quantity),
+                   SUM(COALESCE(t.weight_total, 0)), SUM({value_sql("t")}),
+                   SUM(CASE WHEN t.weight_total IS NULL THEN 0 ELSE {value_sql("t")} END)
+            FROM {source} t
+            WHERE {where or "true"}
+            GROUP BY 1, 2
+            {MONTHLY_UPSERT}
+        """
+
+    def _init_monthly_rollups(self, cursor: sqlite3.Cursor):
+        """
+        Tworzy podsumowania miesięczne (liczba, ilość, waga i wartość transakcji na miesiąc i rodzaj)
+        utrzymywane wyzwalaczami, więc panel statystyk nie przegląda całej historii. Nowa tabela jest
+        wypełniana z bieżącej bazy i archiwów rocznych - przeniesione lata zostają w podsumowaniach.
+        """
+        exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'monthly_rollups'").fetchone()
+        if not exists:
+            cursor.execute("""
+                CREATE TABLE monthly_rollups (
+                    month TEXT NOT NULL,
+                    transaction_type TEXT NOT NULL,
+                    transactions INTEGER NOT NULL,
+                    quantity INTEGER NOT NULL,
+                    weight_total INTEGER NOT NULL,
+                    value INTEGER NOT NULL,
+                    weighed_value INTEGER NOT NULL,
+                    PRIMARY KEY (month, transaction_type)
+                ) WITHOUT ROWID
+            """)
+            print("Budowanie podsumowań miesięcznych...", file=sys.stderr)
+            cursor.execute(self._monthly_aggregate("main.transactions"))
+            archives = cursor.execute("SELECT path FROM archives").fetchall()
+            # ATTACH nie działa w otwartej transakcji
+            cursor.connection.commit()
+            for (path,) in archives:
+                path = self._archive_file(path)
+                if not os.path.exists(path):
+                    continue
+                cursor.execute("ATTACH DATABASE ? AS monthly_source", (path,))
+                try:
+                    cursor.execute(self._monthly_aggregate("monthly_source.transactions"))
+                    cursor.connection.commit()
+                finally:
+                    cursor.execute("DETACH DATABASE monthly_source")
+
+        columns = ", ".join(MONTHLY_COLUMNS)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS transactions_monthly_insert AFTER INSERT ON transactions BEGIN
+                INSERT INTO monthly_rollups ({columns}) VALUES ({self._monthly_values("new")})
+                {MONTHLY_UPSERT};
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS transactions_monthly_delete AFTER DELETE ON transactions BEGIN
+                INSERT INTO monthly_rollups ({columns}) VALUES ({self._monthly_values("old", "-")})
+                {MONTHLY_UPSERT};
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS transactions_monthly_update
+            AFTER UPDATE OF transaction_type, quantity, weight_total, price_per_unit, transaction_date ON transactions
+            BEGIN
+                INSERT INTO monthly_rollups ({columns}) VALUES ({self._monthly_values("old", "-")})
+                {MONTHLY_UPSERT};
+                INSERT INTO monthly_rollups ({columns}) VALUES ({self._monthly_values("new")})
+                {MONTHLY_UPSERT};
+            END
+        """)
+
+    def _init_search_index(self, cursor: sqlite3.Cursor) -> bool:
+        """
+        Tworzy indeksy pełnotekstowe FTS5 (opisy transakcji, nazwy i notatki typów złota)
+        oraz wyzwalacze utrzymujące je w zgodzie z tabelami. Zwraca False, jeśli SQLite nie ma FTS5.
+        """
+        existing = {row[0] for row in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ('transactions_fts', 'inventory_fts')")}
+        try:
+            for table, content, columns in SEARCH_INDEXES:
+                if table in existing:
+                    continue
+                cursor.execute(f"""
+                    CREATE VIRTUAL TABLE {table} USING fts5(
+                        {", ".join(columns)}, content='{content}', content_rowid='id',
+                        tokenize='unicode61 remove_diacritics 2'
+                    )
+                """)
+                print(f"Budowanie indeksu wyszukiwania {table}...", file=sys.stderr)
+                cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+        except sqlite3.OperationalError as e:
+            print(f"Wyszukiwanie pełnotekstowe niedostępne ({e}) - używane będzie LIKE.", file=sys.stderr)
+            return False
+
+        for table, content, columns in SEARCH_INDEXES:
+            column_list = ", ".join(columns)
+            new_values = ", ".join(f"new.{column}" for column in columns)
+            old_values = ", ".join(f"old.{column}" for column in columns)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {content}_fts_insert AFTER INSERT ON {content} BEGIN
+                    INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_values});
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {content}_fts_delete AFTER DELETE ON {content} BEGIN
+                    INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {content}_fts_update AFTER UPDATE OF {column_list} ON {content} BEGIN
+                    INSERT INTO {table}({table}, rowid, {column_list}) VALUES ('delete', old.id, {old_values});
+                    INSERT INTO {table}(rowid, {column_list}) VALUES (new.id, {new_values});
+                END
+            """)
+        return True
+
+    def _archive_file(self, path: str) -> str:
+        """Ścieżka pliku archiwum zapisanego w tabeli archives (względem katalogu pliku bazy)."""
+        return os.path.join(os.path.dirname(self.db_name), path)
+
+    @contextmanager
+    def _transactions_source(self, conn: sqlite3.Connection, date_from: Optional[str],
+                             date_to: Optional[str]) -> Iterator[str]:
+        """
+        Podaje źródło transakcji dla zapytania z filtrem dat: tabelę transactions albo, gdy data
+        początkowa sięga zarchiwizowanych lat, UNION ALL z tabelami dołączonych (ATTACH) archiwów.
+        Bez daty początkowej przeszukiwana jest tylko bieżąca baza. Archiwa są odłączane (DETACH)
+        po wyjściu z bloku with, więc wyniki zapytania trzeba pobrać wewnątrz bloku. SQLite dołącza
+        naraz najwyżej 10 baz - przy większej liczbie lat (MAX_ATTACHED_ARCHIVES) transakcje z zakresu
+        dat są kopiowane z archiwów po kolei do tymczasowej tabeli archived_transactions.
+        """
+        schemas: List[str] = []
+        copied = False
+        try:
+            if not date_from or date_from == "RRRR-MM-DD" or not date_from[:4].isdigit():
+                yield "transactions"
+                return
+            query = "SELECT year, path FROM archives WHERE year >= ?"
+            params: list = [int(date_from[:4])]
+            if date_to and date_to != "RRRR-MM-DD" and date_to[:4].isdigit():
+                query += " AND year <= ?"
+                params.append(int(date_to[:4]))
+            archives = conn.execute(query + " ORDER BY year", params).fetchall()
+            if not archives:
+                yield "transactions"
+                return
+
+            columns = ", ".join(TRANSACTION_TABLE_COLUMNS)
+            if len(archives) <= MAX_ATTACHED_ARCHIVES:
+                parts = [f"SELECT {columns} FROM main.transactions"]
+                for year, path in archives:
+                    schema = f"archive_{year}"
+                    conn.execute(f"ATTACH DATABASE ? AS {schema}", (self._archive_file(path),))
+                    schemas.append(schema)
+                    parts.append(f"SELECT {columns} FROM {schema}.transactions")
+                yield "(" + " UNION ALL ".join(parts) + ")"
+                return
+
+            date_filter = "transaction_date >= ?"
+            date_params = [date_from]
+            if date_to and date_to != "RRRR-MM-DD":
+                date_filter += " AND transaction_date <= ?"
+                date_params.append(date_to)
+            conn.execute(f"CREATE TEMP TABLE archived_transactions ({ARCHIVE_TRANSACTIONS_TABLE})")
+            copied = True
+            for _, path in archives:
+                conn.execute("ATTACH DATABASE ? AS archive_source", (self._archive_file(path),))
+                try:
+                    conn.execute(f"INSERT INTO temp.archived_transactions ({columns}) "
+                                 f"SELECT {columns} FROM archive_source.transactions WHERE {date_filter}",
+                                 date_params)
+                    # ATTACH/DETACH nie działają w otwartej transakcji
+                    conn.commit()
+                finally:
+                    if conn.in_transaction:
+                        conn.rollback()
+                    conn.execute("DETACH DATABASE archive_source")
+            yield (f"(SELECT {columns} FROM main.transactions "
+                   f"UNION ALL SELECT {columns} FROM temp.archived_transactions)")
+        finally:
+            for schema in schemas:
+                conn.execute(f"DETACH DATABASE {schema}")
+            if copied:
+                conn.execute("DROP TABLE temp.archived_transactions")
+
+    @profiled
+    def add_gold_type(self, category: str, gold_type: str, unit_weight: int, purity: float, unit: str = "szt", notes: str = "") -> bool:
+        """Dodaje nowy typ złota do bazy danych (waga jednostkowa w miligramach, czystość w procentach)."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "INSERT INTO inventory (category, type, unit_weight, purity, unit, notes) VALUES (?, ?, ?, ?, ?, ?)",
                     (category, gold_type, unit_weight, purity, unit, notes)
                 )
+                gold_type_id = cursor.lastrowid
+                self._write_audit(cursor, [("gold_type", gold_type_id, "insert", None)])
                 conn.commit()
-                return True
+            self._publish([ChangeEvent(INVENTORY, INSERT, [gold_type_id])])
+            return True
         except sqlite3.IntegrityError:
             return False  # Kombinacja już istnieje
         except sqlite3.Error as e:
             print(f"Błąd dodawania typu złota: {e}")
             return False
     
-    def get_inventory(self, sort_by: str = "category") -> List[Tuple]:
-        """Pobiera aktualny stan magazynu z możliwością sortowania."""
+    @profiled
+    def get_inventory(self, sort_by: str = "category", limit: Optional[int] = None) -> List[InventoryItem]:
+        """
+        Pobiera aktualny stan magazynu z możliwością sortowania.
+        Sortowanie wykonuje SQLite (typ złota porównywany kolacją NATSORT), więc można ograniczyć wynik limitem.
+        """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
-                # Pobierz wszystkie dane
-                cursor.execute("""
+                order_by_clause = INVENTORY_ORDER_BY.get(sort_by, INVENTORY_ORDER_BY["category"])
+                query = f"""
                     SELECT category, type, unit_weight, purity, quantity, unit,
-                           (unit_weight * quantity) as total_weight,
+                           {TOTAL_WEIGHT_SQL} as total_weight,
                            notes
                     FROM inventory
-                """)
-                inventory = cursor.fetchall()
-                
-                # Sortowanie w Pythonie dla lepszej kontroli nad sortowaniem numerycznym
-                if sort_by == "category":
-                    inventory.sort(key=lambda x: (x[0], -x[3], natural_sort_key(x[1])))  # kategoria, czystość DESC, typ numerycznie
-                elif sort_by == "type":
-                    inventory.sort(key=lambda x: (natural_sort_key(x[1]), -x[3]))  # typ numerycznie, czystość DESC
-                elif sort_by == "purity":
-                    inventory.sort(key=lambda x: (-x[3], x[0], natural_sort_key(x[1])))  # czystość DESC, kategoria, typ numerycznie
-                elif sort_by == "quantity":
-                    inventory.sort(key=lambda x: (-x[4], x[0], natural_sort_key(x[1])))  # ilość DESC, kategoria, typ numerycznie
-                elif sort_by == "weight":
-                    inventory.sort(key=lambda x: (-x[6], x[0], natural_sort_key(x[1])))  # waga DESC, kategoria, typ numerycznie
-                else:
-                    inventory.sort(key=lambda x: (x[0], -x[3], natural_sort_key(x[1])))  # domyślnie jak kategoria
+                    ORDER BY {order_by_clause}
+                """
+                params = []
+                if limit is not None:
+                    query += " LIMIT ?"
+                    params.append(limit)
                 
-                return inventory
+                cursor.row_factory = record_factory(InventoryItem)
+                cursor.execute(query, params)
+                return cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Błąd pobierania magazynu: {e}")
             return []
     
-    def get_gold_types(self) -> List[Tuple]:
+    @profiled
+    def get_inventory_by_ids(self, gold_type_ids: List[int]) -> Dict[int, InventoryItem]:
+        """Pobiera pozycje stanu magazynu wskazanych typów złota (id typu -> pozycja), paczkami po BATCH_CHUNK_SIZE."""
+        gold_type_ids = list(dict.fromkeys(gold_type_ids))
+        items: Dict[int, InventoryItem] = {}
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                for start in range(0, len(gold_type_ids), BATCH_CHUNK_SIZE):
+                    chunk = gold_type_ids[start:start + BATCH_CHUNK_SIZE]
+                    cursor.execute(f"""
+                        SELECT id, category, type, unit_weight, purity, quantity, unit,
+                               {TOTAL_WEIGHT_SQL} as total_weight,
+                               notes
+                        FROM inventory
+                        WHERE id IN ({", ".join("?" * len(chunk))})
+                    """, chunk)
+                    for gold_type_id, *values in cursor.fetchall():
+                        items[gold_type_id] = InventoryItem(*values)
+            return items
+        except sqlite3.Error as e:
+            print(f"Błąd pobierania magazynu: {e}")
+            return {}
+    
+    @profiled
+    def get_gold_types(self) -> List[GoldType]:
         """Pobiera listę typów złota z ID oraz dodatkowymi informacjami."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT id, category, type, purity, unit FROM inventory")
-                gold_types = cursor.fetchall()
-                
-                # Sortowanie numeryczne
-                gold_types.sort(key=lambda x: (x[1], natural_sort_key(x[2]), -x[3]))  # kategoria, typ numerycznie, czystość DESC
-                
-                return gold_types
+                cursor.row_factory = record_factory(GoldType)
+                cursor.execute("""
+                    SELECT id, category, type, purity, unit
+                    FROM inventory
+                    ORDER BY category, type COLLATE NATSORT, purity DESC, id
+                """)
+                return cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Błąd pobierania typów złota: {e}")
             return []
     
-    def get_gold_quantity(self, gold_type_id: int) -> float:
-        """Pobiera dostępną ilość danego typu złota."""
+    @profiled
+    def get_gold_quantity(self, gold_type_id: int) -> int:
+        """Pobiera dostępną ilość danego typu złota (w tysięcznych częściach jednostki)."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT quantity FROM inventory WHERE id = ?", (gold_type_id,))
                 result = cursor.fetchone()
@@ -218,10 +949,11 @@ class GoldDatabase:
             print(f"Błąd pobierania ilości złota: {e}")
             return 0
     
+    @profiled
     def get_gold_categories(self) -> List[str]:
         """Pobiera listę unikalnych kategorii złota."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("SELECT DISTINCT category FROM inventory ORDER BY category")
                 return [row[0] for row in cursor.fetchall()]
@@ -229,12 +961,20 @@ class GoldDatabase:
             print(f"Błąd pobierania kategorii złota: {e}")
             return []
 
+    @profiled
     def add_transaction(self, gold_type_id: int, transaction_type: str, 
-                       quantity: float, price_per_unit: float, 
+                       quantity: int, price_per_unit: int, 
                        transaction_date: str, description: str = "") -> bool:
-        """Dodaje transakcję i aktualizuje stan magazynu."""
+        """
+        Dodaje transakcję i aktualizuje stan magazynu.
+        Ilość w tysięcznych częściach jednostki, cena jednostkowa w groszach (patrz units).
+        """
+        error = transaction_input_error(transaction_type, quantity, price_per_unit, transaction_date)
+        if error:
+            print(f"Niepoprawne dane transakcji: {error}")
+            return False
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Sprawdź dostępność przy sprzedaży
@@ -250,8 +990,8 @@ class GoldDatabase:
                     return False
                 
                 unit_weight = result[0]
-                weight_total = quantity * unit_weight
-                price_per_gram = price_per_unit / unit_weight if unit_weight > 0 else 0
+                weight_total = line_weight(quantity, unit_weight)
+                gram_price = price_per_gram(price_per_unit, unit_weight)
                 
                 # Dodaj timestamp do daty jeśli nie ma czasu
                 if len(transaction_date) == 10:  # Format YYYY-MM-DD
@@ -262,7 +1002,9 @@ class GoldDatabase:
                     INSERT INTO transactions 
                     (gold_type_id, transaction_type, quantity, weight_total, price_per_unit, price_per_gram, transaction_date, description)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (gold_type_id, transaction_type, quantity, weight_total, price_per_unit, price_per_gram, transaction_date, description))
+                """, (gold_type_id, transaction_type, quantity, weight_total, price_per_unit, gram_price, transaction_date, description))
+                transaction_id = cursor.lastrowid
+                self._write_audit(cursor, [("transaction", transaction_id, "insert", None)])
                 
                 # Aktualizuj stan magazynu
                 quantity_change = quantity if transaction_type == "Kupno" else -quantity
@@ -273,15 +1015,18 @@ class GoldDatabase:
                 """, (quantity_change, gold_type_id))
                 
                 conn.commit()
-                return True
+            self._publish([ChangeEvent(TRANSACTION, INSERT, [transaction_id]),
+                           ChangeEvent(INVENTORY, UPDATE, [gold_type_id])])
+            return True
         except sqlite3.Error as e:
             print(f"Błąd dodawania transakcji: {e}")
             return False
     
+    @profiled
     def get_transaction_by_id(self, transaction_id: int) -> Optional[Tuple]:
         """Pobiera szczegóły transakcji po ID."""
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute("""
                     SELECT t.id, t.gold_type_id, i.category, i.type, i.purity, 
@@ -296,18 +1041,26 @@ class GoldDatabase:
             print(f"Błąd pobierania transakcji: {e}")
             return None
     
-    def get_transactions_with_id(self, sort_by: str = "date", date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Tuple]:
-        """Pobiera wszystkie transakcje z ID, z opcjonalnym filtrowaniem daty dla głównego okna."""
+    @profiled
+    def get_transactions_with_id(self, sort_by: str = "date", date_from: Optional[str] = None, date_to: Optional[str] = None,
+                                 limit: Optional[int] = None, offset: int = 0) -> List[TransactionRow]:
+        """
+        Pobiera wszystkie transakcje z ID, z opcjonalnym filtrowaniem daty dla głównego okna.
+        Data początkowa z zarchiwizowanego roku dołącza transakcje z archiwów rocznych.
+        Parametry limit/offset pozwalają pobierać kolejne strony (przy sortowaniu po dacie
+        strona jest czytana z indeksu idx_transactions_date).
+        """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn, self._transactions_source(conn, date_from, date_to) as source:
                 cursor = conn.cursor()
-                query = """
+                query = f"""
                     SELECT 
                         t.id, t.transaction_date, gt.category, gt.type, gt.purity, 
-                        t.transaction_type, t.quantity, t.price_per_unit, 
-                        (t.quantity * t.price_per_unit) as total_value, 
+                        t.transaction_type, t.quantity, gt.unit, t.weight_total, 
+                        t.price_per_unit, t.price_per_gram,
+                        {value_sql("t")} as total_value, 
                         t.description, t.gold_type_id
-                    FROM transactions t
+                    FROM {source} t
                     JOIN inventory gt ON t.gold_type_id = gt.id
                 """
                 
@@ -332,51 +1085,105 @@ class GoldDatabase:
                 }
                 
                 order_by_clause = sort_mapping.get(sort_by, "t.transaction_date DESC")
-                query += f" ORDER BY {order_by_clause}"
+                query += f" ORDER BY {order_by_clause}, t.id DESC"
+
+                if limit is not None:
+                    query += " LIMIT ? OFFSET ?"
+                    params.extend([limit, offset])
                 
+                cursor.row_factory = record_factory(TransactionRow)
                 cursor.execute(query, params)
                 return cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Błąd pobierania transakcji: {e}")
             return []
 
-    def get_all_transactions_for_history(self, sort_by: str = "date", filters: Optional[dict] = None) -> List[Tuple]:
-        """Pobiera transakcje dla okna historii z zaawansowanym filtrowaniem."""
+    @profiled
+    def get_transactions_by_ids(self, transaction_ids: List[int]) -> List[TransactionRow]:
+        """Pobiera wskazane transakcje (od najnowszych, jak lista głównego okna); brakujące są pomijane."""
+        transaction_ids = list(dict.fromkeys(transaction_ids))
+        rows: List[TransactionRow] = []
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                query = """
+                cursor.row_factory = record_factory(TransactionRow)
+                for start in range(0, len(transaction_ids), BATCH_CHUNK_SIZE):
+                    chunk = transaction_ids[start:start + BATCH_CHUNK_SIZE]
+                    cursor.execute(f"""
+                        SELECT 
+                            t.id, t.transaction_date, gt.category, gt.type, gt.purity, 
+                            t.transaction_type, t.quantity, gt.unit, t.weight_total, 
+                            t.price_per_unit, t.price_per_gram,
+                            {value_sql("t")} as total_value, 
+                            t.description, t.gold_type_id
+                        FROM transactions t
+                        JOIN inventory gt ON t.gold_type_id = gt.id
+                        WHERE t.id IN ({", ".join("?" * len(chunk))})
+                    """, chunk)
+                    rows.extend(cursor.fetchall())
+            rows.sort(key=lambda row: (row.date, row.id), reverse=True)
+            return rows
+        except sqlite3.Error as e:
+            print(f"Błąd pobierania transakcji: {e}")
+            return []
+
+    @profiled
+    def get_all_transactions_for_history(self, sort_by: str = "date", filters: Optional[dict] = None,
+                                         limit: Optional[int] = None, offset: int = 0) -> List[TransactionRow]:
+        """
+        Pobiera transakcje dla okna historii z zaawansowanym filtrowaniem.
+        Filtr "search" przeszukuje opisy transakcji oraz nazwy i notatki typów złota (FTS5);
+        sort_by="relevance" porządkuje wyniki według trafności.
+        Parametry limit/offset pozwalają pobierać historię stronami.
+        Filtr date_from z zarchiwizowanego roku obejmuje też archiwa roczne; w archiwach
+        wyszukiwanie używa LIKE (indeks FTS5 obejmuje tylko bieżącą bazę).
+        """
+        try:
+            with self._connect() as conn, self._transactions_source(conn, (filters or {}).get("date_from"),
+                                                                    (filters or {}).get("date_to")) as transactions:
+                cursor = conn.cursor()
+                conditions = []
+                params = []
+                search_text = (filters or {}).get("search") or ""
+                search = fts_query(search_text)
+                use_fts = bool(search) and self.fts_enabled and transactions == "transactions"
+                
+                with_clause = ""
+                source = f"{transactions} t"
+                if use_fts:
+                    # Trafienia w opisie transakcji lub w nazwie/notatkach typu złota, z oceną bm25 (mniejsza = lepsza).
+                    # Ocena jest liczona tylko przy sortowaniu według trafności - przy wielu trafieniach to większość kosztu.
+                    by_relevance = sort_by == "relevance"
+                    transactions_rank = "bm25(transactions_fts)" if by_relevance else "0"
+                    inventory_rank = "bm25(inventory_fts)" if by_relevance else "0"
+                    with_clause = f"""
+                        WITH matches(id, rank) AS (
+                            SELECT rowid, {transactions_rank} FROM transactions_fts WHERE transactions_fts MATCH ?
+                            UNION ALL
+                            SELECT t.id, {inventory_rank} FROM inventory_fts
+                            JOIN transactions t ON t.gold_type_id = inventory_fts.rowid
+                            WHERE inventory_fts MATCH ?
+                        ),
+                        ranked AS (SELECT id, MIN(rank) AS rank FROM matches GROUP BY id)
+                    """
+                    source = "ranked r JOIN transactions t ON t.id = r.id"
+                    params.extend([search, search])
+                elif search:
+                    # SQLite bez FTS5 - zwykłe dopasowanie podciągu
+                    self._add_search_like(search_text, conditions, params)
+                
+                query = with_clause + f"""
                     SELECT 
                         t.id, t.transaction_date, gt.category, gt.type, gt.purity, 
                         t.transaction_type, t.quantity, gt.unit, t.weight_total, 
                         t.price_per_unit, t.price_per_gram,
-                        (t.quantity * t.price_per_unit) as total_value, 
-                        t.description
-                    FROM transactions t
+                        {value_sql("t")} as total_value, 
+                        t.description, t.gold_type_id
+                    FROM {source}
                     JOIN inventory gt ON t.gold_type_id = gt.id
                 """
                 
-                conditions = []
-                params = []
-                
-                if filters:
-                    date_from = filters.get("date_from")
-                    date_to = filters.get("date_to")
-                    category = filters.get("category")
-                    trans_type = filters.get("trans_type")
-
-                    if date_from and date_from != "RRRR-MM-DD":
-                        conditions.append("t.transaction_date >= ?")
-                        params.append(date_from)
-                    if date_to and date_to != "RRRR-MM-DD":
-                        conditions.append("t.transaction_date <= ?")
-                        params.append(date_to)
-                    if category and category != "Wszystkie":
-                        conditions.append("gt.category = ?")
-                        params.append(category)
-                    if trans_type and trans_type != "Wszystkie":
-                        conditions.append("t.transaction_type = ?")
-                        params.append(trans_type)
+                self._add_history_filters(filters, conditions, params)
 
                 if conditions:
                     query += " WHERE " + " AND ".join(conditions)
@@ -388,83 +1195,824 @@ class GoldDatabase:
                     "transaction_type": "t.transaction_type"
                 }
                 
+                if use_fts:
+                    sort_mapping["relevance"] = "r.rank, t.transaction_date DESC"
+                
                 order_by_clause = sort_mapping.get(sort_by, "t.transaction_date DESC")
-                query += f" ORDER BY {order_by_clause}"
+                query += f" ORDER BY {order_by_clause}, t.id DESC"
+
+                if limit is not None:
+                    query += " LIMIT ? OFFSET ?"
+                    params.extend([limit, offset])
                 
+                cursor.row_factory = record_factory(TransactionRow)
                 cursor.execute(query, params)
                 return cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Błąd pobierania historii transakcji: {e}")
             return []
 
-    def update_transaction(self, transaction_id: int, gold_type_id: int, quantity: float, price_per_unit: float, transaction_date: str, description: str) -> bool:
-        """Aktualizuje istniejącą transakcję."""
+    @staticmethod
+    def _add_search_like(search_text: str, conditions: List[str], params: list):
+        """Dopisuje warunki wyszukiwania podciągu (LIKE) w opisie transakcji oraz nazwie i notatkach typu złota."""
+        for word in search_text.replace('"', " ").split():
+            conditions.append("(t.description LIKE ? OR gt.type LIKE ? OR gt.notes LIKE ?)")
+            params.extend([f"%{word}%"] * 3)
+
+    @staticmethod
+    def _add_history_filters(filters: Optional[dict], conditions: List[str], params: list):
+        """Dopisuje warunki filtrów historii: zakres dat, kategoria i rodzaj transakcji (t - transakcje, gt - typy)."""
+        if not filters:
+            return
+        date_from = filters.get("date_from")
+        date_to = filters.get("date_to")
+        category = filters.get("category")
+        trans_type = filters.get("trans_type")
+
+        if date_from and date_from != "RRRR-MM-DD":
+            conditions.append("t.transaction_date >= ?")
+            params.append(date_from)
+        if date_to and date_to != "RRRR-MM-DD":
+            conditions.append("t.transaction_date <= ?")
+            params.append(date_to)
+        if category and category != "Wszystkie":
+            conditions.append("gt.category = ?")
+            params.append(category)
+        if trans_type and trans_type != "Wszystkie":
+            conditions.append("t.transaction_type = ?")
+            params.append(trans_type)
+
+    @profiled
+    def load_history_columns(self, filters: Optional[dict] = None) -> Optional["HistoryColumns"]:
+        """
+        Wczytuje historię transakcji (filtry jak w get_all_transactions_for_history) do kolumn
+        HistoryColumns na potrzeby obliczeń zbiorczych. Wiersze są pobierane porcjami po FETCH_SIZE
+        i od razu dopisywane do tablic, bez budowania listy wszystkich transakcji.
+        Filtr "search" używa dopasowania podciągu (LIKE). Kolejność wierszy: od najstarszych.
+        """
+        # Import przy pierwszym użyciu - moduł (array, obliczenia kolumnowe) nie spowalnia startu CLI
+        from history_columns import FETCH_SIZE, HistoryColumns
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn, self._transactions_source(conn, (filters or {}).get("date_from"),
+                                                                    (filters or {}).get("date_to")) as source:
                 cursor = conn.cursor()
+                conditions = []
+                params = []
+                self._add_search_like((filters or {}).get("search") or "", conditions, params)
+                self._add_history_filters(filters, conditions, params)
+                query = f"""
+                    SELECT t.id, t.gold_type_id, t.transaction_type = 'Kupno', t.quantity, t.weight_total,
+                           t.price_per_unit, t.price_per_gram, CAST(strftime('%s', t.transaction_date) AS INTEGER)
+                    FROM {source} t
+                    JOIN inventory gt ON t.gold_type_id = gt.id
+                """
+                if conditions:
+                    query += " WHERE " + " AND ".join(conditions)
+                query += " ORDER BY t.transaction_date, t.id"
+
+                columns = HistoryColumns(dict(cursor.execute("SELECT id, category FROM inventory").fetchall()))
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(FETCH_SIZE)
+                    if not rows:
+                        break
+                    columns.extend(rows)
+                return columns
+        except sqlite3.Error as e:
+            print(f"Błąd wczytywania kolumn historii: {e}")
+            return None
+
+    @profiled
+    def update_transaction(self, transaction_id: int, gold_type_id: int, transaction_type: str, quantity: int,
+                           price_per_unit: int, transaction_date: str, description: str) -> bool:
+        """
+        Aktualizuje istniejącą transakcję, także jej typ złota i rodzaj (kupno/sprzedaż), w jednej transakcji bazy.
+        Skutki starej i nowej wersji dla stanów magazynu są sumowane dla każdego typu złota i zapisywane jednym
+        warunkowym UPDATE; jeśli którykolwiek stan spadłby poniżej zera, nic nie jest zmieniane.
+        """
+        error = transaction_input_error(transaction_type, quantity, price_per_unit, transaction_date)
+        if error:
+            print(f"Niepoprawne dane transakcji: {error}")
+            return False
+        fields = ", ".join(f"t.{field}" for field in AUDITED_TRANSACTION_FIELDS)
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
                 
-                old_transaction = cursor.execute("SELECT gold_type_id, transaction_type, quantity FROM transactions WHERE id = ?", (transaction_id,)).fetchone()
-                if not old_transaction: return False
-                
-                old_gold_id, transaction_type, old_quantity = old_transaction
+                # Stara wersja transakcji i waga jednostkowa nowego typu złota w jednym zapytaniu
+                row = cursor.execute(f"""
+                    SELECT {fields}, i.unit_weight
+                    FROM transactions t LEFT JOIN inventory i ON i.id = ?
+                    WHERE t.id = ?
+                """, (gold_type_id, transaction_id)).fetchone()
+                if row is None or row[-1] is None:
+                    conn.rollback()
+                    return False
+                before = dict(zip(AUDITED_TRANSACTION_FIELDS, row[:-1]))
+                if len(transaction_date) == 10:  # Format YYYY-MM-DD
+                    # Godzina dotychczasowej transakcji (jak w update_transactions), a bez niej - bieżąca
+                    # (jak w add_transaction), żeby wiersz nie zmieniał miejsca w historii uporządkowanej po dacie
+                    old_time = before["transaction_date"][10:] or f" {datetime.now().strftime('%H:%M:%S')}"
+                    transaction_date += old_time
+                after = {"gold_type_id": gold_type_id, "transaction_type": transaction_type, "quantity": quantity,
+                         "price_per_unit": price_per_unit, "transaction_date": transaction_date,
+                         "description": description}
+                unit_weight = row[-1]
                 
-                # Revert old transaction from inventory
-                quantity_change_old = -old_quantity if transaction_type == "Kupno" else old_quantity
-                cursor.execute("UPDATE inventory SET quantity = quantity + ? WHERE id = ?", (quantity_change_old, old_gold_id))
+                # Stan magazynu: zdejmij skutek starej wersji, dodaj skutek nowej (zmiany netto dla typów złota)
+                deltas: Dict[int, int] = {}
+                for version, sign in ((before, -1), (after, 1)):
+                    change = version["quantity"] if version["transaction_type"] == "Kupno" else -version["quantity"]
+                    deltas[version["gold_type_id"]] = deltas.get(version["gold_type_id"], 0) + sign * change
+                deltas = {gold_id: change for gold_id, change in deltas.items() if change}
                 
-                # Check availability for the new transaction if it's a sale
-                if transaction_type == "Sprzedaż":
-                    current_quantity_new_type = cursor.execute("SELECT quantity FROM inventory WHERE id = ?", (gold_type_id,)).fetchone()[0]
-                    if current_quantity_new_type < quantity:
-                        # Rollback inventory change and exit
-                        cursor.execute("UPDATE inventory SET quantity = quantity - ? WHERE id = ?", (quantity_change_old, old_gold_id))
-                        conn.commit()
+                if deltas:
+                    cases = " ".join("WHEN ? THEN ?" for _ in deltas)
+                    case_params = [value for item in deltas.items() for value in item]
+                    placeholders = ", ".join("?" * len(deltas))
+                    cursor.execute(f"""
+                        UPDATE inventory SET quantity = quantity + CASE id {cases} END
+                        WHERE id IN ({placeholders}) AND quantity + CASE id {cases} END >= 0
+                    """, case_params + list(deltas) + case_params)
+                    if cursor.rowcount != len(deltas):
+                        conn.rollback()
                         return False
                 
-                # Get gold data for weight calculation
-                unit_weight = cursor.execute("SELECT unit_weight FROM inventory WHERE id = ?", (gold_type_id,)).fetchone()[0]
-                weight_total = quantity * unit_weight
-                price_per_gram = price_per_unit / unit_weight if unit_weight > 0 else 0
-                
-                # Update transaction details
                 cursor.execute("""
-                    UPDATE transactions 
-                    SET gold_type_id = ?, quantity = ?, weight_total = ?, price_per_unit = ?, price_per_gram = ?, transaction_date = ?, description = ?
+                    UPDATE transactions
+                    SET gold_type_id = ?, transaction_type = ?, quantity = ?, weight_total = ?, price_per_unit = ?,
+                        price_per_gram = ?, transaction_date = ?, description = ?
                     WHERE id = ?
-                """, (gold_type_id, quantity, weight_total, price_per_unit, price_per_gram, transaction_date, description, transaction_id))
-                
-                # Apply new transaction to inventory
-                quantity_change_new = quantity if transaction_type == "Kupno" else -quantity
-                cursor.execute("UPDATE inventory SET quantity = quantity + ? WHERE id = ?", (quantity_change_new, gold_type_id))
+                """, (gold_type_id, transaction_type, quantity, line_weight(quantity, unit_weight), price_per_unit,
+                      price_per_gram(price_per_unit, unit_weight), transaction_date, description, transaction_id))
+                self._write_audit(cursor, [("transaction", transaction_id, "update", self._diff(before, after))])
                 
                 conn.commit()
-                return True
+            events = [ChangeEvent(TRANSACTION, UPDATE, [transaction_id])]
+            if deltas:
+                events.append(ChangeEvent(INVENTORY, UPDATE, list(deltas)))
+            self._publish(events)
+            return True
         except sqlite3.Error as e:
             print(f"Błąd aktualizacji transakcji: {e}")
-            conn.rollback()
             return False
 
+    @profiled
     def delete_transaction(self, transaction_id: int) -> bool:
-        """Usuwa transakcję i przywraca stan magazynu."""
+        """
+        Usuwa transakcję i przywraca stan magazynu.
+        Jak w delete_transactions: jeśli stan spadłby poniżej zera (usunięcie zakupu już
+        sprzedanego złota), nic nie jest zmieniane.
+        """
         try:
-            with sqlite3.connect(self.db_name) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
                 
-                transaction = cursor.execute("SELECT gold_type_id, transaction_type, quantity FROM transactions WHERE id = ?", (transaction_id,)).fetchone()
+                transaction = cursor.execute(f"SELECT {', '.join(AUDITED_TRANSACTION_FIELDS)} FROM transactions WHERE id = ?",
+                                             (transaction_id,)).fetchone()
                 if not transaction:
+                    conn.rollback()
                     return False
                 
-                gold_type_id, transaction_type, quantity = transaction
+                gold_type_id, transaction_type, quantity = transaction[:3]
                 
                 # Revert inventory state
                 quantity_change = -quantity if transaction_type == "Kupno" else quantity
+                if quantity_change < 0:
+                    current = cursor.execute("SELECT quantity FROM inventory WHERE id = ?", (gold_type_id,)).fetchone()
+                    if current is None or current[0] + quantity_change < 0:
+                        conn.rollback()
+                        return False
                 cursor.execute("UPDATE inventory SET quantity = quantity + ? WHERE id = ?", (quantity_change, gold_type_id))
                 
                 # Delete the transaction
                 cursor.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
+                self._write_audit(cursor, [("transaction", transaction_id, "delete",
+                                            dict(zip(AUDITED_TRANSACTION_FIELDS, transaction)))])
                 
                 conn.commit()
-                return True
+            self._publish([ChangeEvent(TRANSACTION, DELETE, [transaction_id]),
+                           ChangeEvent(INVENTORY, UPDATE, [gold_type_id])])
+            return True
         except sqlite3.Error as e:
             print(f"Błąd usuwania transakcji: {e}")
             return False
+
+    def _fetch_transactions_for_batch(self, cursor: sqlite3.Cursor, transaction_ids: List[int]) -> List[Tuple]:
+        """Pobiera (id, *AUDITED_TRANSACTION_FIELDS) wskazanych transakcji, paczkami po BATCH_CHUNK_SIZE."""
+        rows = []
+        for start in range(0, len(transaction_ids), BATCH_CHUNK_SIZE):
+            chunk = transaction_ids[start:start + BATCH_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f"SELECT id, {', '.join(AUDITED_TRANSACTION_FIELDS)} FROM transactions WHERE id IN ({placeholders})",
+                           chunk)
+            rows.extend(cursor.fetchall())
+        return rows
+
+    @profiled
+    def delete_transactions(self, transaction_ids: List[int]) -> bool:
+        """
+        Usuwa wiele transakcji w jednej transakcji bazy danych.
+        Zmiany stanów magazynu są sumowane dla każdego typu złota; jeśli którykolwiek stan
+        spadłby poniżej zera (usunięcie zakupu już sprzedanego złota), nic nie jest zmieniane.
+        """
+        transaction_ids = list(dict.fromkeys(transaction_ids))
+        if not transaction_ids:
+            return False
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                
+                rows = self._fetch_transactions_for_batch(cursor, transaction_ids)
+                if len(rows) != len(transaction_ids):
+                    conn.rollback()
+                    return False
+                
+                # Zagregowane zmiany stanów: usunięcie kupna zmniejsza stan, usunięcie sprzedaży go zwiększa
+                deltas: Dict[int, int] = {}
+                for _, gold_type_id, transaction_type, quantity, *_ in rows:
+                    change = -quantity if transaction_type == "Kupno" else quantity
+                    deltas[gold_type_id] = deltas.get(gold_type_id, 0) + change
+                
+                for gold_type_id, change in deltas.items():
+                    if change < 0:
+                        current = cursor.execute("SELECT quantity FROM inventory WHERE id = ?", (gold_type_id,)).fetchone()
+                        if current is None or current[0] + change < 0:
+                            conn.rollback()
+                            return False
+                
+                cursor.executemany("UPDATE inventory SET quantity = quantity + ? WHERE id = ?",
+                                   [(change, gold_type_id) for gold_type_id, change in deltas.items()])
+                cursor.executemany("DELETE FROM transactions WHERE id = ?", [(row[0],) for row in rows])
+                self._write_audit(cursor, [("transaction", row[0], "delete", dict(zip(AUDITED_TRANSACTION_FIELDS, row[1:])))
+                                           for row in rows])
+                
+                conn.commit()
+            self._publish([ChangeEvent(TRANSACTION, DELETE, transaction_ids),
+                           ChangeEvent(INVENTORY, UPDATE, list(deltas))])
+            return True
+        except sqlite3.Error as e:
+            print(f"Błąd usuwania transakcji: {e}")
+            return False
+
+    @profiled
+    def update_transactions(self, transaction_ids: List[int], transaction_date: Optional[str] = None,
+                            description: Optional[str] = None, price_per_unit: Optional[int] = None) -> bool:
+        """
+        Zmienia wspólne pola wielu transakcji w jednej transakcji bazy danych (cena w groszach).
+        Pola None pozostają bez zmian. Data w formacie YYYY-MM-DD zachowuje godzinę każdej transakcji.
+        Zmieniane pola nie wpływają na stany magazynu.
+        """
+        error = transaction_input_error(price_per_unit=price_per_unit, transaction_date=transaction_date)
+        if error:
+            print(f"Niepoprawne dane transakcji: {error}")
+            return False
+        transaction_ids = list(dict.fromkeys(transaction_ids))
+        assignments = []
+        params: list = []
+        if transaction_date is not None:
+            if len(transaction_date) == 10:  # Format YYYY-MM-DD
+                assignments.append("transaction_date = ? || substr(transaction_date, 11)")
+            else:
+                assignments.append("transaction_date = ?")
+            params.append(transaction_date)
+        if description is not None:
+            assignments.append("description = ?")
+            params.append(description)
+        if price_per_unit is not None:
+            assignments.append("price_per_unit = ?")
+            # Jak units.price_per_gram: grosze za gram, zaokrąglone
+            assignments.append(f"""price_per_gram = (SELECT CASE WHEN i.unit_weight > 0
+                                                         THEN (? * {MILLIGRAMS} + i.unit_weight / 2) / i.unit_weight
+                                                         ELSE 0 END
+                                                     FROM inventory i WHERE i.id = transactions.gold_type_id)""")
+            params.extend([price_per_unit, price_per_unit])
+        if not transaction_ids or not assignments:
+            return False
+        
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                
+                before = self._fetch_transactions_for_batch(cursor, transaction_ids)
+                if len(before) != len(transaction_ids):
+                    conn.rollback()
+                    return False
+                
+                for start in range(0, len(transaction_ids), BATCH_CHUNK_SIZE):
+                    chunk = transaction_ids[start:start + BATCH_CHUNK_SIZE]
+                    placeholders = ", ".join("?" * len(chunk))
+                    cursor.execute(f"UPDATE transactions SET {', '.join(assignments)} WHERE id IN ({placeholders})",
+                                   params + chunk)
+                
+                after = {row[0]: row for row in self._fetch_transactions_for_batch(cursor, transaction_ids)}
+                self._write_audit(cursor, [
+                    ("transaction", row[0], "update",
+                     self._diff(dict(zip(AUDITED_TRANSACTION_FIELDS, row[1:])),
+                                dict(zip(AUDITED_TRANSACTION_FIELDS, after[row[0]][1:]))))
+                    for row in before
+                ])
+                
+                conn.commit()
+            self._publish([ChangeEvent(TRANSACTION, UPDATE, transaction_ids)])
+            return True
+        except sqlite3.Error as e:
+            print(f"Błąd aktualizacji transakcji: {e}")
+            return False
+
+    @profiled
+    def revert_changes(self, audit_ids: Sequence[int]) -> bool:
+        """
+        Cofa zapis opisany wpisami dziennika audit_ids (take_last_write) w jednej transakcji bazy: usuwa dodane
+        transakcje, przywraca usunięte (z tym samym id) i poprzednie wartości zmienionych, poprawiając stany
+        magazynu. Cofnięcie jest zwykłym zapisem z własnymi wpisami dziennika, więc cofnięcie cofnięcia ponawia
+        zapis. Nic nie jest zmieniane, jeśli wpisy nie dotyczą transakcji, transakcje zmieniono od tego czasu
+        (np. na innym stanowisku) albo stan magazynu spadłby poniżej zera.
+        """
+        audit_ids = list(dict.fromkeys(audit_ids))
+        if not audit_ids:
+            return False
+        fields = ", ".join(AUDITED_TRANSACTION_FIELDS)
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                
+                entries = []
+                for start in range(0, len(audit_ids), BATCH_CHUNK_SIZE):
+                    chunk = audit_ids[start:start + BATCH_CHUNK_SIZE]
+                    placeholders = ", ".join("?" * len(chunk))
+                    entries.extend(cursor.execute(
+                        f"SELECT id, entity, entity_id, action, changes FROM audit_log WHERE id IN ({placeholders})",
+                        chunk).fetchall())
+                if len(entries) != len(audit_ids) or any(entry[1] != "transaction" for entry in entries):
+                    conn.rollback()
+                    return False
+                
+                deltas: Dict[int, int] = {}
+                audit = []
+                changed: Dict[str, List[int]] = {DELETE: [], INSERT: [], UPDATE: []}
+                # Od najnowszego wpisu: stan docelowy transakcji to stan sprzed zapisu. Zmienione pola muszą mieć
+                # wartości zapisane w dzienniku - inaczej transakcję zmieniono od tego czasu (np. na innym stanowisku)
+                for _, _, transaction_id, action, changes in sorted(entries, reverse=True):
+                    row = cursor.execute(f"SELECT {fields} FROM transactions WHERE id = ?", (transaction_id,)).fetchone()
+                    current = dict(zip(AUDITED_TRANSACTION_FIELDS, row)) if row else None
+                    changes = json.loads(changes) if changes else {}
+                    if action == "insert":
+                        consistent, target = current is not None, None
+                    elif action == "delete":
+                        consistent, target = current is None, changes
+                    else:
+                        consistent = current is not None and all(current[field] == after
+                                                                 for field, (_, after) in changes.items())
+                        target = dict(current or {}, **{field: before for field, (before, _) in changes.items()})
+                    if not consistent:
+                        conn.rollback()
+                        return False
+                    
+                    # Stan magazynu: zdejmij skutek obecnej wersji transakcji, dodaj skutek docelowej
+                    for version, sign in ((current, -1), (target, 1)):
+                        if version is not None:
+                            change = version["quantity"] if version["transaction_type"] == "Kupno" else -version["quantity"]
+                            deltas[version["gold_type_id"]] = deltas.get(version["gold_type_id"], 0) + sign * change
+                    
+                    if target is None:
+                        cursor.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
+                        audit.append(("transaction", transaction_id, "delete", current))
+                        changed[DELETE].append(transaction_id)
+                        continue
+                    unit_weight = cursor.execute("SELECT unit_weight FROM inventory WHERE id = ?",
+                                                 (target["gold_type_id"],)).fetchone()
+                    if unit_weight is None:
+                        conn.rollback()
+                        return False
+                    weight_total = line_weight(target["quantity"], unit_weight[0])
+                    gram_price = price_per_gram(target["price_per_unit"], unit_weight[0])
+                    values = [target[field] for field in AUDITED_TRANSACTION_FIELDS]
+                    if current is None:
+                        cursor.execute(f"""
+                            INSERT INTO transactions (id, {fields}, weight_total, price_per_gram)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        """, [transaction_id, *values, weight_total, gram_price])
+                        audit.append(("transaction", transaction_id, "insert", None))
+                        changed[INSERT].append(transaction_id)
+                    else:
+                        assignments = ", ".join(f"{field} = ?" for field in AUDITED_TRANSACTION_FIELDS)
+                        cursor.execute(f"UPDATE transactions SET {assignments}, weight_total = ?, price_per_gram = ? WHERE id = ?",
+                                       [*values, weight_total, gram_price, transaction_id])
+                        audit.append(("transaction", transaction_id, "update", self._diff(current, target)))
+                        changed[UPDATE].append(transaction_id)
+                
+                for gold_type_id, change in deltas.items():
+                    if change < 0:
+                        current = cursor.execute("SELECT quantity FROM inventory WHERE id = ?", (gold_type_id,)).fetchone()
+                        if current is None or current[0] + change < 0:
+                            conn.rollback()
+                            return False
+                cursor.executemany("UPDATE inventory SET quantity = quantity + ? WHERE id = ?",
+                                   [(change, gold_type_id) for gold_type_id, change in deltas.items()])
+                self._write_audit(cursor, audit)
+                
+                conn.commit()
+            events = [ChangeEvent(TRANSACTION, action, ids) for action, ids in changed.items() if ids]
+            # Bez zmian stanów (np. cofnięta zmiana opisu) nie ma zdarzenia magazynu - puste ids oznaczałyby RELOAD
+            changed_stock = [gold_type_id for gold_type_id, change in deltas.items() if change]
+            if changed_stock:
+                events.append(ChangeEvent(INVENTORY, UPDATE, changed_stock))
+            self._publish(events)
+            return True
+        except sqlite3.Error as e:
+            print(f"Błąd cofania zmian: {e}")
+            return False
+
+    @profiled
+    def get_audit_log(self, entity: Optional[str] = None, entity_id: Optional[int] = None,
+                      period: Optional[str] = None, limit: Optional[int] = 100) -> List[Tuple]:
+        """
+        Pobiera wpisy dziennika zmian (AUDIT_COLUMNS), od najnowszych.
+        Filtry: obiekt ('transaction', 'gold_type'), jego id oraz miesiąc (period, RRRR-MM).
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                query = f"SELECT {', '.join(AUDIT_COLUMNS)} FROM audit_log"
+                conditions = []
+                params: list = []
+                if entity:
+                    conditions.append("entity = ?")
+                    params.append(entity)
+                if entity_id is not None:
+                    conditions.append("entity_id = ?")
+                    params.append(entity_id)
+                if period:
+                    # Zakres id miesiąca: od jego pierwszego wpisu do pierwszego wpisu następnego miesiąca
+                    bounds = cursor.execute("""
+                        SELECT first_id,
+                               (SELECT MIN(first_id) FROM audit_periods WHERE period > p.period)
+                        FROM audit_periods p WHERE period = ?
+                    """, (period,)).fetchone()
+                    if bounds is not None:
+                        conditions.append("id >= ?")
+                        params.append(bounds[0])
+                        if bounds[1] is not None:
+                            conditions.append("id < ?")
+                            params.append(bounds[1])
+                    conditions.append("period = ?")
+                    params.append(period)
+                if conditions:
+                    query += " WHERE " + " AND ".join(conditions)
+                query += " ORDER BY id DESC"
+                if limit is not None:
+                    query += " LIMIT ?"
+                    params.append(limit)
+                cursor.execute(query, params)
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Błąd pobierania dziennika zmian: {e}")
+            return []
+
+    @profiled
+    def get_changes(self, after_id: Optional[int] = None,
+                    skip_ids: Collection[int] = ()) -> Tuple[Optional[int], List[ChangeEvent]]:
+        """
+        Zamienia wpisy dziennika zmian o id większym niż after_id na zdarzenia ChangeEvent i zwraca je
+        razem z id ostatniego wpisu (punkt odniesienia następnego wywołania). Bez after_id zwraca tylko
+        ten punkt. Przy więcej niż CHANGES_LIMIT wpisach lub dzienniku krótszym niż after_id (baza
+        przywrócona z kopii) zwraca RELOAD. Wpisy o id ze skip_ids są pomijane.
+        """
+        try:
+            with self._connect() as conn:
+                last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM audit_log").fetchone()[0]
+                if after_id is None or last_id == after_id:
+                    return last_id, []
+                rows = []
+                if last_id > after_id:
+                    rows = conn.execute("""
+                        SELECT id, entity, entity_id, action, changes FROM audit_log
+                        WHERE id > ? AND id <= ? ORDER BY id LIMIT ?
+                    """, (after_id, last_id, CHANGES_LIMIT + 1)).fetchall()
+                if last_id < after_id or len(rows) > CHANGES_LIMIT:
+                    return last_id, [ChangeEvent(INVENTORY, RELOAD), ChangeEvent(TRANSACTION, RELOAD)]
+                return last_id, self._audit_events(conn, [row for row in rows if row[0] not in skip_ids])
+        except sqlite3.Error as e:
+            print(f"Błąd odczytu zmian: {e}")
+            return after_id, []
+
+    def _audit_events(self, conn: sqlite3.Connection, rows: List[Tuple]) -> List[ChangeEvent]:
+        """
+        Składa zdarzenia z wpisów dziennika (id, obiekt, id obiektu, akcja, zmiany): kolejne wpisy tego samego
+        rodzaju tworzą jedno zdarzenie, a typy złota dotknięte zmienionymi transakcjami - zdarzenie INVENTORY UPDATE.
+        Akcje dziennika (insert/update/delete) mają te same nazwy co akcje zdarzeń.
+        """
+        runs: List[Tuple[str, str, List[int]]] = []
+        gold_type_ids: List[int] = []
+        changed_transactions: List[int] = []
+        for _, entity, entity_id, action, changes in rows:
+            if entity == "archive":
+                kind = (TRANSACTION, RELOAD)
+            elif entity in AUDIT_EVENT_ENTITIES:
+                kind = (AUDIT_EVENT_ENTITIES[entity], action)
+            else:
+                continue
+            if entity == "transaction":
+                # delete: pełny obraz wiersza, update: [przed, po] przy zmianie typu złota
+                gold_type_id = json.loads(changes).get("gold_type_id") if changes else None
+                if isinstance(gold_type_id, list):
+                    gold_type_ids.extend(gold_type_id)
+                elif gold_type_id is not None:
+                    gold_type_ids.append(gold_type_id)
+                if action != "delete":
+                    changed_transactions.append(entity_id)
+            if not runs or runs[-1][:2] != kind:
+                runs.append((kind[0], kind[1], []))
+            if kind[1] != RELOAD:
+                runs[-1][2].append(entity_id)
+
+        for start in range(0, len(changed_transactions), BATCH_CHUNK_SIZE):
+            chunk = changed_transactions[start:start + BATCH_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            gold_type_ids.extend(row[0] for row in conn.execute(
+                f"SELECT gold_type_id FROM transactions WHERE id IN ({placeholders})", chunk))
+
+        events = [ChangeEvent(entity, action, ids) for entity, action, ids in runs]
+        if gold_type_ids:
+            events.append(ChangeEvent(INVENTORY, UPDATE, gold_type_ids))
+        return events
+
+    def poll_changes(self) -> bool:
+        """
+        Publikuje w changes zmiany zapisane w bazie przez inne procesy (np. drugie stanowisko na tym samym
+        pliku). Gdy nikt inny nic nie zapisał, kosztuje jedno PRAGMA data_version na połączeniu bieżącego
+        wątku. Pierwsze wywołanie ustala tylko punkt odniesienia. Zwraca True, jeśli były zmiany.
+        """
+        try:
+            version = self._connect().execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Błąd odczytu zmian: {e}")
+            return False
+        if self._audit_seen is not None and version == getattr(self._local, "data_version", None):
+            return False
+        self._local.data_version = version
+
+        with self._audit_lock:
+            own_ids = set(self._own_audit_ids)
+        last_id, events = self.get_changes(self._audit_seen, own_ids)
+        if last_id is None:
+            return False
+        with self._audit_lock:
+            if self._audit_seen is not None and last_id < self._audit_seen:
+                self._own_audit_ids.clear()  # Dziennik zaczyna się od nowa (baza przywrócona z kopii)
+            else:
+                self._own_audit_ids.difference_update(audit_id for audit_id in own_ids if audit_id <= last_id)
+        self._audit_seen = last_id
+        self.changes.publish(events)
+        return bool(events)
+
+    def archive_path(self, year: int) -> str:
+        """Plik archiwum danego roku obok pliku bazy, np. gold_vault_archive_2021.db."""
+        base, _ = os.path.splitext(self.db_name)
+        return f"{base}_archive_{year}.db"
+
+    @profiled
+    def archive_year(self, year: int) -> Optional[int]:
+        """
+        Przenosi transakcje zamkniętego roku do pliku archiwum (archive_path) i zapisuje ich
+        podsumowanie na typ złota w transaction_rollups. Ponowne wywołanie dla tego samego roku
+        dopisuje transakcje dodane później z datą z tego roku.
+        Zwraca liczbę przeniesionych transakcji lub None w przypadku błędu.
+        W trybie dziennika rollback kopiowanie i usunięcie z bazy są atomowe; w trybie WAL
+        przerwanie może zostawić kopie w archiwum, które ponowne wywołanie nadpisze.
+        """
+        if self.db_name == ":memory:":
+            print("Archiwizacja wymaga bazy w pliku.")
+            return None
+        if year >= datetime.now().year:
+            print(f"Nie można archiwizować roku {year} - archiwizowane są tylko zamknięte lata.")
+            return None
+        
+        path = self.archive_path(year)
+        year_range = (f"{year}-01-01", f"{year + 1}-01-01")
+        columns = ", ".join(TRANSACTION_TABLE_COLUMNS)
+        existed = os.path.exists(path)
+        moved = None
+        try:
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute("ATTACH DATABASE ? AS archive", (path,))
+            # Połączenie jest długotrwałe - archiwum musi zostać odłączone także po błędzie
+            try:
+                with conn:
+                    cursor.execute(f"CREATE TABLE IF NOT EXISTS archive.transactions ({ARCHIVE_TRANSACTIONS_TABLE})")
+                    cursor.execute("CREATE INDEX IF NOT EXISTS archive.idx_transactions_date ON transactions(transaction_date)")
+                    cursor.execute("BEGIN IMMEDIATE")
+                
+                    cursor.execute(f"""
+                        INSERT OR REPLACE INTO archive.transactions ({columns})
+                        SELECT {columns} FROM main.transactions
+                        WHERE transaction_date >= ? AND transaction_date < ?
+                    """, year_range)
+                    moved = cursor.rowcount
+                    if not moved:
+                        # Brak transakcji z tego roku - nie rejestruj pustego archiwum
+                        conn.rollback()
+                        return 0
+                
+                    cursor.execute(f"""
+                        INSERT INTO transaction_rollups
+                        (year, gold_type_id, transactions, bought_quantity, sold_quantity, bought_value, sold_value)
+                        SELECT ?, gold_type_id, COUNT(*),
+                               SUM(CASE WHEN transaction_type = 'Kupno' THEN quantity ELSE 0 END),
+                               SUM(CASE WHEN transaction_type = 'Kupno' THEN 0 ELSE quantity END),
+                               SUM(CASE WHEN transaction_type = 'Kupno' THEN {value_sql("t")} ELSE 0 END),
+                               SUM(CASE WHEN transaction_type = 'Kupno' THEN 0 ELSE {value_sql("t")} END)
+                        FROM main.transactions t
+                        WHERE transaction_date >= ? AND transaction_date < ?
+                        GROUP BY gold_type_id
+                        ON CONFLICT (gold_type_id, year) DO UPDATE SET
+                            transactions = transactions + excluded.transactions,
+                            bought_quantity = bought_quantity + excluded.bought_quantity,
+                            sold_quantity = sold_quantity + excluded.sold_quantity,
+                            bought_value = bought_value + excluded.bought_value,
+                            sold_value = sold_value + excluded.sold_value
+                    """, (year, *year_range))
+                    # Przenoszone transakcje zostają w podsumowaniach miesięcznych: dopisane tu sumy
+                    # znoszą się z odjęciem wykonywanym przez wyzwalacz przy usuwaniu
+                    cursor.execute(self._monthly_aggregate(
+                        "main.transactions", "t.transaction_date >= ? AND t.transaction_date < ?"), year_range)
+                    cursor.execute("DELETE FROM main.transactions WHERE transaction_date >= ? AND transaction_date < ?",
+                                   year_range)
+                
+                    previous = cursor.execute("SELECT transactions FROM archives WHERE year = ?", (year,)).fetchone()
+                    total = moved + (previous[0] if previous else 0)
+                    cursor.execute("INSERT OR REPLACE INTO archives (year, path, transactions, archived_at) VALUES (?, ?, ?, ?)",
+                                   (year, os.path.basename(path), total,
+                                    datetime.now().isoformat(sep=" ", timespec="seconds")))
+                    if previous is None:
+                        self._write_audit(cursor, [("archive", year, "insert", None)])
+                    else:
+                        self._write_audit(cursor, [("archive", year, "update", {"transactions": [previous[0], total]})])
+                
+                    conn.commit()
+                self._publish([ChangeEvent(TRANSACTION, RELOAD)])
+                return moved
+            finally:
+                cursor.execute("DETACH DATABASE archive")
+                if moved == 0 and not existed:
+                    os.remove(path)
+        except sqlite3.Error as e:
+            print(f"Błąd archiwizacji roku {year}: {e}")
+            return None
+
+    @profiled
+    def get_archives(self) -> List[Tuple]:
+        """Pobiera listę archiwów rocznych (ARCHIVE_COLUMNS), od najstarszego."""
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM archives ORDER BY year")
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Błąd pobierania listy archiwów: {e}")
+            return []
+
+    @profiled
+    def get_valuation(self) -> List[Tuple]:
+        """
+        Pobiera wycenę magazynu w podziale na kategorie:
+        (kategoria, ilość, łączna waga, waga czystego złota, wartość wg średniej ceny zakupu).
+        Wagi w miligramach, wartość w groszach - zaokrąglane dla każdego typu złota przed zsumowaniem.
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT i.category,
+                           SUM(i.quantity) AS quantity,
+                           SUM((i.quantity * i.unit_weight + {QUANTITY_SCALE // 2}) / {QUANTITY_SCALE}) AS total_weight,
+                           SUM(CAST(ROUND(i.quantity * i.unit_weight * i.purity / {QUANTITY_SCALE * 100.0}) AS INTEGER))
+                               AS fine_weight,
+                           SUM(COALESCE(CAST(ROUND(i.quantity * 1.0
+                               * (COALESCE(b.value, 0) + COALESCE(r.value, 0))
+                               / NULLIF(COALESCE(b.quantity, 0) + COALESCE(r.quantity, 0), 0)) AS INTEGER), 0)) AS book_value
+                    FROM inventory i
+                    LEFT JOIN (
+                        SELECT gold_type_id, SUM({value_sql("t")}) AS value, SUM(quantity) AS quantity
+                        FROM transactions t
+                        WHERE transaction_type = 'Kupno'
+                        GROUP BY gold_type_id
+                    ) b ON b.gold_type_id = i.id
+                    LEFT JOIN (
+                        SELECT gold_type_id, SUM(bought_value) AS value, SUM(bought_quantity) AS quantity
+                        FROM transaction_rollups
+                        GROUP BY gold_type_id
+                    ) r ON r.gold_type_id = i.id
+                    GROUP BY i.category
+                    ORDER BY i.category
+                """)
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Błąd wyceny magazynu: {e}")
+            return []
+
+    @profiled
+    def get_monthly_totals(self) -> List[Tuple]:
+        """
+        Pobiera podsumowania miesięczne (MONTHLY_COLUMNS) z monthly_rollups, od najstarszego miesiąca.
+        Obejmują też zarchiwizowane lata; koszt nie zależy od liczby transakcji.
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT {', '.join(MONTHLY_COLUMNS)} FROM monthly_rollups
+                    WHERE transactions > 0
+                    ORDER BY month, transaction_type
+                """)
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Błąd pobierania podsumowań miesięcznych: {e}")
+            return []
+
+    @profiled
+    def enable_wal_mode(self) -> bool:
+        """
+        Przełącza bazę w tryb WAL, w którym odczyty nie blokują zapisu.
+        Tryb jest zapisywany w pliku bazy, więc wystarczy go ustawić raz.
+        """
+        try:
+            with self._connect() as conn:
+                mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+                return mode.lower() == "wal"
+        except sqlite3.Error as e:
+            print(f"Błąd przełączania trybu dziennika: {e}")
+            return False
+
+    @profiled
+    def verify_balances(self) -> List[Tuple]:
+        """
+        Sprawdza zgodność stanów magazynowych z historią transakcji (wraz z podsumowaniami archiwów).
+        Zwraca listę rozbieżności: (id, kategoria, typ, stan w magazynie, stan wynikający z transakcji).
+        Ilości są liczbami całkowitymi, więc stany porównywane są dokładnie.
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute(balance_mismatch_sql())
+                return cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Błąd weryfikacji stanów magazynowych: {e}")
+            raise
+
+
+def _serialized(method):
+    """Wykonuje metodę pod blokadą obiektu (_lock) - patrz InMemoryGoldDatabase."""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class InMemoryGoldDatabase(GoldDatabase):
+    """
+    Baza danych złota trzymana w pamięci operacyjnej.
+    Wszystkie metody korzystają z jednego połączenia, więc dane żyją tak długo jak obiekt.
+    Opcjonalnie zawartość może zostać skopiowana z istniejącego pliku bazy (seed_from).
+    Połączenie jest wspólne dla wątków (np. wątku panelu statystyk albo puli czytelników serwera),
+    a transakcja bazy jest stanem połączenia - publiczne metody są więc wykonywane pojedynczo
+    pod blokadą, żeby odczyt w jednym wątku nie zatwierdził ani nie wycofał zapisu w toku w innym.
+    """
+    
+    def __init__(self, seed_from: Optional[str] = None, profiler: Optional[QueryProfiler] = None):
+        """Tworzy bazę w pamięci, opcjonalnie kopiując dane z pliku."""
+        self._lock = threading.RLock()
+        self.profiler = profiler
+        self._statement_stats = []
+        self._stats_lock = threading.Lock()
+        self._conn = self._open_connection(":memory:", check_same_thread=False)
+        if seed_from:
+            if not os.path.exists(seed_from):
+                raise FileNotFoundError(f"Brak pliku bazy danych: {seed_from}")
+            # Kontekst połączenia sqlite3 tylko zatwierdza transakcję - plik zamyka closing
+            with closing(sqlite3.connect(seed_from)) as source:
+                source.backup(self._conn)
+        super().__init__(":memory:", profiler)
+        self._statement_stats = [self._conn.statement_stats]
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Zwraca jedyne połączenie z bazą w pamięci."""
+        return self._traced(self._conn)
+
+    def close(self):
+        """Połączenie z bazą w pamięci żyje tak długo jak obiekt - nie jest zamykane."""
+
+
+# Wszystkie publiczne metody bazy w pamięci pod blokadą (RLock - metody wywołują się nawzajem)
+for _name, _method in list(vars(GoldDatabase).items()):
+    if not _name.startswith("_") and isinstance(_method, FunctionType) and _name not in vars(InMemoryGoldDatabase):
+        setattr(InMemoryGoldDatabase, _name, _serialized(_method))
+del _name, _method
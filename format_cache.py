@@ -0,0 +1,60 @@
+"""
+Pamięć sformatowanych wierszy tabel Treeview między kolejnymi odświeżeniami.
+
+Formattery wierszy (wielkie litery, skracanie nazw, f-stringi z liczbami) są
+wywoływane dla każdego wiersza przy każdym odświeżeniu tabeli, choć zwykle
+zmienia się tylko kilka wierszy. FormatCache zapamiętuje wynik formattera
+pod identyfikatorem wiersza razem z wersją wiersza - krotką pól, z których
+korzysta formatter. Edycja wiersza zmienia wersję, więc jest on formatowany
+ponownie; niezmienione wiersze dostają gotową krotkę do wstawienia.
+"""
+from operator import attrgetter
+from typing import Any, Callable, Dict, Sequence, Tuple, Union
+
+# Górna granica liczby zapamiętanych wierszy - po jej przekroczeniu pamięć jest czyszczona
+DEFAULT_MAX_ENTRIES = 250_000
+
+
+class FormatCache:
+    """Formatter wierszy z pamięcią wyników; wywoływany tak samo jak opakowany formatter."""
+
+    def __init__(self, formatter: Callable[[Any], Any], row_id: Union[str, Callable[[Any], Any]],
+                 version_fields: Sequence[str], max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        row_id jednoznacznie identyfikuje wiersz: nazwa pola (id transakcji) albo funkcja zwracająca
+        klucz (pozycja magazynu - kategoria, typ i czystość); version_fields - wszystkie pola czytane
+        przez formatter.
+        """
+        self.formatter = formatter
+        self.max_entries = max_entries
+        self._row_id = attrgetter(row_id) if isinstance(row_id, str) else row_id
+        self._version = attrgetter(*version_fields)
+        self._entries: Dict[Any, Tuple[Any, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, row):
+        version = self._version(row)
+        entry = self._entries.get(self._row_id(row))
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            return entry[1]
+        return self._format(row, version, entry is None)
+
+    def _format(self, row, version, new_row: bool):
+        """Formatuje wiersz nieobecny w pamięci lub zmieniony od poprzedniego odświeżenia."""
+        self.misses += 1
+        if new_row and len(self._entries) >= self.max_entries:
+            self._entries.clear()
+        formatted = self.formatter(row)
+        self._entries[self._row_id(row)] = (version, formatted)
+        return formatted
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        """Czyści zapamiętane wiersze i liczniki trafień i formatowań."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
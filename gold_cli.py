@@ -0,0 +1,305 @@
+"""
+Konsolowy interfejs Magazynu Złota.
+
+Działa bezpośrednio na GoldDatabase i nie importuje Tkintera, dzięki czemu
+można go uruchamiać na serwerze bez ekranu i wywoływać z innych skryptów:
+
+    python -m gold_cli list --sort quantity
+    python -m gold_cli buy 3 2 8450.00 --date 2024-05-01 --description "Klient X"
+    python -m gold_cli history --from 2024-01-01 --type Sprzedaż
+    python -m gold_cli export --format csv --output historia.csv
+    python -m gold_cli summary --from 2024-01-01 --by-category
+    python -m gold_cli verify
+    python -m gold_cli audit --entity transaction --id 42
+    python -m gold_cli archive 2021
+    python -m gold_cli backup --dir backups --keep 7
+    python -m gold_cli restore backups/gold_vault_20250101_120000.db
+
+Ilości, ceny i wagi są podawane i wypisywane w jednostkach, złotych i gramach
+(baza przechowuje je jako liczby całkowite - patrz units).
+
+Kody wyjścia: 0 - sukces, 1 - błąd operacji lub niezgodność stanów, 2 - błędne argumenty.
+"""
+import argparse
+import sys
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from database import BALANCE_MISMATCH_COLUMNS, GoldDatabase, HISTORY_COLUMNS, INVENTORY_COLUMNS
+from units import display_value, format_quantity, parse_money, parse_quantity
+
+INVENTORY_SORT_CHOICES = ("category", "type", "purity", "quantity", "weight")
+HISTORY_SORT_CHOICES = ("date", "type", "value", "transaction_type", "relevance")
+
+
+def _print_rows(rows: List[tuple], columns: Optional[Tuple[str, ...]] = None):
+    """
+    Wypisuje wiersze rozdzielone tabulatorami (wygodne dla cut/awk).
+    Dla rekordów można podać kolumny - wtedy wypisywane są tylko one, w tej kolejności.
+    Kwoty, wagi i ilości rekordów są wypisywane w złotych, gramach i jednostkach.
+    """
+    write = sys.stdout.write
+    for row in rows:
+        names = columns or getattr(row, "_fields", None)
+        values = row if names is None else (display_value(name, getattr(row, name)) for name in names)
+        write("\t".join("" if value is None else str(value) for value in values) + "\n")
+
+
+def _history_filters(args) -> dict:
+    """Buduje słownik filtrów w formacie używanym przez get_all_transactions_for_history."""
+    return {
+        "date_from": args.date_from,
+        "date_to": args.date_to,
+        "category": args.category,
+        "trans_type": args.trans_type,
+        "search": args.search,
+    }
+
+
+def cmd_list(db: GoldDatabase, args) -> int:
+    """Wypisuje stan magazynu."""
+    _print_rows(db.get_inventory(args.sort, args.limit))
+    return 0
+
+
+def cmd_types(db: GoldDatabase, args) -> int:
+    """Wypisuje typy złota wraz z ID potrzebnym do kupna/sprzedaży."""
+    _print_rows(db.get_gold_types())
+    return 0
+
+
+def _trade(db: GoldDatabase, args, transaction_type: str) -> int:
+    """Wspólna obsługa kupna i sprzedaży."""
+    if args.quantity <= 0 or args.price <= 0:
+        print("Błąd: ilość i cena muszą być dodatnie.", file=sys.stderr)
+        return 1
+    try:
+        datetime.strptime(args.date, "%Y-%m-%d")
+    except ValueError:
+        print("Błąd: data musi być w formacie YYYY-MM-DD.", file=sys.stderr)
+        return 1
+
+    if transaction_type == "Sprzedaż":
+        available = db.get_gold_quantity(args.gold_id)
+        if available < args.quantity:
+            print(f"Błąd: niewystarczająca ilość w magazynie (dostępne: {format_quantity(available)}, "
+                  f"wymagane: {format_quantity(args.quantity)}).", file=sys.stderr)
+            return 1
+
+    if not db.add_transaction(args.gold_id, transaction_type, args.quantity, args.price, args.date, args.description):
+        print("Błąd: nie udało się zapisać transakcji.", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_buy(db: GoldDatabase, args) -> int:
+    """Rejestruje kupno złota."""
+    return _trade(db, args, "Kupno")
+
+
+def cmd_sell(db: GoldDatabase, args) -> int:
+    """Rejestruje sprzedaż złota."""
+    return _trade(db, args, "Sprzedaż")
+
+
+def cmd_history(db: GoldDatabase, args) -> int:
+    """Wypisuje historię transakcji z filtrami."""
+    _print_rows(db.get_all_transactions_for_history(args.sort, _history_filters(args)), HISTORY_COLUMNS)
+    return 0
+
+
+def cmd_export(db: GoldDatabase, args) -> int:
+    """Eksportuje historię transakcji lub stan magazynu do CSV/JSON."""
+    if args.what == "inventory":
+        columns, rows = INVENTORY_COLUMNS, db.get_inventory(args.sort or "category")
+    else:
+        columns, rows = HISTORY_COLUMNS, db.get_all_transactions_for_history(args.sort or "date", _history_filters(args))
+
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            import json
+            json.dump([{column: display_value(column, getattr(row, column)) for column in columns} for row in rows],
+                      out, ensure_ascii=False, indent=2)
+            out.write("\n")
+        else:
+            import csv
+            writer = csv.writer(out)
+            writer.writerow(columns)
+            writer.writerows([display_value(column, getattr(row, column)) for column in columns] for row in rows)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def cmd_audit(db: GoldDatabase, args) -> int:
+    """Wypisuje dziennik zmian (od najnowszych)."""
+    _print_rows(db.get_audit_log(args.entity, args.id, args.period, args.limit or None))
+    return 0
+
+
+def cmd_archive(db: GoldDatabase, args) -> int:
+    """Przenosi zamknięty rok do archiwum; bez roku wypisuje listę archiwów."""
+    if args.year is None:
+        _print_rows(db.get_archives())
+        return 0
+    archived = db.archive_year(args.year)
+    if archived is None:
+        return 1
+    print(f"Zarchiwizowano {archived} transakcji z roku {args.year} ({db.archive_path(args.year)}).")
+    return 0
+
+
+def cmd_backup(db: Optional[GoldDatabase], args) -> int:
+    """
+    Wykonuje sprawdzoną kopię zapasową bazy; z --list wypisuje istniejące kopie.
+    Działa na pliku args.db bez otwierania go przez GoldDatabase (db to None), więc kopia odpowiada plikowi.
+    """
+    import vault_backup
+    if args.list:
+        _print_rows(vault_backup.list_backups(args.db, args.dir))
+        return 0
+
+    def progress(done: int, total: int):
+        print(f"\rKopiowanie: {done}/{total} stron", end="", file=sys.stderr, flush=True)
+
+    path = vault_backup.backup_database(args.db, args.dir, args.keep, args.pages, progress)
+    print(file=sys.stderr)
+    if path is None:
+        return 1
+    print(path)
+    return 0
+
+
+def cmd_restore(db: Optional[GoldDatabase], args) -> int:
+    """
+    Przywraca bazę z kopii zapasowej (po jej weryfikacji). Nadpisywany plik nie jest otwierany
+    przez GoldDatabase (db to None) - migracje wykona pierwsze otwarcie przywróconej bazy.
+    """
+    import vault_backup
+    if not vault_backup.restore_backup(args.backup, args.db, args.pages):
+        return 1
+    print(f"Przywrócono {args.db} z {args.backup}.")
+    return 0
+
+
+def cmd_verify(db: GoldDatabase, args) -> int:
+    """Sprawdza, czy stany magazynowe zgadzają się z historią transakcji."""
+    mismatches = db.verify_balances()
+    if not mismatches:
+        print("OK: stany magazynowe zgodne z historią transakcji.")
+        return 0
+    print("Niezgodności (id, kategoria, typ, stan, oczekiwany stan):", file=sys.stderr)
+    for row in mismatches:
+        print("\t".join(str(display_value(column, value)) for column, value in zip(BALANCE_MISMATCH_COLUMNS, row)),
+              file=sys.stderr)
+    return 1
+
+
+def cmd_summary(db: GoldDatabase, args) -> int:
+    """Wypisuje sumy i średnie ceny transakcji (z filtrami), opcjonalnie w podziale na kategorie."""
+    columns = db.load_history_columns(_history_filters(args))
+    if columns is None:
+        return 1
+    for key, value in columns.summary().items():
+        print(f"{key}\t{'' if value is None else display_value(key, value)}")
+    if args.by_category:
+        print("category\tbought_quantity\tsold_quantity\tbought_value\tsold_value")
+        for category, totals in columns.totals_by_category().items():
+            print("\t".join([category] + [str(display_value(key, value)) for key, value in totals.items()]))
+    return 0
+
+
+def _add_history_filter_arguments(parser: argparse.ArgumentParser):
+    """Dodaje wspólne opcje filtrowania historii."""
+    parser.add_argument("--from", dest="date_from", help="data początkowa (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", help="data końcowa (YYYY-MM-DD)")
+    parser.add_argument("--category", help="kategoria złota")
+    parser.add_argument("--type", dest="trans_type", choices=("Kupno", "Sprzedaż"), help="rodzaj transakcji")
+    parser.add_argument("--search", help="szukaj w opisach i nazwach typów złota (z --sort relevance: od najtrafniejszych)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Tworzy parser argumentów wiersza poleceń."""
+    parser = argparse.ArgumentParser(prog="gold_cli", description="Magazyn Złota - interfejs konsolowy")
+    parser.add_argument("--db", default="gold_vault.db", help="ścieżka do pliku bazy danych")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="stan magazynu")
+    list_parser.add_argument("--sort", choices=INVENTORY_SORT_CHOICES, default="category")
+    list_parser.add_argument("--limit", type=int, help="pokaż tylko pierwsze N pozycji")
+    list_parser.set_defaults(handler=cmd_list)
+
+    types_parser = subparsers.add_parser("types", help="typy złota z ID")
+    types_parser.set_defaults(handler=cmd_types)
+
+    for name, handler, help_text in (("buy", cmd_buy, "kupno złota"), ("sell", cmd_sell, "sprzedaż złota")):
+        trade_parser = subparsers.add_parser(name, help=help_text)
+        trade_parser.add_argument("gold_id", type=int, help="ID typu złota (patrz: types)")
+        trade_parser.add_argument("quantity", type=parse_quantity, help="ilość (jednostki typu złota)")
+        trade_parser.add_argument("price", type=parse_money, help="cena za jednostkę (zł)")
+        trade_parser.add_argument("--date", default=datetime.now().strftime("%Y-%m-%d"))
+        trade_parser.add_argument("--description", default="")
+        trade_parser.set_defaults(handler=handler)
+
+    history_parser = subparsers.add_parser("history", help="historia transakcji")
+    history_parser.add_argument("--sort", choices=HISTORY_SORT_CHOICES, default="date")
+    _add_history_filter_arguments(history_parser)
+    history_parser.set_defaults(handler=cmd_history)
+
+    export_parser = subparsers.add_parser("export", help="eksport do CSV/JSON")
+    export_parser.add_argument("what", nargs="?", choices=("history", "inventory"), default="history")
+    export_parser.add_argument("--format", choices=("csv", "json"), default="csv")
+    export_parser.add_argument("--output", "-o", help="plik wynikowy (domyślnie stdout)")
+    export_parser.add_argument("--sort", choices=HISTORY_SORT_CHOICES + INVENTORY_SORT_CHOICES)
+    _add_history_filter_arguments(export_parser)
+    export_parser.set_defaults(handler=cmd_export)
+
+    summary_parser = subparsers.add_parser("summary", help="sumy i średnie ceny transakcji")
+    summary_parser.add_argument("--by-category", action="store_true", help="sumy w podziale na kategorie")
+    _add_history_filter_arguments(summary_parser)
+    summary_parser.set_defaults(handler=cmd_summary)
+
+    verify_parser = subparsers.add_parser("verify", help="weryfikacja stanów magazynowych")
+    verify_parser.set_defaults(handler=cmd_verify)
+
+    audit_parser = subparsers.add_parser("audit", help="dziennik zmian (dodania, edycje, usunięcia)")
+    audit_parser.add_argument("--entity", choices=("transaction", "gold_type", "archive"))
+    audit_parser.add_argument("--id", type=int, help="id transakcji lub typu złota")
+    audit_parser.add_argument("--period", help="miesiąc (RRRR-MM)")
+    audit_parser.add_argument("--limit", type=int, default=100, help="liczba wpisów (0 - wszystkie)")
+    audit_parser.set_defaults(handler=cmd_audit)
+
+    archive_parser = subparsers.add_parser("archive", help="archiwizacja zamkniętego roku do osobnego pliku")
+    archive_parser.add_argument("year", type=int, nargs="?", help="rok do archiwizacji (bez roku - lista archiwów)")
+    archive_parser.set_defaults(handler=cmd_archive)
+
+    backup_parser = subparsers.add_parser("backup", help="kopia zapasowa bazy (API backup SQLite)")
+    backup_parser.add_argument("--dir", default="backups", help="katalog kopii")
+    backup_parser.add_argument("--keep", type=int, default=7, help="liczba przechowywanych kopii")
+    backup_parser.add_argument("--pages", type=int, default=1024, help="stron kopiowanych w jednym kroku (-1 - naraz)")
+    backup_parser.add_argument("--list", action="store_true", help="wypisz istniejące kopie")
+    backup_parser.set_defaults(handler=cmd_backup, open_db=False)
+
+    restore_parser = subparsers.add_parser("restore", help="przywrócenie bazy z kopii zapasowej")
+    restore_parser.add_argument("backup", help="plik kopii")
+    restore_parser.add_argument("--pages", type=int, default=1024, help="stron kopiowanych w jednym kroku (-1 - naraz)")
+    restore_parser.set_defaults(handler=cmd_restore, open_db=False)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Punkt wejścia CLI."""
+    args = build_parser().parse_args(argv)
+    try:
+        db = GoldDatabase(args.db) if getattr(args, "open_db", True) else None
+        return args.handler(db, args)
+    except Exception as e:
+        print(f"Błąd: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1451 @@
+"""Okna dialogowe aplikacji Magazyn Złota, ładowane dopiero przy pierwszym użyciu."""
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+from datetime import datetime
+from change_events import ChangeEvent, INVENTORY, TRANSACTION, INSERT, UPDATE, DELETE, RELOAD, in_date_range
+from format_cache import FormatCache
+from records import TransactionRow
+from storage import GoldStorage
+from treeview_sort import TreeviewSorter, none_last
+from gold_type_index import GoldTypeIndex, gold_type_display_name
+from units import (format_money, format_quantity, format_weight, line_value, parse_money, parse_quantity,
+                   parse_weight)
+
+# Maksymalna liczba wyników wyszukiwania pokazywanych w oknie historii (najtrafniejsze)
+SEARCH_RESULT_LIMIT = 1000
+
+# Maksymalna liczba pozycji na rozwijanej liście typów złota podczas filtrowania
+GOLD_COMBO_LIMIT = 200
+
+# Klawisze, które nie zmieniają tekstu pola - nie filtrują listy
+NAVIGATION_KEYS = {"Up", "Down", "Left", "Right", "Return", "KP_Enter", "Escape", "Tab", "Home", "End",
+                   "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R"}
+
+
+def get_gold_type_index(db: GoldStorage, main_app=None) -> GoldTypeIndex:
+    """Zwraca indeks typów złota z głównej aplikacji (wspólny dla dialogów) lub buduje nowy."""
+    if main_app is not None and hasattr(main_app, "get_gold_type_index"):
+        return main_app.get_gold_type_index()
+    return GoldTypeIndex(db.get_gold_types())
+
+
+def bind_gold_type_filter(combo: ttk.Combobox, index: GoldTypeIndex, on_change=None):
+    """Filtruje listę edytowalnego comboboxa typów złota przy każdym naciśnięciu klawisza."""
+    def on_key(event):
+        if event.keysym in NAVIGATION_KEYS:
+            return
+        combo['values'] = index.filter(combo.get(), GOLD_COMBO_LIMIT)
+        if on_change is not None:
+            on_change()
+
+    combo['values'] = index.names[:GOLD_COMBO_LIMIT]
+    combo.bind('<KeyRelease>', on_key, add="+")
+
+
+def format_history_row(trans: TransactionRow) -> tuple:
+    """Formatuje wiersz tabeli w oknie pełnej historii transakcji."""
+    return (
+        trans.date.split(" ")[0],
+        f"{trans.category} - {trans.type} ({trans.purity:.1f}%)",
+        trans.transaction_type,
+        format_quantity(trans.quantity),
+        trans.unit,
+        format_weight(trans.weight_total) if trans.weight_total is not None else "N/A",
+        format_money(trans.price_per_unit),
+        format_money(trans.price_per_gram) if trans.price_per_gram is not None else "N/A",
+        format_money(trans.total_value),
+        trans.description or ""
+    )
+
+
+def history_order_key(trans: TransactionRow) -> tuple:
+    """Klucz kolejności okna historii (od najnowszych, jak zapytanie)."""
+    return (trans.date, trans.id)
+
+
+# Sformatowane wiersze okna historii - wspólne dla kolejnych okien i odświeżeń (zmiana filtrów)
+HISTORY_ROW_FORMATS = FormatCache(format_history_row, "id", TransactionRow._fields)
+
+
+class TransactionHistoryWindow:
+    """Okno wyświetlające pełną historię transakcji z opcjami filtrowania."""
+    
+    def __init__(self, parent, db: GoldStorage, main_app_ref):
+        self.db = db
+        self.main_app_ref = main_app_ref
+        # Filtry ostatniego wczytania i wiersze tabeli według id transakcji - do zmian z magazynu danych
+        self._filters: dict = {}
+        self._items: dict = {}
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Pełna Historia Transakcji")
+        self.dialog.geometry("1600x800")
+        self.dialog.minsize(1200, 600)
+        self.dialog.grab_set()
+        
+        self.dialog.transient(parent)
+        self.center_window()
+        
+        self.create_widgets()
+        self.load_transactions()
+        self.db.changes.subscribe(self.on_storage_changes)
+        self.dialog.bind("<Destroy>", self._on_destroy, add="+")
+    
+    def _on_destroy(self, event):
+        """Kończy subskrypcję zmian po zamknięciu okna."""
+        if event.widget is self.dialog:
+            self.db.changes.unsubscribe(self.on_storage_changes)
+
+    def center_window(self):
+        """Centruje okno na ekranie."""
+        self.dialog.update_idletasks()
+        width = self.dialog.winfo_width()
+        height = self.dialog.winfo_height()
+        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
+        self.dialog.geometry(f"{width}x{height}+{x}+{y}")
+
+    def create_widgets(self):
+        """Tworzy interfejs okna historii."""
+        main_frame = ttk.Frame(self.dialog, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+
+        # --- Ramka z filtrami ---
+        filter_frame = ttk.LabelFrame(main_frame, text="Filtry i Opcje", padding="10")
+        filter_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
+        
+        # Filtry daty
+        ttk.Label(filter_frame, text="Od:").grid(row=0, column=0, padx=(0, 5), pady=5)
+        self.date_from_entry = ttk.Entry(filter_frame, width=12)
+        self.date_from_entry.insert(0, "RRRR-MM-DD")
+        self.date_from_entry.grid(row=0, column=1, padx=(0, 15), pady=5)
+        
+        ttk.Label(filter_frame, text="Do:").grid(row=0, column=2, padx=(0, 5), pady=5)
+        self.date_to_entry = ttk.Entry(filter_frame, width=12)
+        self.date_to_entry.insert(0, "RRRR-MM-DD")
+        self.date_to_entry.grid(row=0, column=3, padx=(0, 15), pady=5)
+        
+        # Filtr kategorii
+        ttk.Label(filter_frame, text="Kategoria:").grid(row=0, column=4, padx=(0, 5), pady=5)
+        categories = ["Wszystkie"] + self.db.get_gold_categories()
+        self.category_combo = ttk.Combobox(filter_frame, values=categories, state="readonly", width=15)
+        self.category_combo.set("Wszystkie")
+        self.category_combo.grid(row=0, column=5, padx=(0, 15), pady=5)
+        
+        # Filtr typu transakcji
+        ttk.Label(filter_frame, text="Typ transakcji:").grid(row=0, column=6, padx=(0, 5), pady=5)
+        trans_types = ["Wszystkie", "Kupno", "Sprzedaż"]
+        self.trans_type_combo = ttk.Combobox(filter_frame, values=trans_types, state="readonly", width=15)
+        self.trans_type_combo.set("Wszystkie")
+        self.trans_type_combo.grid(row=0, column=7, padx=(0, 15), pady=5)
+        
+        # Przyciski
+        ttk.Button(filter_frame, text="Filtruj", command=self.load_transactions).grid(row=0, column=8, padx=10, pady=5)
+        ttk.Button(filter_frame, text="Wyczyść filtry", command=self.clear_filters).grid(row=0, column=9, padx=10, pady=5)
+
+        # Wyszukiwanie pełnotekstowe w opisach transakcji i nazwach typów złota
+        ttk.Label(filter_frame, text="Szukaj:").grid(row=1, column=0, padx=(0, 5), pady=5)
+        self.search_entry = ttk.Entry(filter_frame, width=60)
+        self.search_entry.grid(row=1, column=1, columnspan=5, sticky="ew", padx=(0, 15), pady=5)
+        self.search_entry.bind('<Return>', lambda event: self.load_transactions())
+        self.search_info_label = ttk.Label(filter_frame, text="")
+        self.search_info_label.grid(row=1, column=6, columnspan=4, sticky="w", pady=5)
+
+        # --- Tabela z historią ---
+        table_frame = ttk.Frame(main_frame)
+        table_frame.grid(row=1, column=0, sticky="nsew")
+        table_frame.columnconfigure(0, weight=1)
+        table_frame.rowconfigure(0, weight=1)
+
+        columns = ("date", "type", "trans_type", "quantity", "unit", "weight_total", "price_unit", "price_gram", "total_value", "desc")
+        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings")
+        
+        self.tree.heading("date", text="Data")
+        self.tree.heading("type", text="Typ Złota")
+        self.tree.heading("trans_type", text="Transakcja")
+        self.tree.heading("quantity", text="Ilość")
+        self.tree.heading("unit", text="Jedn.")
+        self.tree.heading("weight_total", text="Waga Całk. (g)")
+        self.tree.heading("price_unit", text="Cena/Jedn. (zł)")
+        self.tree.heading("price_gram", text="Cena/Gram (zł)")
+        self.tree.heading("total_value", text="Wartość (zł)")
+        self.tree.heading("desc", text="Opis")
+
+        for col in columns:
+            self.tree.column(col, anchor="center", width=120)
+        self.tree.column("type", width=200, anchor="w")
+        self.tree.column("desc", width=250, anchor="w")
+
+        from database import natural_sort_key
+        self.sorter = TreeviewSorter(self.tree, {
+            "date": lambda trans: trans.date,
+            "type": lambda trans: (trans.category, natural_sort_key(trans.type), -trans.purity),
+            "trans_type": lambda trans: trans.transaction_type,
+            "quantity": lambda trans: trans.quantity,
+            "unit": lambda trans: trans.unit,
+            "weight_total": lambda trans: none_last(trans.weight_total),
+            "price_unit": lambda trans: trans.price_per_unit,
+            "price_gram": lambda trans: none_last(trans.price_per_gram),
+            "total_value": lambda trans: trans.total_value,
+            "desc": lambda trans: (trans.description or "").lower(),
+        })
+
+        v_scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        h_scrollbar = ttk.Scrollbar(table_frame, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        v_scrollbar.grid(row=0, column=1, sticky="ns")
+        h_scrollbar.grid(row=1, column=0, sticky="ew")
+        
+        self.tree.bind('<Double-1>', self.on_transaction_double_click)
+        self.tree.bind('<Delete>', lambda event: self.delete_selected())
+
+        # --- Operacje na zaznaczonych transakcjach (Ctrl/Shift + klik zaznacza wiele) ---
+        batch_frame = ttk.Frame(main_frame)
+        batch_frame.grid(row=2, column=0, sticky="w", pady=(10, 0))
+        ttk.Button(batch_frame, text="Edytuj zaznaczone", command=self.edit_selected).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(batch_frame, text="Usuń zaznaczone", command=self.delete_selected).pack(side=tk.LEFT, padx=(0, 10))
+        self.selection_label = ttk.Label(batch_frame, text="")
+        self.selection_label.pack(side=tk.LEFT, padx=(10, 0))
+        self.tree.bind('<<TreeviewSelect>>', self.on_selection_change)
+
+    def load_transactions(self):
+        """Ładuje transakcje do tabeli na podstawie filtrów."""
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+            
+        search = self.search_entry.get().strip()
+        filters = self._filters = {
+            "date_from": self.date_from_entry.get(),
+            "date_to": self.date_to_entry.get(),
+            "category": self.category_combo.get(),
+            "trans_type": self.trans_type_combo.get(),
+            "search": search
+        }
+        self._items = {}
+        
+        if search:
+            # Wyniki wyszukiwania od najtrafniejszych, ograniczone do SEARCH_RESULT_LIMIT
+            transactions = self.db.get_all_transactions_for_history("relevance", filters, SEARCH_RESULT_LIMIT)
+            info = f"Wyników: {len(transactions)}"
+            if len(transactions) >= SEARCH_RESULT_LIMIT:
+                info += f" (pokazano {SEARCH_RESULT_LIMIT} najtrafniejszych)"
+            self.search_info_label.config(text=info)
+        else:
+            transactions = self.db.get_all_transactions_for_history(filters=filters)
+            self.search_info_label.config(text="")
+        
+        if not transactions:
+            self.tree.insert("", "end", values=([""] * 9 + ["Brak transakcji spełniających kryteria"]))
+            self.sorter.load([])
+            return
+        
+        loaded = []
+        for trans in transactions:
+            loaded.append((self.tree.insert("", "end", values=HISTORY_ROW_FORMATS(trans), tags=(trans.id,)), trans))
+        self.sorter.load(loaded)
+        self._items = {trans.id: tree_item for tree_item, trans in loaded}
+
+    def _matches_filters(self, trans: TransactionRow) -> bool:
+        """Sprawdza, czy transakcja spełnia filtry ostatniego wczytania (bez wyszukiwania)."""
+        filters = self._filters
+        if not in_date_range(trans.date, filters.get("date_from"), filters.get("date_to")):
+            return False
+        if filters.get("category") not in (None, "", "Wszystkie") and trans.category != filters["category"]:
+            return False
+        if filters.get("trans_type") not in (None, "", "Wszystkie") and trans.transaction_type != filters["trans_type"]:
+            return False
+        return True
+
+    def on_storage_changes(self, events: list):
+        """Nanosi zmienione transakcje na tabelę - wstawia, poprawia lub usuwa tylko dotknięte wiersze."""
+        for event in events:
+            if event.entity != TRANSACTION:
+                continue
+            # Wyniki wyszukiwania są uporządkowane według trafności - przy zmianie są wyszukiwane ponownie
+            if event.action not in (INSERT, UPDATE, DELETE) or not event.ids or (
+                    event.action != DELETE and self._filters.get("search")):
+                self.load_transactions()
+                continue
+            if event.action == DELETE:
+                self._remove_rows(event.ids)
+                continue
+            
+            for trans in self.db.get_transactions_by_ids(list(event.ids)):
+                tree_item = self._items.get(trans.id)
+                visible = self._matches_filters(trans)
+                if tree_item is not None:
+                    if visible and history_order_key(self.sorter.row(tree_item)) == history_order_key(trans):
+                        self.tree.item(tree_item, values=HISTORY_ROW_FORMATS(trans))
+                        self.sorter.update(tree_item, trans)
+                        continue
+                    self._remove_rows([trans.id])
+                if visible:
+                    if not self._items:
+                        self.tree.delete(*self.tree.get_children())  # Komunikat o braku transakcji
+                    index = self.sorter.index_for(trans, history_order_key)
+                    tree_item = self.tree.insert("", index, values=HISTORY_ROW_FORMATS(trans), tags=(trans.id,))
+                    self.sorter.insert(index, tree_item, trans)
+                    self._items[trans.id] = tree_item
+
+    def _remove_rows(self, transaction_ids):
+        """Usuwa transakcje z tabeli."""
+        tree_items = [self._items.pop(transaction_id) for transaction_id in transaction_ids
+                      if transaction_id in self._items]
+        if tree_items:
+            self.tree.delete(*tree_items)
+            self.sorter.remove(tree_items)
+
+    def selected_transaction_ids(self) -> list:
+        """Zwraca ID zaznaczonych transakcji (wiersz informacyjny bez ID jest pomijany)."""
+        ids = []
+        for item in self.tree.selection():
+            tags = self.tree.item(item, "tags")
+            if tags:
+                ids.append(int(tags[0]))
+        return ids
+
+    def on_selection_change(self, event=None):
+        """Pokazuje liczbę zaznaczonych transakcji."""
+        count = len(self.selected_transaction_ids())
+        self.selection_label.config(text=f"Zaznaczono: {count}" if count > 1 else "")
+
+    def delete_selected(self):
+        """Usuwa wszystkie zaznaczone transakcje w jednej operacji."""
+        ids = self.selected_transaction_ids()
+        if not ids:
+            messagebox.showwarning("Uwaga", "Zaznacz transakcje do usunięcia!", parent=self.dialog)
+            return
+        if not messagebox.askyesno("Potwierdzenie", f"Czy na pewno usunąć zaznaczone transakcje ({len(ids)})?\n"
+                                   "Stany magazynu zostaną przywrócone.", parent=self.dialog):
+            return
+        if not self.db.delete_transactions(ids):
+            messagebox.showerror("Błąd", "Nie można usunąć transakcji!\n"
+                                 "Usunięcie zakupów dałoby ujemny stan magazynu - żadna transakcja nie została usunięta.",
+                                 parent=self.dialog)
+
+    def edit_selected(self):
+        """Otwiera dialog zmiany daty, opisu lub ceny zaznaczonych transakcji."""
+        ids = self.selected_transaction_ids()
+        if not ids:
+            messagebox.showwarning("Uwaga", "Zaznacz transakcje do edycji!", parent=self.dialog)
+            return
+        if len(ids) == 1:
+            self.on_transaction_double_click(None)
+            return
+        BatchEditDialog(self.dialog, self.db, ids)
+
+    def clear_filters(self):
+        """Czyści wszystkie filtry i ładuje dane od nowa."""
+        self.date_from_entry.delete(0, tk.END)
+        self.date_from_entry.insert(0, "RRRR-MM-DD")
+        self.date_to_entry.delete(0, tk.END)
+        self.date_to_entry.insert(0, "RRRR-MM-DD")
+        self.category_combo.set("Wszystkie")
+        self.trans_type_combo.set("Wszystkie")
+        self.search_entry.delete(0, tk.END)
+        self.load_transactions()
+
+    def on_transaction_double_click(self, event):
+        """Obsługuje podwójne kliknięcie na transakcji."""
+        selection = self.tree.selection()
+        if not selection:
+            return
+        
+        # Wiersz "Brak transakcji spełniających kryteria" nie ma tagu z ID transakcji
+        tags = self.tree.item(selection[0], "tags")
+        if tags:
+            transaction_id = int(tags[0])
+            SingleTransactionEditDialog(self.dialog, self.db, transaction_id, self.main_app_ref)
+
+class BatchEditDialog:
+    """Dialog zmiany wspólnych pól (data, opis, cena) wielu transakcji naraz."""
+
+    def __init__(self, parent, db: GoldStorage, transaction_ids: list, on_saved=None):
+        self.db = db
+        self.transaction_ids = transaction_ids
+        self.on_saved = on_saved
+
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"Edycja {len(transaction_ids)} transakcji")
+        self.dialog.resizable(False, False)
+        self.dialog.transient(parent)
+        self.dialog.option_add('*Font', 'Arial 11')
+
+        self.create_widgets()
+        self.dialog.grab_set()
+
+    def create_widgets(self):
+        """Tworzy pola - zmieniane są tylko zaznaczone."""
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(1, weight=1)
+
+        ttk.Label(main_frame, text=f"Zaznaczone transakcje: {len(self.transaction_ids)}. Zmienione zostaną tylko zaznaczone pola.",
+                  font=("Arial", 11, "bold")).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 15))
+
+        self.fields = {}
+        for row, (key, label) in enumerate((("date", "Data (RRRR-MM-DD)"), ("description", "Opis"),
+                                            ("price", "Cena za Jednostkę (zł)")), start=1):
+            enabled = tk.BooleanVar(value=False)
+            ttk.Checkbutton(main_frame, text=label, variable=enabled).grid(row=row, column=0, sticky=tk.W, pady=8)
+            entry = ttk.Entry(main_frame, width=40)
+            entry.grid(row=row, column=1, sticky="ew", padx=(15, 0), pady=8)
+            entry.bind('<KeyRelease>', lambda event, var=enabled: var.set(True))
+            self.fields[key] = (enabled, entry)
+
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=4, column=0, columnspan=2, pady=(20, 0))
+        ttk.Button(button_frame, text="ZAPISZ", command=self.save, width=15).pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="ANULUJ", command=self.dialog.destroy, width=15).pack(side=tk.LEFT, padx=10)
+
+        self.dialog.bind('<Return>', lambda event: self.save())
+        self.dialog.bind('<Escape>', lambda event: self.dialog.destroy())
+
+    def _value(self, key: str):
+        """Zwraca tekst pola, jeśli pole ma zostać zmienione, w przeciwnym razie None."""
+        enabled, entry = self.fields[key]
+        return entry.get().strip() if enabled.get() else None
+
+    def save(self):
+        """Sprawdza dane i zapisuje zmiany wszystkich transakcji w jednej operacji."""
+        date = self._value("date")
+        description = self._value("description")
+        price_text = self._value("price")
+
+        if date is not None:
+            try:
+                datetime.strptime(date, "%Y-%m-%d")
+            except ValueError:
+                messagebox.showerror("Błąd", "Data musi być w formacie YYYY-MM-DD!", parent=self.dialog)
+                return
+        price = None
+        if price_text is not None:
+            try:
+                price = parse_money(price_text)
+            except ValueError:
+                messagebox.showerror("Błąd", "Cena musi być liczbą!", parent=self.dialog)
+                return
+            if price <= 0:
+                messagebox.showerror("Błąd", "Cena musi być dodatnia!", parent=self.dialog)
+                return
+        if date is None and description is None and price is None:
+            messagebox.showwarning("Uwaga", "Zaznacz co najmniej jedno pole do zmiany!", parent=self.dialog)
+            return
+
+        if self.db.update_transactions(self.transaction_ids, date, description, price):
+            self.dialog.destroy()
+            if self.on_saved:
+                self.on_saved()
+        else:
+            messagebox.showerror("Błąd", "Nie można zaktualizować transakcji!", parent=self.dialog)
+
+
+class AddGoldTypeDialog:
+    """Dialog dodawania nowego typu złota."""
+    
+    def __init__(self, parent, db: GoldStorage, main_app=None):
+        self.db = db
+        self.result = False
+        self.main_app = main_app  # Referencja do głównej aplikacji
+        
+        # Tworzenie okna
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Dodaj Nowy Typ Złota")
+        self.dialog.geometry("750x650")
+        self.dialog.resizable(True, True)
+        self.dialog.grab_set()
+        
+        # Konfiguracja czcionek dla dialogu
+        self.dialog.option_add('*Font', 'Arial 11')
+        
+        # Centrowanie okna
+        self.dialog.transient(parent)
+        self.center_window()
+        
+        self.create_widgets()
+    
+    def center_window(self):
+        """Centruje okno na ekranie."""
+        self.dialog.update_idletasks()
+        width = 850
+        height = 850
+        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
+        self.dialog.geometry(f"{width}x{height}+{x}+{y}")
+    
+    def create_widgets(self):
+        """Tworzy interfejs dialogu."""
+        main_frame = ttk.Frame(self.dialog, padding="25")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Konfiguracja siatki
+        main_frame.columnconfigure(1, weight=1)
+        
+        # Kategoria złota
+        ttk.Label(main_frame, text="Kategoria:", font=("Arial", 12)).grid(row=0, column=0, sticky=tk.W, pady=20)
+        self.category_combo = ttk.Combobox(main_frame, width=45, font=("Arial", 11), state="readonly")
+        self.category_combo['values'] = ("Złom", "Moneta", "Sztabka", "Biżuteria", "Inne")
+        self.category_combo.set("Złom")  # Domyślna wartość
+        self.category_combo.grid(row=0, column=1, pady=20, padx=(15, 0), sticky="ew")
+        
+        # Pola wprowadzania z większymi czcionkami i odstępami
+        ttk.Label(main_frame, text="Typ Złota:", font=("Arial", 12)).grid(row=1, column=0, sticky=tk.W, pady=20)
+        self.type_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
+        self.type_entry.grid(row=1, column=1, pady=20, padx=(15, 0), sticky="ew")
+        
+        ttk.Label(main_frame, text="Waga Jednostkowa (g):", font=("Arial", 12)).grid(row=2, column=0, sticky=tk.W, pady=20)
+        self.weight_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
+        self.weight_entry.grid(row=2, column=1, pady=20, padx=(15, 0), sticky="ew")
+        
+        ttk.Label(main_frame, text="Czystość (%):", font=("Arial", 12)).grid(row=3, column=0, sticky=tk.W, pady=20)
+        self.purity_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
+        self.purity_entry.grid(row=3, column=1, pady=20, padx=(15, 0), sticky="ew")
+        
+        # Jednostka
+        ttk.Label(main_frame, text="Jednostka:", font=("Arial", 12)).grid(row=4, column=0, sticky=tk.W, pady=20)
+        self.unit_combo = ttk.Combobox(main_frame, width=45, font=("Arial", 11), state="readonly")
+        self.unit_combo['values'] = ("szt", "g", "oz")
+        self.unit_combo.set("szt")  # Domyślna wartość
+        self.unit_combo.grid(row=4, column=1, pady=20, padx=(15, 0), sticky="ew")
+        
+        # Notatki
+        ttk.Label(main_frame, text="Notatki:", font=("Arial", 12)).grid(row=5, column=0, sticky=tk.W, pady=20)
+        self.notes_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
+        self.notes_entry.grid(row=5, column=1, pady=20, padx=(15, 0), sticky="ew")
+        
+        # Przyciski z większymi czcionkami
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=6, column=0, columnspan=2, pady=25)
+        
+        ttk.Button(button_frame, text="DODAJ", command=self.add_gold, 
+                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="ANULUJ", command=self.dialog.destroy, 
+                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
+        
+        # Focus na pierwszym polu
+        self.category_combo.focus()
+        
+        # Obsługa klawisza Enter
+        self.dialog.bind('<Return>', lambda event: self.add_gold())
+        self.dialog.bind('<Escape>', lambda event: self.dialog.destroy())
+    
+    def add_gold(self):
+        """Dodaje nowy typ złota."""
+        try:
+            # Walidacja danych
+            category = self.category_combo.get().strip()
+            if not category:
+                messagebox.showerror("Błąd", "Wybierz kategorię!")
+                return
+            
+            gold_type = self.type_entry.get().strip()
+            if not gold_type:
+                messagebox.showerror("Błąd", "Typ złota nie może być pusty!")
+                return
+            
+            unit_weight = parse_weight(self.weight_entry.get())
+            if unit_weight <= 0:
+                messagebox.showerror("Błąd", "Waga jednostkowa musi być dodatnia!")
+                return
+            
+            purity = float(self.purity_entry.get())
+            if not (0 < purity <= 100):
+                messagebox.showerror("Błąd", "Czystość musi być między 0 a 100%!")
+                return
+            
+            unit = self.unit_combo.get().strip()
+            if not unit:
+                messagebox.showerror("Błąd", "Wybierz jednostkę!")
+                return
+            
+            notes = self.notes_entry.get().strip()
+            
+            # Dodawanie do bazy
+            if self.db.add_gold_type(category, gold_type, unit_weight, purity, unit, notes):
+                messagebox.showinfo("Sukces", f"Typ złota '{gold_type}' został dodany!")
+                self.result = True
+                self.dialog.destroy()
+            else:
+                messagebox.showerror("Błąd", "Typ złota o tej kombinacji (kategoria, typ, czystość) już istnieje!")
+        
+        except ValueError:
+            messagebox.showerror("Błąd", "Waga i czystość muszą być liczbami!")
+
+
+class TransactionDialog:
+    """Dialog transakcji (kupno/sprzedaż)."""
+    
+    def __init__(self, parent, db: GoldStorage, transaction_type: str, main_app=None):
+        self.db = db
+        self.transaction_type = transaction_type
+        self.result = False
+        self.main_app = main_app  # Referencja do głównej aplikacji
+        
+        # Tworzenie okna
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title(f"{transaction_type} Złota")
+        self.dialog.geometry("750x550")
+        self.dialog.resizable(True, True)
+        self.dialog.grab_set()
+        
+        # Konfiguracja czcionek dla dialogu
+        self.dialog.option_add('*Font', 'Arial 11')
+        
+        # Centrowanie okna
+        self.dialog.transient(parent)
+        self.center_window()
+        
+        self.create_widgets()
+    
+    def center_window(self):
+        """Centruje okno na ekranie."""
+        self.dialog.update_idletasks()
+        width = 850
+        height = 850
+        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
+        self.dialog.geometry(f"{width}x{height}+{x}+{y}")
+    
+    def create_widgets(self):
+        """Tworzy interfejs dialogu."""
+        main_frame = ttk.Frame(self.dialog, padding="20")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Konfiguracja siatki
+        main_frame.columnconfigure(1, weight=1)
+        
+        # Typ złota
+        ttk.Label(main_frame, text="Typ Złota:").grid(row=0, column=0, sticky=tk.W, pady=15)
+        self.gold_combo = ttk.Combobox(main_frame, width=55)
+        self.gold_combo.grid(row=0, column=1, pady=15, padx=(10, 0), sticky="ew")
+        
+        # Typy złota z indeksu - wpisywany tekst zawęża listę
+        self.gold_index = get_gold_type_index(self.db, self.main_app)
+        on_change = self.update_availability_info if self.transaction_type == "Sprzedaż" else None
+        bind_gold_type_filter(self.gold_combo, self.gold_index, on_change)
+        
+        # Ilość
+        ttk.Label(main_frame, text="Ilość:").grid(row=1, column=0, sticky=tk.W, pady=15)
+        self.quantity_entry = ttk.Entry(main_frame, width=55)
+        self.quantity_entry.grid(row=1, column=1, pady=15, padx=(10, 0), sticky="ew")
+        
+        # Cena za jednostkę
+        ttk.Label(main_frame, text="Cena za Jednostkę (zł):").grid(row=2, column=0, sticky=tk.W, pady=15)
+        self.price_entry = ttk.Entry(main_frame, width=55)
+        self.price_entry.grid(row=2, column=1, pady=15, padx=(10, 0), sticky="ew")
+        
+        # Data transakcji
+        ttk.Label(main_frame, text="Data Transakcji:").grid(row=3, column=0, sticky=tk.W, pady=15)
+        self.date_entry = ttk.Entry(main_frame, width=55)
+        self.date_entry.grid(row=3, column=1, pady=15, padx=(10, 0), sticky="ew")
+        self.date_entry.insert(0, datetime.now().strftime("%Y-%m-%d"))
+        
+        # Opis
+        ttk.Label(main_frame, text="Opis:").grid(row=4, column=0, sticky=tk.W, pady=15)
+        self.description_entry = ttk.Entry(main_frame, width=55)
+        self.description_entry.grid(row=4, column=1, pady=15, padx=(10, 0), sticky="ew")
+        
+        # Informacja o dostępności (tylko dla sprzedaży)
+        if self.transaction_type == "Sprzedaż":
+            self.info_label = ttk.Label(main_frame, text="", foreground="blue", font=("Arial", 11, "bold"))
+            self.info_label.grid(row=5, column=0, columnspan=2, pady=10)
+            self.gold_combo.bind('<<ComboboxSelected>>', self.update_availability_info)
+            
+            # Dodaj również aktualizację przy zmianie ilości
+            self.quantity_entry.bind('<KeyRelease>', self.update_availability_info)
+        
+        # Przyciski z większymi czcionkami
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=6, column=0, columnspan=2, pady=25)
+        
+        ttk.Button(button_frame, text=self.transaction_type.upper(), command=self.process_transaction, 
+                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="ANULUJ", command=self.dialog.destroy, 
+                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
+        
+        # Focus na pierwszym polu
+        self.gold_combo.focus()
+        
+        # Obsługa klawiszy
+        self.dialog.bind('<Return>', lambda event: self.process_transaction())
+        self.dialog.bind('<Escape>', lambda event: self.dialog.destroy())
+    
+    def update_availability_info(self, event=None):
+        """Aktualizuje informację o dostępności złota."""
+        if self.transaction_type == "Sprzedaż":
+            gold_id = self.gold_index.resolve(self.gold_combo.get())
+            if gold_id is not None:
+                available = self.db.get_gold_quantity(gold_id)
+                
+                # Sprawdź ile użytkownik chce sprzedać
+                try:
+                    quantity_str = self.quantity_entry.get().strip()
+                    if quantity_str:
+                        requested = parse_quantity(quantity_str)
+                        if requested > available:
+                            self.info_label.config(text=f"⚠️ Dostępne: {format_quantity(available)} - NIEWYSTARCZAJĄCE!", 
+                                                  foreground="red")
+                        else:
+                            remaining = available - requested
+                            self.info_label.config(text=f"✓ Dostępne: {format_quantity(available)} - Po sprzedaży zostanie: {format_quantity(remaining)}", 
+                                                  foreground="green")
+                    else:
+                        self.info_label.config(text=f"Dostępne w magazynie: {format_quantity(available)}", 
+                                              foreground="blue")
+                except ValueError:
+                    self.info_label.config(text=f"Dostępne w magazynie: {format_quantity(available)}", 
+                                          foreground="blue")
+    
+    def process_transaction(self):
+        """Przetwarza transakcję."""
+        try:
+            # Walidacja danych
+            gold_type = self.gold_combo.get()
+            if not gold_type:
+                messagebox.showerror("Błąd", "Wybierz typ złota!")
+                return
+            
+            gold_id = self.gold_index.resolve(gold_type)
+            if gold_id is None:
+                messagebox.showerror("Błąd", "Wybierz typ złota z listy!")
+                return
+            
+            quantity_str = self.quantity_entry.get().strip()
+            if not quantity_str:
+                messagebox.showerror("Błąd", "Wprowadź ilość!")
+                return
+            
+            quantity = parse_quantity(quantity_str)  # Ułamki jednostki - do tysięcznych
+            if quantity <= 0:
+                messagebox.showerror("Błąd", "Ilość musi być dodatnia!")
+                return
+            
+            price_str = self.price_entry.get().strip()
+            if not price_str:
+                messagebox.showerror("Błąd", "Wprowadź cenę!")
+                return
+            
+            price = parse_money(price_str)
+            if price <= 0:
+                messagebox.showerror("Błąd", "Cena musi być dodatnia!")
+                return
+            
+            date = self.date_entry.get().strip()
+            if not date:
+                messagebox.showerror("Błąd", "Wprowadź datę!")
+                return
+            
+            description = self.description_entry.get().strip()
+            
+            # Walidacja formatu daty
+            try:
+                datetime.strptime(date, "%Y-%m-%d")
+            except ValueError:
+                messagebox.showerror("Błąd", "Data musi być w formacie YYYY-MM-DD!")
+                return
+            
+            description = self.description_entry.get().strip()
+            
+            # Dodatkowa walidacja dla sprzedaży
+            if self.transaction_type == "Sprzedaż":
+                available = self.db.get_gold_quantity(gold_id)
+                if available < quantity:
+                    messagebox.showerror("Błąd", f"Niewystarczająca ilość w magazynie!\nDostępne: {format_quantity(available)}, "
+                                                 f"Wymagane: {format_quantity(quantity)}")
+                    return
+            
+            # Dodawanie transakcji
+            if self.db.add_transaction(gold_id, self.transaction_type, quantity, price, date, description):
+                total_value = line_value(quantity, price)
+                messagebox.showinfo("Sukces", 
+                    f"Transakcja {self.transaction_type.lower()} została zapisana!\n"
+                    f"Ilość: {format_quantity(quantity)} szt.\n"
+                    f"Cena jednostkowa: {format_money(price)} zł\n"
+                    f"Wartość całkowita: {format_money(total_value)} zł")
+                self.result = True
+                self.dialog.destroy()
+            else:
+                messagebox.showerror("Błąd", "Błąd podczas zapisywania transakcji!")
+        
+        except ValueError:
+            messagebox.showerror("Błąd", "Ilość i cena muszą być liczbami!")
+        except Exception as e:
+            messagebox.showerror("Błąd", f"Wystąpił błąd: {str(e)}")
+
+
+class SingleTransactionEditDialog:
+    """Dialog edycji pojedynczej transakcji."""
+    
+    def __init__(self, parent, db: GoldStorage, transaction_id: int, main_app=None):
+        self.db = db
+        self.transaction_id = transaction_id
+        self.result = False
+        self.main_app = main_app
+        
+        # Tworzenie okna
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Edytuj Transakcję")
+        self.dialog.geometry("750x600")
+        self.dialog.resizable(True, True)
+        
+        # Konfiguracja czcionek dla dialogu
+        self.dialog.option_add('*Font', 'Arial 11')
+        
+        # Centrowanie okna
+        self.dialog.transient(parent)
+        self.center_window()
+        
+        # Wczytaj dane transakcji
+        self.transaction_data = self.db.get_transaction_by_id(transaction_id)
+        if not self.transaction_data:
+            messagebox.showerror("Błąd", "Nie można wczytać danych transakcji!")
+            self.dialog.destroy()
+            return
+        
+        self.create_widgets()
+        self.load_transaction_data()
+        
+        # Grab set dopiero po pełnym utworzeniu okna
+        self.dialog.grab_set()
+    
+    def center_window(self):
+        """Centruje okno na ekranie."""
+        self.dialog.update_idletasks()
+        width = 950
+        height = 800
+        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
+        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
+        self.dialog.geometry(f"{width}x{height}+{x}+{y}")
+    
+    def create_widgets(self):
+        """Tworzy interfejs dialogu."""
+        main_frame = ttk.Frame(self.dialog, padding="25")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Konfiguracja siatki
+        main_frame.columnconfigure(1, weight=1)
+        
+        # Informacja o transakcji
+        _, _, category, gold_type, purity, trans_type, quantity, price, date, description = self.transaction_data
+        info_text = f"Edytuj transakcję: {trans_type} - {category} {gold_type} ({purity:.1f}%)"
+        ttk.Label(main_frame, text=info_text, font=("Arial", 12, "bold"), 
+                 foreground="blue").grid(row=0, column=0, columnspan=2, pady=(0, 20))
+        
+        # Typ złota
+        ttk.Label(main_frame, text="Typ Złota:", font=("Arial", 12)).grid(row=1, column=0, sticky=tk.W, pady=15)
+        self.gold_combo = ttk.Combobox(main_frame, width=45, font=("Arial", 11))
+        self.gold_combo.grid(row=1, column=1, pady=15, padx=(15, 0), sticky="ew")
+        
+        # Typy złota z indeksu - wpisywany tekst zawęża listę
+        self.gold_index = get_gold_type_index(self.db, self.main_app)
+        bind_gold_type_filter(self.gold_combo, self.gold_index, self.update_availability_info)
+        
+        # Typ transakcji (zmiana kupna na sprzedaż i odwrotnie poprawia stan magazynu)
+        ttk.Label(main_frame, text="Typ Transakcji:", font=("Arial", 12)).grid(row=2, column=0, sticky=tk.W, pady=15)
+        self.trans_type_combo = ttk.Combobox(main_frame, width=45, state="readonly", font=("Arial", 11))
+        self.trans_type_combo['values'] = ("Kupno", "Sprzedaż")
+        self.trans_type_combo.grid(row=2, column=1, pady=15, padx=(15, 0), sticky="ew")
+        
+        # Ilość
+        ttk.Label(main_frame, text="Ilość:", font=("Arial", 12)).grid(row=3, column=0, sticky=tk.W, pady=15)
+        self.quantity_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
+        self.quantity_entry.grid(row=3, column=1, pady=15, padx=(15, 0), sticky="ew")
+        
+        # Cena za jednostkę
+        ttk.Label(main_frame, text="Cena za Jednostkę (zł):", font=("Arial", 12)).grid(row=4, column=0, sticky=tk.W, pady=15)
+        self.price_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
+        self.price_entry.grid(row=4, column=1, pady=15, padx=(15, 0), sticky="ew")
+        
+        # Data transakcji
+        ttk.Label(main_frame, text="Data Transakcji:", font=("Arial", 12)).grid(row=5, column=0, sticky=tk.W, pady=15)
+        self.date_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
+        self.date_entry.grid(row=5, column=1, pady=15, padx=(15, 0), sticky="ew")
+        
+        # Opis
+        ttk.Label(main_frame, text="Opis:", font=("Arial", 12)).grid(row=6, column=0, sticky=tk.W, pady=15)
+        self.description_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
+        self.description_entry.grid(row=6, column=1, pady=15, padx=(15, 0), sticky="ew")
+        
+        # Informacja o dostępności (dla sprzedaży)
+        self.info_label = ttk.Label(main_frame, text="", font=("Arial", 11, "bold"))
+        self.info_label.grid(row=7, column=0, columnspan=2, pady=15)
+        
+        # Przyciski
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=8, column=0, columnspan=2, pady=25)
+        
+        ttk.Button(button_frame, text="ZAPISZ ZMIANY", command=self.save_changes, 
+                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="USUŃ", command=self.delete_transaction, 
+                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="ANULUJ", command=self.dialog.destroy, 
+                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
+        
+        # Obsługa klawiszy
+        self.dialog.bind('<Return>', lambda event: self.save_changes())
+        self.dialog.bind('<Escape>', lambda event: self.dialog.destroy())
+        
+        # Bind dla sprawdzania dostępności
+        self.trans_type_combo.bind('<<ComboboxSelected>>', self.update_availability_info)
+        self.quantity_entry.bind('<KeyRelease>', self.update_availability_info)
+        self.gold_combo.bind('<<ComboboxSelected>>', self.update_availability_info)
+    
+    def load_transaction_data(self):
+        """Wczytuje dane transakcji do formularza."""
+        _, gold_type_id, category, gold_type, purity, trans_type, quantity, price, date, description = self.transaction_data
+        
+        # Ustaw typ złota
+        self.gold_combo.set(gold_type_display_name(category, gold_type, purity))
+        
+        # Ustaw typ transakcji
+        self.trans_type_combo.set(trans_type)
+        
+        # Ustaw pozostałe pola
+        self.quantity_entry.insert(0, format_quantity(quantity))
+        self.price_entry.insert(0, format_money(price))
+        self.date_entry.insert(0, date)
+        self.description_entry.insert(0, description or "")
+        
+        # Aktualizuj informację o dostępności
+        self.update_availability_info()
+    
+    def update_availability_info(self, event=None):
+        """Aktualizuje informację o dostępności złota."""
+        trans_type = self.trans_type_combo.get()
+        gold_id = self.gold_index.resolve(self.gold_combo.get())
+        
+        if trans_type == "Sprzedaż" and gold_id is not None:
+            available = self.db.get_gold_quantity(gold_id)
+            # Stan bez edytowanej transakcji - zapis zastępuje jej starą wersję
+            _, old_gold_id, _, _, _, old_type, old_quantity, _, _, _ = self.transaction_data
+            if old_gold_id == gold_id:
+                available += -old_quantity if old_type == "Kupno" else old_quantity
+            
+            # Sprawdź ile użytkownik chce sprzedać
+            try:
+                quantity_str = self.quantity_entry.get().strip()
+                if quantity_str:
+                    requested = parse_quantity(quantity_str)
+                    if requested > available:
+                        self.info_label.config(text=f"⚠️ Dostępne: {format_quantity(available)} - NIEWYSTARCZAJĄCE!", 
+                                              foreground="red")
+                    else:
+                        remaining = available - requested
+                        self.info_label.config(text=f"✓ Dostępne: {format_quantity(available)} - Po sprzedaży zostanie: {format_quantity(remaining)}", 
+                                              foreground="green")
+                else:
+                    self.info_label.config(text=f"Dostępne w magazynie: {format_quantity(available)}", 
+                                          foreground="blue")
+            except ValueError:
+                self.info_label.config(text=f"Dostępne w magazynie: {format_quantity(available)}", 
+                                      foreground="blue")
+        else:
+            self.info_label.config(text="", foreground="black")
+    
+    def save_changes(self):
+        """Zapisuje zmiany w transakcji."""
+        try:
+            # Walidacja danych
+            gold_type = self.gold_combo.get()
+            if not gold_type:
+                messagebox.showerror("Błąd", "Wybierz typ złota!")
+                return
+            
+            gold_id = self.gold_index.resolve(gold_type)
+            if gold_id is None:
+                messagebox.showerror("Błąd", "Wybierz typ złota z listy!")
+                return
+            
+            trans_type = self.trans_type_combo.get()
+            if not trans_type:
+                messagebox.showerror("Błąd", "Wybierz typ transakcji!")
+                return
+            
+            quantity = parse_quantity(self.quantity_entry.get())
+            if quantity <= 0:
+                messagebox.showerror("Błąd", "Ilość musi być dodatnia!")
+                return
+            
+            price = parse_money(self.price_entry.get())
+            if price <= 0:
+                messagebox.showerror("Błąd", "Cena musi być dodatnia!")
+                return
+            
+            date = self.date_entry.get().strip()
+            if not date:
+                messagebox.showerror("Błąd", "Wprowadź datę!")
+                return
+            
+            # Walidacja formatu daty - pole ma datę z godziną transakcji, można też wpisać samą datę
+            try:
+                datetime.strptime(date, "%Y-%m-%d" if len(date) == 10 else "%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                messagebox.showerror("Błąd", "Data musi być w formacie YYYY-MM-DD lub YYYY-MM-DD HH:MM:SS!")
+                return
+            
+            description = self.description_entry.get().strip()
+            
+            # Aktualizuj transakcję
+            if self.db.update_transaction(self.transaction_id, gold_id, trans_type, quantity, price, date, description):
+                messagebox.showinfo("Sukces", "Transakcja została zaktualizowana!")
+                self.result = True
+                self.dialog.destroy()
+            else:
+                messagebox.showerror("Błąd", "Nie można zaktualizować transakcji!\nSprawdź czy masz wystarczającą ilość w magazynie.")
+        
+        except ValueError:
+            messagebox.showerror("Błąd", "Ilość i cena muszą być liczbami!")
+        except Exception as e:
+            messagebox.showerror("Błąd", f"Wystąpił błąd: {str(e)}")
+    
+    def delete_transaction(self):
+        """Usuwa transakcję."""
+        if messagebox.askyesno("Potwierdzenie", 
+                              "Czy na pewno chcesz usunąć tę transakcję?\nTa operacja jest nieodwracalna!"):
+            if self.db.delete_transaction(self.transaction_id):
+                messagebox.showinfo("Sukces", "Transakcja została usunięta!")
+                self.result = True
+                self.dialog.destroy()
+            else:
+                messagebox.showerror("Błąd", "Nie można usunąć transakcji!")
+
+
+class DiagnosticsWindow:
+    """Okno diagnostyczne ze statystykami wywołań bazy danych (QueryProfiler)."""
+    
+    def __init__(self, parent, profiler, db=None):
+        self.profiler = profiler
+        self.db = db
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Diagnostyka Bazy Danych")
+        self.dialog.geometry("1300x600")
+        self.dialog.transient(parent)
+        
+        self.create_widgets()
+        self.load_stats()
+    
+    def create_widgets(self):
+        """Tworzy interfejs okna diagnostyki."""
+        main_frame = ttk.Frame(self.dialog, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        
+        header_frame = ttk.Frame(main_frame)
+        header_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
+        ttk.Label(header_frame, text=f"Próg wolnych zapytań: {self.profiler.slow_query_seconds * 1000:.0f} ms",
+                  font=("Arial", 11, "bold")).pack(side=tk.LEFT)
+        self.cache_label = ttk.Label(header_frame, text="")
+        self.cache_label.pack(side=tk.RIGHT)
+        
+        table_frame = ttk.Frame(main_frame)
+        table_frame.grid(row=1, column=0, sticky="nsew")
+        table_frame.columnconfigure(0, weight=1)
+        table_frame.rowconfigure(0, weight=1)
+        
+        columns = ("method", "calls", "total", "avg", "max", "rows", "sql")
+        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings")
+        self.tree.heading("method", text="Metoda")
+        self.tree.heading("calls", text="Wywołania")
+        self.tree.heading("total", text="Łącznie (ms)")
+        self.tree.heading("avg", text="Średnio (ms)")
+        self.tree.heading("max", text="Maks. (ms)")
+        self.tree.heading("rows", text="Wiersze")
+        self.tree.heading("sql", text="Ostatnie SQL")
+        
+        for col in columns:
+            self.tree.column(col, anchor="center", width=110)
+        self.tree.column("method", width=260, anchor="w")
+        self.tree.column("sql", width=500, anchor="w")
+        
+        v_scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=v_scrollbar.set)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        v_scrollbar.grid(row=0, column=1, sticky="ns")
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=2, column=0, pady=(10, 0))
+        ttk.Button(button_frame, text="Odśwież", command=self.load_stats).pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="Wyzeruj", command=self.reset_stats).pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="Zapisz JSON", command=self.save_json).pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="Zamknij", command=self.dialog.destroy).pack(side=tk.LEFT, padx=10)
+    
+    def load_stats(self):
+        """Wypełnia tabelę metodami o największym łącznym czasie."""
+        for item in self.tree.get_children():
+            self.tree.delete(item)
+        
+        for stats in self.profiler.top(limit=50):
+            self.tree.insert("", "end", values=(
+                stats.name,
+                stats.calls,
+                f"{stats.total_time * 1000:.1f}",
+                f"{stats.avg_time * 1000:.2f}",
+                f"{stats.max_time * 1000:.1f}",
+                stats.rows,
+                " | ".join(stats.last_sql)
+            ))
+        
+        if self.db is not None and hasattr(self.db, "statement_cache_stats"):
+            cache = self.db.statement_cache_stats()
+            self.cache_label.config(text=f"Pamięć zapytań: {cache['hits']} trafień, {cache['misses']} chybień "
+                                         f"({cache['hit_rate'] * 100:.1f}%)")
+    
+    def reset_stats(self):
+        """Zeruje statystyki profilera."""
+        self.profiler.reset()
+        self.load_stats()
+    
+    def save_json(self):
+        """Zapisuje statystyki do wybranego pliku JSON."""
+        from tkinter import filedialog
+        path = filedialog.asksaveasfilename(parent=self.dialog, defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")], initialfile="query_stats.json")
+        if path:
+            self.profiler.dump_json(path)
+            messagebox.showinfo("Sukces", f"Statystyki zapisano w pliku:\n{path}", parent=self.dialog)
+
+
+class BackupWindow:
+    """Okno kopii zapasowych: wykonanie kopii w tle z paskiem postępu, lista kopii i przywracanie."""
+    
+    def __init__(self, parent, db_path: str, main_app, config=None):
+        self.db_path = db_path
+        self.main_app = main_app
+        self.backup_dir = config.get("backup", "dir") if config is not None else "backups"
+        self.keep = config.getint("backup", "keep") if config is not None else 7
+        self.pages = config.getint("backup", "pages_per_step") if config is not None else 1024
+        # Stan zadania w tle - wątek tylko go zapisuje, okno odczytuje w _poll (Tk nie jest wielowątkowy)
+        self._job = {"running": False, "done": 0, "total": 0, "result": None, "on_finish": None}
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Kopia zapasowa")
+        self.dialog.geometry("750x420")
+        self.dialog.transient(parent)
+        
+        self.create_widgets()
+        self.load_backups()
+    
+    def create_widgets(self):
+        """Tworzy interfejs okna kopii zapasowych."""
+        main_frame = ttk.Frame(self.dialog, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        
+        ttk.Label(main_frame, text=f"Katalog kopii: {self.backup_dir} (przechowywane: {self.keep})",
+                  font=("Arial", 11, "bold")).grid(row=0, column=0, sticky="w", pady=(0, 10))
+        
+        columns = ("created", "size", "path")
+        self.tree = ttk.Treeview(main_frame, columns=columns, show="headings", selectmode="browse")
+        self.tree.heading("created", text="Data kopii")
+        self.tree.heading("size", text="Rozmiar (MB)")
+        self.tree.heading("path", text="Plik")
+        self.tree.column("created", width=160, anchor="center")
+        self.tree.column("size", width=110, anchor="e")
+        self.tree.column("path", width=420, anchor="w")
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        
+        self.progress = ttk.Progressbar(main_frame, mode="determinate")
+        self.progress.grid(row=2, column=0, sticky="ew", pady=(10, 0))
+        self.status_label = ttk.Label(main_frame, text="")
+        self.status_label.grid(row=3, column=0, sticky="w")
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=4, column=0, pady=(10, 0))
+        self.backup_button = ttk.Button(button_frame, text="Wykonaj kopię", command=self.start_backup)
+        self.backup_button.pack(side=tk.LEFT, padx=10)
+        self.restore_button = ttk.Button(button_frame, text="Przywróć zaznaczoną", command=self.restore_selected)
+        self.restore_button.pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="Zamknij", command=self.dialog.destroy).pack(side=tk.LEFT, padx=10)
+    
+    def load_backups(self):
+        """Wypełnia listę istniejących kopii (od najnowszej)."""
+        import vault_backup
+        self.tree.delete(*self.tree.get_children())
+        for path, size, created in vault_backup.list_backups(self.db_path, self.backup_dir):
+            self.tree.insert("", "end", iid=path, values=(created, f"{size / 1024 / 1024:.1f}", path))
+    
+    def _run(self, description: str, job):
+        """Uruchamia operację na kopii w wątku i śledzi jej postęp."""
+        self._job.update(running=True, done=0, total=0, result=None)
+        self.backup_button.config(state="disabled")
+        self.restore_button.config(state="disabled")
+        self.status_label.config(text=description)
+        
+        def progress(done: int, total: int):
+            self._job["done"] = done
+            self._job["total"] = total
+        
+        def worker():
+            try:
+                self._job["result"] = job(progress)
+            finally:
+                self._job["running"] = False
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.dialog.after(100, self._poll)
+    
+    def _poll(self):
+        """Aktualizuje pasek postępu; po zakończeniu operacji pokazuje wynik."""
+        if not self.dialog.winfo_exists():
+            return
+        if self._job["total"]:
+            self.progress.config(maximum=self._job["total"], value=self._job["done"])
+        if self._job["running"]:
+            if self._job["total"] and self._job["done"] >= self._job["total"]:
+                self.status_label.config(text="Weryfikacja kopii (integrity_check, stany magazynu)...")
+            self.dialog.after(100, self._poll)
+            return
+        
+        self.backup_button.config(state="normal")
+        self.restore_button.config(state="normal")
+        on_finish = self._job["on_finish"]
+        on_finish(self._job["result"])
+    
+    def start_backup(self):
+        """Wykonuje sprawdzoną kopię zapasową w tle."""
+        import vault_backup
+        
+        def finished(path):
+            if path:
+                self.status_label.config(text=f"Kopia zapisana: {path}")
+                self.load_backups()
+            else:
+                self.status_label.config(text="Kopia nie powiodła się (szczegóły w konsoli).")
+                messagebox.showerror("Błąd", "Nie udało się wykonać lub zweryfikować kopii zapasowej.",
+                                     parent=self.dialog)
+        
+        self._job["on_finish"] = finished
+        self._run("Kopiowanie bazy...", lambda progress: vault_backup.backup_database(
+            self.db_path, self.backup_dir, self.keep, self.pages, progress))
+    
+    def restore_selected(self):
+        """Przywraca bazę z zaznaczonej kopii (po potwierdzeniu) i odświeża główne okno."""
+        import vault_backup
+        selection = self.tree.selection()
+        if not selection:
+            messagebox.showwarning("Uwaga", "Zaznacz kopię do przywrócenia.", parent=self.dialog)
+            return
+        backup_path = selection[0]
+        if not messagebox.askyesno("Potwierdzenie", f"Przywrócić bazę z kopii\n{backup_path}?\n\n"
+                                   "Zmiany wprowadzone po wykonaniu kopii zostaną utracone.", parent=self.dialog):
+            return
+        
+        def finished(ok):
+            if ok:
+                self.status_label.config(text=f"Przywrócono bazę z {backup_path}")
+                # Cała baza została podmieniona - wszystkie otwarte okna wczytują dane od nowa
+                self.main_app.db.changes.publish([ChangeEvent(INVENTORY, RELOAD), ChangeEvent(TRANSACTION, RELOAD)])
+            else:
+                self.status_label.config(text="Przywracanie nie powiodło się (szczegóły w konsoli).")
+                messagebox.showerror("Błąd", "Nie udało się przywrócić bazy z kopii.", parent=self.dialog)
+        
+        self._job["on_finish"] = finished
+        self._run("Przywracanie bazy...", lambda progress: vault_backup.restore_backup(
+            backup_path, self.db_path, self.pages, progress))
+
+
+class DashboardWindow:
+    """Panel statystyk: kupno i sprzedaż w miesiącach, średnia cena za gram i stan magazynu według kategorii."""
+    
+    # Liczba ostatnich miesięcy na wykresach
+    MONTHS = 24
+    BUY_COLOR = "#d4a017"
+    SELL_COLOR = "#4a7ab5"
+    
+    def __init__(self, parent, db: GoldStorage):
+        self.db = db
+        self.stats = None
+        # Stan zadania w tle - wątek tylko go zapisuje, okno odczytuje w _poll (Tk nie jest wielowątkowy)
+        self._job = {"running": False, "result": None, "stale": False}
+        
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Statystyki")
+        self.dialog.geometry("1200x750")
+        self.dialog.transient(parent)
+        
+        self.create_widgets()
+        self.load_stats()
+        self.db.changes.subscribe(self.on_storage_changes)
+        self.dialog.bind("<Destroy>", self._on_destroy, add="+")
+    
+    def _on_destroy(self, event):
+        """Kończy subskrypcję zmian po zamknięciu okna."""
+        if event.widget is self.dialog:
+            self.db.changes.unsubscribe(self.on_storage_changes)
+    
+    def on_storage_changes(self, events: list):
+        """Po zapisie transakcji lub zmianie stanu wczytuje statystyki ponownie (w tle)."""
+        self.load_stats()
+    
+    def create_widgets(self):
+        """Tworzy interfejs panelu statystyk."""
+        main_frame = ttk.Frame(self.dialog, padding="15")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(0, weight=1)
+        
+        self.canvas = tk.Canvas(main_frame, background="white", highlightthickness=0)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.canvas.bind("<Configure>", lambda event: self.draw())
+        
+        self.status_label = ttk.Label(main_frame, text="")
+        self.status_label.grid(row=1, column=0, sticky="w", pady=(10, 0))
+        
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=2, column=0, pady=(10, 0))
+        self.refresh_button = ttk.Button(button_frame, text="Odśwież", command=self.load_stats)
+        self.refresh_button.pack(side=tk.LEFT, padx=10)
+        ttk.Button(button_frame, text="Zamknij", command=self.dialog.destroy).pack(side=tk.LEFT, padx=10)
+    
+    def load_stats(self):
+        """Oblicza statystyki w wątku w tle; okno pozostaje responsywne."""
+        from vault_stats import load_dashboard_stats
+        if self._job["running"]:
+            # Zmiana w trakcie obliczeń - po ich zakończeniu statystyki zostaną wczytane jeszcze raz
+            self._job["stale"] = True
+            return
+        self._job.update(running=True, result=None, stale=False)
+        self.refresh_button.config(state="disabled")
+        self.status_label.config(text="Wczytywanie statystyk...")
+        started = datetime.now()
+        
+        def worker():
+            try:
+                self._job["result"] = load_dashboard_stats(self.db)
+            except Exception as e:
+                print(f"Błąd podczas wczytywania statystyk: {e}")
+            finally:
+                self._job["running"] = False
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.dialog.after(20, self._poll, started)
+    
+    def _poll(self, started: datetime):
+        """Po zakończeniu obliczeń rysuje wykresy."""
+        if not self.dialog.winfo_exists():
+            return
+        if self._job["running"]:
+            self.dialog.after(20, self._poll, started)
+            return
+        
+        self.refresh_button.config(state="normal")
+        if self._job["stale"]:
+            self.load_stats()
+            return
+        if self._job["result"] is None:
+            self.status_label.config(text="Nie udało się wczytać statystyk (szczegóły w konsoli).")
+            return
+        self.stats = self._job["result"].last_months(self.MONTHS)
+        self.draw()
+        elapsed = (datetime.now() - started).total_seconds() * 1000
+        self.status_label.config(text=f"Ostatnie {len(self.stats.months)} mies. | "
+                                      f"wczytano w {elapsed:.0f} ms, {datetime.now():%H:%M:%S}")
+    
+    def draw(self):
+        """Rysuje cztery wykresy w siatce 2x2 na całej powierzchni płótna."""
+        self.canvas.delete("all")
+        if self.stats is None:
+            return
+        width = self.canvas.winfo_width()
+        height = self.canvas.winfo_height()
+        half_w, half_h = width / 2, height / 2
+        stats = self.stats
+        
+        self._draw_bars((0, 0, half_w, half_h), "Waga kupna i sprzedaży (g)", stats.months,
+                        stats.bought_weight, stats.sold_weight)
+        self._draw_bars((half_w, 0, width, half_h), "Wartość kupna i sprzedaży (zł)", stats.months,
+                        stats.bought_value, stats.sold_value)
+        self._draw_line((0, half_h, half_w, height), "Średnia cena kupna (zł/g)", stats.months,
+                        stats.buy_price_per_gram)
+        self._draw_stock((half_w, half_h, width, height), "Stan magazynu według kategorii (g)", stats.stock)
+    
+    def _plot_area(self, box, title: str, top: float):
+        """Rysuje tytuł i osie panelu; zwraca obszar wykresu (x0, y0, x1, y1) i wartość górnej osi."""
+        x0, y0, x1, y1 = box
+        self.canvas.create_text((x0 + x1) / 2, y0 + 12, text=title, font=("Arial", 11, "bold"))
+        area = (x0 + 70, y0 + 35, x1 - 20, y1 - 40)
+        self.canvas.create_line(area[0], area[1], area[0], area[3], area[2], area[3])
+        self.canvas.create_text(area[0] - 5, area[1], text=f"{top:,.0f}".replace(",", " "), anchor="e",
+                                font=("Arial", 8))
+        self.canvas.create_text(area[0] - 5, area[3], text="0", anchor="e", font=("Arial", 8))
+        return area
+    
+    def _month_labels(self, area, months: list):
+        """Podpisy miesięcy pod osią (co któryś, żeby się nie nakładały)."""
+        x0, _, x1, y1 = area
+        if not months:
+            return
+        step = max(1, len(months) // 8)
+        slot = (x1 - x0) / len(months)
+        for index in range(0, len(months), step):
+            self.canvas.create_text(x0 + slot * (index + 0.5), y1 + 12, text=months[index], font=("Arial", 8))
+    
+    def _draw_bars(self, box, title: str, months: list, bought: list, sold: list):
+        """Słupki kupna i sprzedaży obok siebie dla każdego miesiąca."""
+        top = max(bought + sold, default=0) or 1
+        x0, y0, x1, y1 = area = self._plot_area(box, title, top)
+        self._month_labels(area, months)
+        if not months:
+            return
+        slot = (x1 - x0) / len(months)
+        bar = slot * 0.4
+        for index, (buy, sell) in enumerate(zip(bought, sold)):
+            left = x0 + slot * index + slot * 0.1
+            self.canvas.create_rectangle(left, y1 - (y1 - y0) * buy / top, left + bar, y1,
+                                         fill=self.BUY_COLOR, outline="")
+            self.canvas.create_rectangle(left + bar, y1 - (y1 - y0) * sell / top, left + 2 * bar, y1,
+                                         fill=self.SELL_COLOR, outline="")
+        self.canvas.create_text(x1, y0 - 8, text="■ Kupno", fill=self.BUY_COLOR, anchor="e", font=("Arial", 9))
+        self.canvas.create_text(x1 - 70, y0 - 8, text="■ Sprzedaż", fill=self.SELL_COLOR, anchor="e",
+                                font=("Arial", 9))
+    
+    def _draw_line(self, box, title: str, months: list, values: list):
+        """Linia średniej ceny za gram; miesiące bez kupna przerywają linię."""
+        known = [value for value in values if value is not None]
+        top = max(known, default=0) * 1.1 or 1
+        x0, y0, x1, y1 = area = self._plot_area(box, title, top)
+        self._month_labels(area, months)
+        if not months:
+            return
+        slot = (x1 - x0) / len(months)
+        segment = []
+        for index, value in enumerate(values + [None]):
+            if value is None:
+                if len(segment) >= 4:
+                    self.canvas.create_line(*segment, fill=self.BUY_COLOR, width=2)
+                elif segment:
+                    self.canvas.create_oval(segment[0] - 2, segment[1] - 2, segment[0] + 2, segment[1] + 2,
+                                            fill=self.BUY_COLOR, outline="")
+                segment = []
+                continue
+            segment += [x0 + slot * (index + 0.5), y1 - (y1 - y0) * value / top]
+        if known:
+            self.canvas.create_text(x1, y0 - 8, text=f"ostatnio: {known[-1]:.2f} zł/g", anchor="e",
+                                    font=("Arial", 9))
+    
+    def _draw_stock(self, box, title: str, stock: list):
+        """Poziome słupki wagi w kategoriach (jaśniejszy - waga czystego złota)."""
+        x0, y0, x1, y1 = box
+        self.canvas.create_text((x0 + x1) / 2, y0 + 12, text=title, font=("Arial", 11, "bold"))
+        if not stock:
+            return
+        top = max(weight for _, weight, _ in stock) or 1
+        left, right = x0 + 140, x1 - 90
+        row = (y1 - y0 - 50) / len(stock)
+        for index, (category, weight, fine) in enumerate(stock):
+            y = y0 + 35 + row * index
+            bar = min(row * 0.7, 24)
+            self.canvas.create_text(left - 8, y + bar / 2, text=category, anchor="e", font=("Arial", 9))
+            self.canvas.create_rectangle(left, y, left + (right - left) * max(weight, 0) / top, y + bar,
+                                         fill=self.BUY_COLOR, outline="")
+            self.canvas.create_rectangle(left, y + bar * 0.3, left + (right - left) * max(fine, 0) / top,
+                                         y + bar * 0.7, fill="#f3dc8a", outline="")
+            self.canvas.create_text(right + 5, y + bar / 2, text=f"{weight:.1f} g", anchor="w", font=("Arial", 9))
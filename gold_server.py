@@ -0,0 +1,481 @@
+"""
+Lokalna usługa HTTP/JSON Magazynu Złota.
+
+Jeden proces obsługuje bazę dla wielu stanowisk zamiast współdzielenia pliku
+gold_vault.db przez dysk sieciowy. Wszystkie zapisy trafiają do kolejki
+obsługiwanej przez pojedyncze zadanie (jeden wątek zapisu), a zapytania są
+wykonywane równolegle w puli wątków odczytu.
+
+    python -m gold_server --db gold_vault.db --port 8765
+
+Kwoty, wagi i ilości w JSON są liczbami całkowitymi jak w bazie: grosze, miligramy
+i tysięczne części jednostki (patrz units); czystość - procent.
+
+Endpointy:
+    GET    /inventory?sort=category&limit=
+    GET    /inventory?ids=1,2,3             (pozycje wskazanych typów złota, z polem id)
+    GET    /gold-types
+    POST   /gold-types                      {category, type, unit_weight, purity, unit, notes}
+    GET    /gold-types/<id>/quantity
+    GET    /categories
+    GET    /transactions?page=1&page_size=100&offset=&sort=date&date_from=&date_to=&category=&trans_type=&search=
+    GET    /transactions/<id>
+    POST   /transactions                    {gold_type_id, transaction_type, quantity, price_per_unit,
+                                             transaction_date, description}
+    PUT    /transactions/<id>               {gold_type_id, transaction_type, quantity, price_per_unit,
+                                             transaction_date, description}
+    DELETE /transactions/<id>
+    POST   /transactions/batch-delete       {ids}
+    POST   /transactions/batch-update       {ids, transaction_date, description, price_per_unit} (pola opcjonalne)
+    GET    /ledger?sort=date&date_from=&date_to=&limit=&offset=   (lista transakcji głównego okna)
+    GET    /ledger?ids=1,2,3                (wskazane transakcje, wszystkie pola)
+    GET    /valuation?gold_price=<grosze za gram czystego złota>
+    GET    /monthly                         (podsumowania miesięczne transakcji)
+    GET    /audit?entity=&entity_id=&period=&limit=100   (dziennik zmian, od najnowszych)
+    GET    /changes?after=<id wpisu dziennika>         (zdarzenia zmian od wskazanego wpisu, last_id)
+    POST   /changes/revert                  {audit_ids} (cofnięcie zapisu; zapisy transakcji zwracają audit_ids)
+    GET    /archives                        (archiwa roczne)
+    POST   /archives                        {year}
+    GET    /verify
+"""
+import argparse
+import asyncio
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from database import (GoldDatabase, ARCHIVE_COLUMNS, AUDIT_COLUMNS, BALANCE_MISMATCH_COLUMNS, GOLD_TYPE_COLUMNS, HISTORY_COLUMNS,
+                      INVENTORY_COLUMNS, LEDGER_COLUMNS, MONTHLY_COLUMNS, TRANSACTION_DETAIL_COLUMNS, VALUATION_COLUMNS,
+                      transaction_input_error)
+from records import Record, TransactionRow
+from units import MILLIGRAMS
+
+MAX_PAGE_SIZE = 1000
+MAX_BODY_SIZE = 1024 * 1024
+
+HTTP_REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+                405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large",
+                500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    """Błąd zwracany klientowi jako odpowiedź HTTP z kodem i komunikatem."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _rows_to_dicts(columns: Tuple[str, ...], rows) -> list:
+    """Zamienia krotki i rekordy z GoldDatabase na słowniki dla JSON."""
+    return [row.as_dict(columns) if isinstance(row, Record) else dict(zip(columns, row)) for row in rows]
+
+
+class GoldVaultServer:
+    """Serwer HTTP z jednym zadaniem zapisującym i pulą wątków odczytu."""
+
+    def __init__(self, db: GoldDatabase, host: str = "127.0.0.1", port: int = 8765, readers: int = 4):
+        self.db = db
+        self.host = host
+        self.port = port
+        self._reader_pool = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="gold-reader")
+        self._writer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gold-writer")
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    # --- Odczyt i zapis ---
+
+    async def read(self, func: Callable, *args) -> Any:
+        """Wykonuje zapytanie w puli wątków odczytu."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader_pool, partial(func, *args))
+
+    async def write(self, func: Callable, *args) -> Any:
+        """Kolejkuje operację zapisu i czeka na jej wynik."""
+        result, _ = await self.write_logged(func, *args)
+        return result
+
+    async def write_logged(self, func: Callable, *args) -> Tuple[Any, Tuple[int, ...]]:
+        """Jak write, ale zwraca też wpisy dziennika zapisu - klient może go później cofnąć (POST /changes/revert)."""
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((partial(self._logged_write, func, *args), future))
+        return await future
+
+    def _logged_write(self, func: Callable, *args) -> Tuple[Any, Tuple[int, ...]]:
+        """Wykonuje zapis w wątku zapisu i pobiera jego wpisy dziennika (take_last_write działa w obrębie wątku)."""
+        self.db.take_last_write()
+        result = func(*args)
+        return result, self.db.take_last_write()
+
+    async def _writer(self):
+        """Jedyne zadanie wykonujące zapisy - kolejno, w dedykowanym wątku."""
+        loop = asyncio.get_running_loop()
+        while True:
+            job, future = await self._write_queue.get()
+            try:
+                result = await loop.run_in_executor(self._writer_pool, job)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self._write_queue.task_done()
+
+    # --- Cykl życia ---
+
+    async def start(self):
+        """Uruchamia nasłuchiwanie i zadanie zapisujące."""
+        self._write_queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer())
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        sockets = self._server.sockets or []
+        if sockets:
+            self.port = sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Uruchamia serwer i obsługuje żądania do czasu przerwania."""
+        await self.start()
+        print(f"Magazyn Złota - serwer nasłuchuje na http://{self.host}:{self.port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        """Zamyka serwer, czekając na dokończenie zakolejkowanych zapisów."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._write_queue:
+            await self._write_queue.join()
+        if self._writer_task:
+            self._writer_task.cancel()
+        self._reader_pool.shutdown(wait=True)
+        self._writer_pool.shutdown(wait=True)
+
+    # --- Protokół HTTP ---
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Obsługuje połączenie (z podtrzymaniem keep-alive)."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._send(writer, 400, {"error": "Niepoprawne żądanie"}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close")
+                status, payload = await self._dispatch(method, target, headers, reader)
+                await self._send(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, target: str, headers: Dict[str, str],
+                        reader: asyncio.StreamReader) -> Tuple[int, Any]:
+        """Odczytuje treść żądania i wywołuje odpowiedni handler."""
+        try:
+            length = int(headers.get("content-length", 0) or 0)
+            if length > MAX_BODY_SIZE:
+                raise HttpError(413, "Zbyt duża treść żądania")
+            body = None
+            if length:
+                raw = await reader.readexactly(length)
+                try:
+                    body = json.loads(raw.decode("utf-8"))
+                except ValueError:
+                    raise HttpError(400, "Treść żądania musi być poprawnym JSON")
+
+            url = urlsplit(target)
+            parts = [part for part in url.path.split("/") if part]
+            query = dict(parse_qsl(url.query))
+            return await self._route(method, parts, query, body)
+        except HttpError as e:
+            return e.status, {"error": e.message}
+        except (TypeError, ValueError) as e:
+            return 400, {"error": f"Niepoprawne dane: {e}"}
+        except Exception as e:
+            return 500, {"error": str(e)}
+
+    async def _send(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool):
+        """Wysyła odpowiedź JSON."""
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+
+    # --- Routing ---
+
+    async def _route(self, method: str, parts: list, query: dict, body: Any) -> Tuple[int, Any]:
+        """Mapuje ścieżkę i metodę HTTP na operację GoldDatabase."""
+        db = self.db
+        resource = parts[0] if parts else ""
+
+        if resource == "inventory" and len(parts) == 1 and method == "GET" and query.get("ids"):
+            items = await self.read(db.get_inventory_by_ids, self._parse_ids(query["ids"]))
+            return 200, [dict(item.as_dict(INVENTORY_COLUMNS), id=gold_type_id) for gold_type_id, item in items.items()]
+
+        if resource == "inventory" and len(parts) == 1 and method == "GET":
+            try:
+                limit = max(0, int(query["limit"])) if query.get("limit") else None
+            except ValueError:
+                raise HttpError(400, "limit musi być liczbą")
+            rows = await self.read(db.get_inventory, query.get("sort", "category"), limit)
+            return 200, _rows_to_dicts(INVENTORY_COLUMNS, rows)
+
+        if resource == "categories" and len(parts) == 1 and method == "GET":
+            return 200, await self.read(db.get_gold_categories)
+
+        if resource == "gold-types":
+            if len(parts) == 1 and method == "GET":
+                return 200, _rows_to_dicts(GOLD_TYPE_COLUMNS, await self.read(db.get_gold_types))
+            if len(parts) == 1 and method == "POST":
+                data = self._require_fields(body, ("category", "type", "unit_weight", "purity"))
+                ok = await self.write(db.add_gold_type, data["category"], data["type"],
+                                      self._parse_amount(data["unit_weight"], "unit_weight"), float(data["purity"]),
+                                      data.get("unit", "szt"), data.get("notes", ""))
+                if not ok:
+                    raise HttpError(409, "Typ złota o tej kombinacji (kategoria, typ, czystość) już istnieje")
+                return 201, {"ok": True}
+            if len(parts) == 3 and parts[2] == "quantity" and method == "GET":
+                gold_id = self._parse_id(parts[1])
+                return 200, {"id": gold_id, "quantity": await self.read(db.get_gold_quantity, gold_id)}
+
+        if resource == "transactions":
+            if len(parts) == 1 and method == "GET":
+                return 200, await self._transactions_page(query)
+            if len(parts) == 1 and method == "POST":
+                data = self._require_fields(body, ("gold_type_id", "transaction_type", "quantity",
+                                                   "price_per_unit", "transaction_date"))
+                fields = self._transaction_fields(data)
+                ok, audit_ids = await self.write_logged(
+                    db.add_transaction, int(data["gold_type_id"]), *fields, data.get("description", ""))
+                if not ok:
+                    raise HttpError(409, "Nie można zapisać transakcji (sprawdź stan magazynu)")
+                return 201, {"ok": True, "audit_ids": audit_ids}
+            if len(parts) == 2 and parts[1] == "batch-delete" and method == "POST":
+                ids = [int(value) for value in self._require_fields(body, ("ids",))["ids"]]
+                ok, audit_ids = await self.write_logged(db.delete_transactions, ids)
+                if not ok:
+                    raise HttpError(409, "Nie można usunąć transakcji (brak transakcji lub ujemny stan magazynu)")
+                return 200, {"ok": True, "deleted": len(ids), "audit_ids": audit_ids}
+            if len(parts) == 2 and parts[1] == "batch-update" and method == "POST":
+                data = self._require_fields(body, ("ids",))
+                ids = [int(value) for value in data["ids"]]
+                price = data.get("price_per_unit")
+                price = self._parse_amount(price, "price_per_unit") if price is not None else None
+                error = transaction_input_error(price_per_unit=price, transaction_date=data.get("transaction_date"))
+                if error:
+                    raise HttpError(400, error)
+                ok, audit_ids = await self.write_logged(db.update_transactions, ids, data.get("transaction_date"),
+                                                        data.get("description"), price)
+                if not ok:
+                    raise HttpError(409, "Nie można zaktualizować transakcji")
+                return 200, {"ok": True, "updated": len(ids), "audit_ids": audit_ids}
+            if len(parts) == 2:
+                transaction_id = self._parse_id(parts[1])
+                if method == "GET":
+                    row = await self.read(db.get_transaction_by_id, transaction_id)
+                    if not row:
+                        raise HttpError(404, "Nie znaleziono transakcji")
+                    return 200, dict(zip(TRANSACTION_DETAIL_COLUMNS, row))
+                if method == "PUT":
+                    data = self._require_fields(body, ("gold_type_id", "transaction_type", "quantity",
+                                                       "price_per_unit", "transaction_date"))
+                    fields = self._transaction_fields(data)
+                    ok, audit_ids = await self.write_logged(
+                        db.update_transaction, transaction_id, int(data["gold_type_id"]), *fields,
+                        data.get("description", ""))
+                    if not ok:
+                        raise HttpError(409, "Nie można zaktualizować transakcji (brak transakcji lub ujemny stan magazynu)")
+                    return 200, {"ok": True, "audit_ids": audit_ids}
+                if method == "DELETE":
+                    ok, audit_ids = await self.write_logged(db.delete_transaction, transaction_id)
+                    if not ok:
+                        raise HttpError(404, "Nie znaleziono transakcji")
+                    return 200, {"ok": True, "audit_ids": audit_ids}
+
+        if resource == "ledger" and len(parts) == 1 and method == "GET" and query.get("ids"):
+            rows = await self.read(db.get_transactions_by_ids, self._parse_ids(query["ids"]))
+            return 200, _rows_to_dicts(TransactionRow._fields, rows)
+
+        if resource == "ledger" and len(parts) == 1 and method == "GET":
+            try:
+                limit = max(1, int(query["limit"])) if query.get("limit") else None
+                offset = max(0, int(query.get("offset") or 0))
+            except ValueError:
+                raise HttpError(400, "limit i offset muszą być liczbami")
+            rows = await self.read(db.get_transactions_with_id, query.get("sort", "date"),
+                                   query.get("date_from"), query.get("date_to"), limit, offset)
+            return 200, _rows_to_dicts(LEDGER_COLUMNS, rows)
+
+        if resource == "valuation" and len(parts) == 1 and method == "GET":
+            return 200, await self._valuation(query)
+
+        if resource == "monthly" and len(parts) == 1 and method == "GET":
+            return 200, _rows_to_dicts(MONTHLY_COLUMNS, await self.read(db.get_monthly_totals))
+
+        if resource == "audit" and len(parts) == 1 and method == "GET":
+            try:
+                entity_id = int(query["entity_id"]) if query.get("entity_id") else None
+                limit = min(MAX_PAGE_SIZE, max(1, int(query.get("limit", 100))))
+            except ValueError:
+                raise HttpError(400, "entity_id i limit muszą być liczbami")
+            rows = await self.read(db.get_audit_log, query.get("entity"), entity_id, query.get("period"), limit)
+            return 200, _rows_to_dicts(AUDIT_COLUMNS, rows)
+
+        if resource == "changes" and len(parts) == 2 and parts[1] == "revert" and method == "POST":
+            audit_ids = [int(value) for value in self._require_fields(body, ("audit_ids",))["audit_ids"]]
+            ok, revert_ids = await self.write_logged(db.revert_changes, audit_ids)
+            if not ok:
+                raise HttpError(409, "Nie można cofnąć zmian (transakcje zmienione w międzyczasie lub ujemny stan magazynu)")
+            return 200, {"ok": True, "audit_ids": revert_ids}
+
+        if resource == "changes" and len(parts) == 1 and method == "GET":
+            try:
+                after_id = int(query["after"]) if query.get("after") else None
+            except ValueError:
+                raise HttpError(400, "after musi być liczbą")
+            last_id, events = await self.read(db.get_changes, after_id)
+            return 200, {"last_id": last_id, "events": [event.as_dict() for event in events]}
+
+        if resource == "archives" and len(parts) == 1:
+            if method == "GET":
+                return 200, _rows_to_dicts(ARCHIVE_COLUMNS, await self.read(db.get_archives))
+            if method == "POST":
+                try:
+                    year = int(self._require_fields(body, ("year",))["year"])
+                except (TypeError, ValueError):
+                    raise HttpError(400, "year musi być liczbą")
+                archived = await self.write(db.archive_year, year)
+                if archived is None:
+                    raise HttpError(409, f"Nie można zarchiwizować roku {year}")
+                return 200, {"ok": True, "archived": archived}
+
+        if resource == "verify" and len(parts) == 1 and method == "GET":
+            mismatches = await self.read(db.verify_balances)
+            return 200, {"ok": not mismatches,
+                         "mismatches": _rows_to_dicts(BALANCE_MISMATCH_COLUMNS, mismatches)}
+
+        raise HttpError(404 if method in ("GET", "POST", "PUT", "DELETE") else 405, "Nieznany zasób")
+
+    async def _transactions_page(self, query: dict) -> dict:
+        """Zwraca stronę historii transakcji z filtrami."""
+        try:
+            page = max(1, int(query.get("page", 1)))
+            page_size = min(MAX_PAGE_SIZE, max(1, int(query.get("page_size", 100))))
+            offset = max(0, int(query["offset"])) if "offset" in query else (page - 1) * page_size
+        except ValueError:
+            raise HttpError(400, "page, page_size i offset muszą być liczbami")
+        filters = {key: query.get(key) for key in ("date_from", "date_to", "category", "trans_type", "search")}
+        rows = await self.read(self.db.get_all_transactions_for_history, query.get("sort", "date"), filters,
+                               page_size, offset)
+        return {"page": page, "page_size": page_size, "offset": offset, "items": _rows_to_dicts(HISTORY_COLUMNS, rows)}
+
+    async def _valuation(self, query: dict) -> dict:
+        """Zwraca wycenę magazynu; z parametrem gold_price także wartość rynkową."""
+        gold_price = None
+        if query.get("gold_price"):
+            try:
+                gold_price = int(query["gold_price"])
+            except ValueError:
+                raise HttpError(400, "gold_price musi być liczbą całkowitą (grosze za gram)")
+
+        categories = _rows_to_dicts(VALUATION_COLUMNS, await self.read(self.db.get_valuation))
+        totals = {key: sum(item[key] or 0 for item in categories) for key in VALUATION_COLUMNS[1:]}
+        if gold_price is not None:
+            for item in categories + [totals]:
+                # Waga w miligramach × grosze za gram, zaokrąglone do grosza
+                item["market_value"] = ((item["fine_weight"] or 0) * gold_price + MILLIGRAMS // 2) // MILLIGRAMS
+        return {"categories": categories, "totals": totals}
+
+    @staticmethod
+    def _parse_id(value: str) -> int:
+        """Parsuje identyfikator ze ścieżki."""
+        try:
+            return int(value)
+        except ValueError:
+            raise HttpError(400, "Identyfikator musi być liczbą całkowitą")
+
+    @staticmethod
+    def _parse_amount(value: Any, field: str) -> int:
+        """Parsuje kwotę, wagę lub ilość w jednostkach podstawowych - liczbę całkowitą (także 12.0 lub "12")."""
+        try:
+            amount = int(value)
+            if isinstance(value, bool) or (not isinstance(value, str) and amount != value):
+                raise ValueError
+            return amount
+        except (TypeError, ValueError, OverflowError):
+            raise HttpError(400, f"{field} musi być liczbą całkowitą (grosze, miligramy, tysięczne części jednostki)")
+
+    @classmethod
+    def _transaction_fields(cls, data: dict) -> Tuple[str, int, int, str]:
+        """Rodzaj, ilość, cena jednostkowa i data transakcji z treści żądania - sprawdzone jak w GoldDatabase."""
+        fields = (data["transaction_type"], cls._parse_amount(data["quantity"], "quantity"),
+                  cls._parse_amount(data["price_per_unit"], "price_per_unit"), data["transaction_date"])
+        error = transaction_input_error(*fields)
+        if error:
+            raise HttpError(400, error)
+        return fields
+
+    @classmethod
+    def _parse_ids(cls, value: str) -> list:
+        """Parsuje listę identyfikatorów oddzielonych przecinkami (parametr ids)."""
+        return [cls._parse_id(part) for part in value.split(",") if part]
+
+    @staticmethod
+    def _require_fields(body: Any, fields: Tuple[str, ...]) -> dict:
+        """Sprawdza obecność wymaganych pól w treści żądania."""
+        if not isinstance(body, dict):
+            raise HttpError(400, "Oczekiwano obiektu JSON")
+        missing = [field for field in fields if body.get(field) in (None, "")]
+        if missing:
+            raise HttpError(400, f"Brak wymaganych pól: {', '.join(missing)}")
+        return body
+
+
+def main(argv: Optional[list] = None) -> int:
+    """Punkt wejścia serwera."""
+    parser = argparse.ArgumentParser(prog="gold_server", description="Magazyn Złota - lokalna usługa HTTP/JSON")
+    parser.add_argument("--db", default="gold_vault.db", help="ścieżka do pliku bazy danych")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--readers", type=int, default=4, help="liczba wątków odczytu")
+    args = parser.parse_args(argv)
+
+    db = GoldDatabase(args.db)
+    # W trybie WAL czytelnicy nie blokują jedynego wątku zapisującego
+    db.enable_wal_mode()
+    server = GoldVaultServer(db, args.host, args.port, args.readers)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
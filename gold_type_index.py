@@ -0,0 +1,97 @@
+"""
+Indeks typów złota w pamięci do filtrowania listy wyboru podczas pisania.
+
+Nazwy wyświetlane ("Kategoria - Typ (czystość%)") i ich postać do wyszukiwania
+(małe litery, bez polskich znaków) są liczone raz przy budowie indeksu.
+Kolejne naciśnięcia klawiszy zwykle dopisują znak do poprzedniego zapytania,
+więc filtrowanie zaczyna od wyników poprzedniego zapytania, a nie od całej listy.
+"""
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+from records import GoldType
+
+# Liczba zapamiętanych wyników zapytań (prefiksy wpisywanego tekstu)
+QUERY_CACHE_SIZE = 64
+
+
+def fold_text(text: str) -> str:
+    """Sprowadza tekst do postaci porównywanej przy wyszukiwaniu: małe litery, bez znaków diakrytycznych."""
+    text = text.lower().replace("ł", "l")
+    return "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+
+
+def gold_type_display_name(category: str, gold_type: str, purity: float) -> str:
+    """Nazwa typu złota wyświetlana w listach wyboru."""
+    return f"{category} - {gold_type} ({purity:.1f}%)"
+
+
+class GoldTypeIndex:
+    """Typy złota (rekordy GoldType z get_gold_types) z szybkim filtrowaniem po fragmencie nazwy."""
+
+    def __init__(self, gold_types: List[GoldType]):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.units: Dict[int, str] = {}
+        self._folded: List[str] = []
+        for gold_type in gold_types:
+            name = gold_type_display_name(gold_type.category, gold_type.type, gold_type.purity)
+            self.names.append(name)
+            self.ids[name] = gold_type.id
+            self.units[gold_type.id] = gold_type.unit
+            self._folded.append(fold_text(name))
+        self._cache: Dict[Tuple[str, ...], List[int]] = {(): list(range(len(self.names)))}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _matching(self, words: Tuple[str, ...]) -> List[int]:
+        """Indeksy nazw zawierających wszystkie słowa; korzysta z wyniku najdłuższego zapamiętanego prefiksu."""
+        cached = self._cache.get(words)
+        if cached is not None:
+            return cached
+
+        # Wyniki zapytania bez ostatniego znaku (lub bez ostatniego słowa) są nadzbiorem wyników
+        last = words[-1]
+        shorter = words[:-1] + (last[:-1],) if len(last) > 1 else words[:-1]
+        base = self._cache.get(shorter)
+        if base is None:
+            base = self._matching(words[:-1])
+
+        folded = self._folded
+        result = [index for index in base if last in folded[index]]
+        if len(self._cache) >= QUERY_CACHE_SIZE:
+            self._cache = {(): self._cache[()]}
+        self._cache[words] = result
+        return result
+
+    def filter(self, text: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Zwraca nazwy zawierające wszystkie wpisane słowa (fragmenty, bez względu na wielkość liter
+        i polskie znaki). Nazwy, w których słowo zaczyna wyraz, są na początku listy.
+        """
+        words = tuple(fold_text(text).split())
+        if not words:
+            return self.names[:limit] if limit else list(self.names)
+
+        matches = self._matching(words)
+        first = words[0]
+        folded = self._folded
+        prefix = []
+        rest = []
+        for index in matches:
+            value = folded[index]
+            position = value.find(first)
+            (prefix if position == 0 or value[position - 1] in " -(" else rest).append(index)
+        ordered = prefix + rest
+        if limit:
+            ordered = ordered[:limit]
+        return [self.names[index] for index in ordered]
+
+    def resolve(self, text: str) -> Optional[int]:
+        """Zwraca id typu dla dokładnej nazwy lub jedynego pasującego wyniku filtra."""
+        gold_id = self.ids.get(text)
+        if gold_id is not None:
+            return gold_id
+        matches = self.filter(text, limit=2)
+        return self.ids[matches[0]] if len(matches) == 1 else None
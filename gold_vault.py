@@ -1,8 +1,18 @@
+import time
+_MODULE_START = time.perf_counter()
+
+import argparse
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
-from datetime import datetime
-from typing import Optional, List, Tuple, Any
-from database import GoldDatabase
+from tkinter import ttk, messagebox
+from typing import Optional, Dict, List, Tuple, Any
+from change_events import INVENTORY, TRANSACTION, INSERT, UPDATE, DELETE, RELOAD, in_date_range
+from format_cache import FormatCache
+from records import InventoryItem, TransactionRow
+from storage import GoldStorage, profiler_from_config, storage_from_config
+from treeview_sort import TreeviewSorter, none_last
+from undo_history import DEFAULT_UNDO_LIMIT, UndoHistory
+from units import format_money, format_quantity, format_weight
+from vault_config import load_config
 
 # Stałe dla sortowania, aby uniknąć "magicznych" stringów
 SORT_MAPPING_INVENTORY = {
@@ -22,11 +32,82 @@ SORT_MAPPING_HISTORY = {
 }
 SORT_MAPPING_HISTORY_REV = {v: k for k, v in SORT_MAPPING_HISTORY.items()}
 
+# Klucze kolejności historii w głównym oknie (jak ORDER BY w get_transactions_with_id);
+# zmiana klucza edytowanej transakcji oznacza zmianę jej pozycji na liście
+HISTORY_ORDER_KEYS = {
+    "date": lambda row: (row.date, row.id),
+    "type": lambda row: (row.category, row.type),
+    "value": lambda row: row.total_value,
+    "transaction_type": lambda row: row.transaction_type,
+}
+
+
+def inventory_key(item: InventoryItem) -> Tuple:
+    """Jednoznaczny klucz pozycji magazynu (kategoria, typ, czystość - jak UNIQUE w tabeli inventory)."""
+    return (item.category, item.type, item.purity)
+
+
+class StartupTimer:
+    """Mierzy czas kolejnych faz uruchamiania aplikacji (opcja --profile-startup)."""
+    
+    def __init__(self, enabled: bool = False, start: Optional[float] = None):
+        self.enabled = enabled
+        self.start = self._last = start if start is not None else time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+    
+    def mark(self, phase: str):
+        """Zapisuje czas, który upłynął od poprzedniego znacznika."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+    
+    def report(self):
+        """Wypisuje czasy faz, jeśli pomiar jest włączony."""
+        if not self.enabled:
+            return
+        print("Czas uruchamiania:")
+        for phase, seconds in self.phases:
+            print(f"  {phase:<30} {seconds * 1000:8.1f} ms")
+        print(f"  {'RAZEM':<30} {(self._last - self.start) * 1000:8.1f} ms")
+
 
 class GoldVaultApp:
     """Główna aplikacja zarządzania magazynem złota."""
     
-    def __init__(self):
+    def __init__(self, db: Optional[GoldStorage] = None, config=None, fast_start: bool = False,
+                 startup_timer: Optional[StartupTimer] = None, profile_queries: bool = False):
+        """
+        Tworzy główne okno. W trybie szybkiego startu (fast_start) okno jest pokazywane od razu,
+        a otwarcie bazy (migracje) i pobranie danych następuje przy pierwszej bezczynności pętli Tk.
+        profile_queries włącza profilowanie otwieranej bazy niezależnie od konfiguracji (np. dla
+        --dump-query-stats).
+        """
+        self.timer = startup_timer or StartupTimer()
+        self.config = config
+        self.db = db
+        self.profile_queries = profile_queries
+        self._gold_type_index = None
+        inventory_limit = config.getint("ui", "inventory_limit", fallback=0) if config is not None else 0
+        self.inventory_limit = inventory_limit or None
+        history_page_size = config.getint("ui", "history_page_size", fallback=200) if config is not None else 200
+        self.history_page_size = history_page_size or None
+        self.change_poll_ms = config.getint("ui", "change_poll_ms", fallback=2000) if config is not None else 2000
+        self.undo_limit = (config.getint("ui", "undo_limit", fallback=DEFAULT_UNDO_LIMIT) if config is not None
+                           else DEFAULT_UNDO_LIMIT)
+        self.undo_history: Optional[UndoHistory] = None
+        # Stronicowanie historii w głównym oknie: parametry bieżącego zapytania i liczba wczytanych wierszy
+        self._history_query: Optional[Tuple] = None
+        self._history_loaded = 0
+        self._history_complete = True
+        # Wiersze tabel według klucza pozycji magazynu / id transakcji - do zmian przychodzących z magazynu danych
+        self._inventory_items: Dict[Tuple, str] = {}
+        self._history_items: Dict[int, str] = {}
+        self._startup_pending = {"map", "data"}
+        # Przyciski i listy wymagające otwartego magazynu danych (stan po włączeniu) - przy szybkim starcie
+        # wyłączone do końca _deferred_start
+        self._storage_actions: List[Tuple[tk.Widget, str]] = []
+        self.create_format_caches()
+        
         self.root = tk.Tk()
         self.root.title("Magazyn Złota")
         self.root.geometry("1400x800")
@@ -34,25 +115,95 @@ class GoldVaultApp:
         
         # Ustawienie minimalnego rozmiaru okna
         self.root.minsize(1200, 700)
+        self.root.bind("<Map>", self._on_first_map, add="+")
+        self.root.bind("<Control-z>", self.undo, add="+")
+        self.root.bind("<Control-y>", self.redo, add="+")
+        self.timer.mark("okno Tk")
         
         # Konfiguracja stylów dla lepszej czytelności
         self.setup_styles()
+        self.timer.mark("style")
         
-        # Inicjalizacja bazy danych
-        try:
-            self.db = GoldDatabase()
-        except Exception as e:
-            messagebox.showerror("Błąd bazy danych", f"Nie można zainicjować bazy danych:\n{str(e)}")
-            self.root.destroy()
+        # Inicjalizacja magazynu danych (backend wybierany w gold_vault.ini)
+        if not fast_start and not self._init_storage():
             return
         
         # Utworzenie GUI
         self.create_widgets()
+        self.timer.mark("widżety")
+        
+        if fast_start:
+            self._set_storage_actions(False)
+            self._populate_treeview(self.tree, [], ">>> ŁADOWANIE DANYCH... <<<", self.inventory_formats)
+            self._populate_treeview(self.history_tree, [], ">>> ŁADOWANIE DANYCH... <<<", self.history_formats)
+            self.center_window()
+            self.root.after_idle(self._deferred_start)
+        else:
+            self._load_initial_data()
+            # Centrowanie okna
+            self.center_window()
+    
+    def create_format_caches(self):
+        """Tworzy pamięć sformatowanych wierszy obu tabel (niezmienione wiersze nie są formatowane ponownie)."""
+        self.inventory_formats = FormatCache(self._format_inventory_item, inventory_key,
+                                             ("category", "type", "quantity", "unit", "unit_weight", "purity",
+                                              "total_weight"))
+        self.history_formats = FormatCache(self._format_history_item, "id",
+                                           ("id", "date", "category", "type", "transaction_type", "quantity",
+                                            "total_value"))
+    
+    def _init_storage(self) -> bool:
+        """Otwiera magazyn danych (z migracjami bazy); przy błędzie zamyka aplikację."""
+        if self.db is None:
+            try:
+                self.db = storage_from_config(self.config, self.profile_queries)
+            except Exception as e:
+                messagebox.showerror("Błąd bazy danych", f"Nie można zainicjować bazy danych:\n{str(e)}")
+                self.root.destroy()
+                return False
+        self.db.changes.subscribe(self.on_storage_changes)
+        self.undo_history = UndoHistory(self.db, self.undo_limit)
+        if self.change_poll_ms > 0:
+            self.db.poll_changes()
+            self.root.after(self.change_poll_ms, self.poll_storage_changes)
+        self._set_storage_actions(True)
+        self.timer.mark("magazyn danych (migracje)")
+        return True
+
+    def _storage_action(self, widget: tk.Widget, enabled_state: str = "normal") -> tk.Widget:
+        """Rejestruje przycisk lub listę, które działają na magazynie danych (enabled_state - stan po włączeniu)."""
+        self._storage_actions.append((widget, enabled_state))
+        return widget
+
+    def _set_storage_actions(self, enabled: bool):
+        """Włącza lub wyłącza przyciski i listy wymagające magazynu danych (szybki start przed otwarciem bazy)."""
+        for widget, enabled_state in self._storage_actions:
+            widget.configure(state=enabled_state if enabled else "disabled")
+    
+    def _load_initial_data(self):
+        """Wypełnia tabele przy starcie."""
         self.refresh_inventory()
+        self.timer.mark("stan magazynu")
         self.refresh_transaction_history()
-        
-        # Centrowanie okna
-        self.center_window()
+        self.timer.mark("historia transakcji")
+        self._startup_step_done("data")
+    
+    def _deferred_start(self):
+        """Druga faza szybkiego startu - wykonywana po pokazaniu okna."""
+        if self._init_storage():
+            self._load_initial_data()
+    
+    def _on_first_map(self, event):
+        """Notuje moment pierwszego wyświetlenia głównego okna."""
+        if event.widget is self.root and "map" in self._startup_pending:
+            self.timer.mark("okno widoczne")
+            self._startup_step_done("map")
+    
+    def _startup_step_done(self, step: str):
+        """Wypisuje raport czasu startu, gdy okno jest widoczne i dane wczytane."""
+        self._startup_pending.discard(step)
+        if not self._startup_pending:
+            self.timer.report()
     
     def setup_styles(self):
         """Konfiguruje style dla lepszej czytelności."""
@@ -153,6 +304,17 @@ class GoldVaultApp:
         self.tree.column("purity", width=100, anchor="center")
         self.tree.column("total_weight", width=130, anchor="center")
         
+        # Sortowanie po kliknięciu nagłówka - na surowych wartościach, bez ponownego zapytania
+        from database import natural_sort_key
+        self.inventory_sorter = TreeviewSorter(self.tree, {
+            "category": lambda item: (item.category, natural_sort_key(item.type)),
+            "type": lambda item: natural_sort_key(item.type),
+            "quantity": lambda item: item.quantity,
+            "unit_weight": lambda item: item.unit_weight,
+            "purity": lambda item: item.purity,
+            "total_weight": lambda item: none_last(item.total_weight),
+        })
+        
         # Scrollbary
         v_scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
         h_scrollbar = ttk.Scrollbar(table_frame, orient="horizontal", command=self.tree.xview)
@@ -194,10 +356,26 @@ class GoldVaultApp:
         self.history_tree.column("quantity", width=80, anchor="center")
         self.history_tree.column("value", width=110, anchor="center")
         
+        from database import natural_sort_key
+        self.history_sorter = TreeviewSorter(self.history_tree, {
+            "date": lambda transaction: transaction.date,
+            "type": lambda transaction: (transaction.category, natural_sort_key(transaction.type)),
+            "transaction": lambda transaction: transaction.transaction_type,
+            "quantity": lambda transaction: transaction.quantity,
+            "value": lambda transaction: none_last(transaction.total_value),
+        })
+        
         # Scrollbary
         v_scrollbar_hist = ttk.Scrollbar(history_frame, orient="vertical", command=self.history_tree.yview)
         h_scrollbar_hist = ttk.Scrollbar(history_frame, orient="horizontal", command=self.history_tree.xview)
-        self.history_tree.configure(yscrollcommand=v_scrollbar_hist.set, xscrollcommand=h_scrollbar_hist.set)
+        
+        def on_history_scroll(first, last):
+            # Przewinięcie do końca wczytanych wierszy dociąga kolejną stronę starszych transakcji
+            v_scrollbar_hist.set(first, last)
+            if float(last) >= 1.0 and not self._history_complete:
+                self.root.after_idle(self.load_more_history)
+        
+        self.history_tree.configure(yscrollcommand=on_history_scroll, xscrollcommand=h_scrollbar_hist.set)
         
         # Umieszczenie elementów
         self.history_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -221,7 +399,8 @@ class GoldVaultApp:
         self.date_to_entry.insert(0, "RRRR-MM-DD")
         self.date_to_entry.pack(side=tk.LEFT, padx=(0, 10))
         
-        filter_button = ttk.Button(date_filter_frame, text="FILTRUJ", command=self.apply_date_filter, style="Detail.TButton")
+        filter_button = self._storage_action(ttk.Button(date_filter_frame, text="FILTRUJ", command=self.apply_date_filter,
+                                                        style="Detail.TButton"))
         filter_button.pack(side=tk.LEFT)
 
     def apply_date_filter(self):
@@ -237,25 +416,30 @@ class GoldVaultApp:
         buttons_row1 = [
             ("DODAJ NOWE ZŁOTO", self.add_gold_type),
             ("KUP ZŁOTO", self.buy_gold),
-            ("SPRZEDAJ ZŁOTO", self.sell_gold)
+            ("SPRZEDAJ ZŁOTO", self.sell_gold),
+            ("STATYSTYKI", self.show_dashboard)
         ]
         
         # Drugi rząd przycisków
         buttons_row2 = [
             ("PEŁNA HISTORIA", self.show_transactions),
+            ("DIAGNOSTYKA", self.show_diagnostics),
+            ("KOPIA ZAPASOWA", self.show_backups),
             ("WYJDŹ", self.root.quit)
         ]
         
         # Utworzenie pierwszego rzędu
         for i, (text, command) in enumerate(buttons_row1):
-            btn = ttk.Button(button_frame, text=text, command=command, 
-                           style="Big.TButton", width=18)
+            btn = self._storage_action(ttk.Button(button_frame, text=text, command=command, 
+                                                  style="Big.TButton", width=18))
             btn.grid(row=0, column=i, padx=12, pady=8)
         
-        # Utworzenie drugiego rzędu
+        # Utworzenie drugiego rzędu (WYJDŹ działa także przed otwarciem magazynu danych)
         for i, (text, command) in enumerate(buttons_row2):
             btn = ttk.Button(button_frame, text=text, command=command, 
                            style="Big.TButton", width=18)
+            if command != self.root.quit:
+                self._storage_action(btn)
             btn.grid(row=1, column=i, padx=12, pady=8)
     
     def create_sort_options(self, parent):
@@ -272,7 +456,8 @@ class GoldVaultApp:
         ttk.Label(sort_frame, text="Sortuj według:", font=("Arial", 11, "bold")).grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
         
         # Combo box z opcjami sortowania
-        self.sort_combo = ttk.Combobox(sort_frame, width=20, state="readonly", font=("Arial", 10))
+        self.sort_combo = self._storage_action(ttk.Combobox(sort_frame, width=20, state="readonly", font=("Arial", 10)),
+                                               "readonly")
         self.sort_combo['values'] = list(SORT_MAPPING_INVENTORY.keys())
         self.sort_combo.set("Kategoria")  # Domyślne sortowanie
         self.sort_combo.grid(row=0, column=1, sticky=tk.W, padx=(0, 10))
@@ -287,7 +472,7 @@ class GoldVaultApp:
         ]
         
         for i, (text, command) in enumerate(sort_buttons):
-            btn = ttk.Button(sort_frame, text=text, command=command, width=12)
+            btn = self._storage_action(ttk.Button(sort_frame, text=text, command=command, width=12))
             btn.grid(row=0, column=i+2, padx=2)
         
         # Bind dla combo box
@@ -305,50 +490,64 @@ class GoldVaultApp:
             self.sort_combo.set(SORT_MAPPING_INVENTORY_REV[sort_by])
         self.refresh_inventory(sort_by)
 
-    def _populate_treeview(self, tree: ttk.Treeview, data: List[Tuple], empty_message: str, formatter: callable):
-        """Uniwersalna funkcja do wypełniania Treeview danymi."""
+    def _populate_treeview(self, tree: ttk.Treeview, data: List[Tuple], empty_message: str, formatter: callable,
+                           sorter: Optional[TreeviewSorter] = None):
+        """
+        Uniwersalna funkcja do wypełniania Treeview danymi.
+        Jeśli podano sorter, dostaje on wstawione wiersze do późniejszego sortowania po kliknięciu nagłówka.
+        Zwraca pary (id elementu, surowe dane) wstawionych wierszy.
+        """
         for item in tree.get_children():
             tree.delete(item)
 
+        loaded = []
         if not data:
             # Dodaj informację o braku danych
             tree.insert("", "end", values=([empty_message] + [""] * (len(tree['columns']) - 1)))
-            return
+        else:
+            loaded = self._insert_rows(tree, data, formatter)
 
+        if sorter is not None:
+            sorter.load(loaded)
+        return loaded
+
+    def _insert_rows(self, tree: ttk.Treeview, data: List[Tuple], formatter: callable) -> List[Tuple[str, Tuple]]:
+        """Dopisuje wiersze na końcu Treeview; zwraca pary (id elementu, surowe dane)."""
+        loaded = []
         for item_data in data:
             formatted_item, item_id = formatter(item_data)
             if item_id:
-                tree.insert("", "end", values=formatted_item, tags=(item_id,))
+                tree_item = tree.insert("", "end", values=formatted_item, tags=(item_id,))
             else:
-                tree.insert("", "end", values=formatted_item)
+                tree_item = tree.insert("", "end", values=formatted_item)
+            loaded.append((tree_item, item_data))
+        return loaded
 
-    def _format_inventory_item(self, item: Tuple) -> Tuple[Tuple, Any]:
+    def _format_inventory_item(self, item: InventoryItem) -> Tuple[Tuple, Any]:
         """Formatuje wiersz dla tabeli magazynu."""
-        category, type_name, unit_weight, purity, quantity, unit, total_weight, notes = item
         formatted_item = (
-            category.upper(),
-            type_name.upper(),
-            f"{quantity} {unit}",
-            f"{unit_weight:.2f} g",
-            f"{purity:.1f}%",
-            f"{total_weight:.2f} g"
+            item.category.upper(),
+            item.type.upper(),
+            f"{format_quantity(item.quantity)} {item.unit}",
+            f"{format_weight(item.unit_weight)} g",
+            f"{item.purity:.1f}%",
+            f"{format_weight(item.total_weight)} g"
         )
         return formatted_item, None
 
-    def _format_history_item(self, transaction: Tuple) -> Tuple[Tuple, Any]:
+    def _format_history_item(self, transaction: TransactionRow) -> Tuple[Tuple, Any]:
         """Formatuje wiersz dla tabeli historii transakcji."""
-        trans_id, date, category, gold_type, purity, trans_type, quantity, price, total_value, description, gold_type_id = transaction
-        display_type = f"{category} - {gold_type}"
+        display_type = f"{transaction.category} - {transaction.type}"
         short_type = display_type[:15] + "..." if len(display_type) > 15 else display_type
-        trans_display = "KUPNO" if trans_type == "Kupno" else "SPRZEDAŻ"
+        trans_display = "KUPNO" if transaction.transaction_type == "Kupno" else "SPRZEDAŻ"
         formatted_transaction = (
-            date[:10],
+            transaction.date[:10],
             short_type.upper(),
             trans_display,
-            f"{quantity:.1f}",
-            f"{total_value:.0f} zł"
+            format_quantity(transaction.quantity),
+            f"{format_money(transaction.total_value, 0)} zł"
         )
-        return formatted_transaction, trans_id
+        return formatted_transaction, transaction.id
 
     def refresh_inventory(self, sort_by: Optional[str] = None):
         """Odświeża tabelę magazynu z aktualnym sortowaniem."""
@@ -356,8 +555,10 @@ class GoldVaultApp:
             selected = self.sort_combo.get()
             sort_by = SORT_MAPPING_INVENTORY.get(selected, "category")
 
-        inventory = self.db.get_inventory(sort_by)
-        self._populate_treeview(self.tree, inventory, ">>> MAGAZYN PUSTY <<<", self._format_inventory_item)
+        inventory = self.db.get_inventory(sort_by, self.inventory_limit)
+        loaded = self._populate_treeview(self.tree, inventory, ">>> MAGAZYN PUSTY <<<", self.inventory_formats,
+                                         self.inventory_sorter)
+        self._inventory_items = {inventory_key(item): tree_item for tree_item, item in loaded}
         
     def refresh_transaction_history(self, sort_by: Optional[str] = None):
         """Odświeża tabelę historii transakcji z aktualnym sortowaniem."""
@@ -368,46 +569,205 @@ class GoldVaultApp:
         date_from = self.date_from_entry.get() if hasattr(self, 'date_from_entry') else None
         date_to = self.date_to_entry.get() if hasattr(self, 'date_to_entry') else None
 
-        transactions = self.db.get_transactions_with_id(sort_by, date_from, date_to)
-        self._populate_treeview(self.history_tree, transactions, ">>> BRAK TRANSAKCJI <<<", self._format_history_item)
+        # Tylko pierwsza strona (najnowsze transakcje) - starsze są dociągane przy przewijaniu
+        self._history_query = (sort_by, date_from, date_to)
+        transactions = self.db.get_transactions_with_id(sort_by, date_from, date_to, self.history_page_size)
+        self._history_loaded = len(transactions)
+        self._history_complete = self.history_page_size is None or len(transactions) < self.history_page_size
+        loaded = self._populate_treeview(self.history_tree, transactions, ">>> BRAK TRANSAKCJI <<<",
+                                         self.history_formats, self.history_sorter)
+        self._history_items = {row.id: tree_item for tree_item, row in loaded}
 
         if hasattr(self, 'history_sort_combo'):
             self.history_sort_combo.set(SORT_MAPPING_HISTORY_REV.get(sort_by, "Data"))
-    
+
+    def load_more_history(self):
+        """Dopisuje do historii w głównym oknie następną stronę starszych transakcji."""
+        if self._history_complete or self._history_query is None:
+            return
+        # Blokada ponownego wywołania, zanim strona zostanie dopisana (kolejne zdarzenia przewijania)
+        self._history_complete = True
+        sort_by, date_from, date_to = self._history_query
+        transactions = self.db.get_transactions_with_id(sort_by, date_from, date_to, self.history_page_size,
+                                                        self._history_loaded)
+        self._history_loaded += len(transactions)
+        loaded = self._insert_rows(self.history_tree, transactions, self.history_formats)
+        self._history_items.update((row.id, tree_item) for tree_item, row in loaded)
+        self.history_sorter.extend(loaded)
+        self._history_complete = len(transactions) < self.history_page_size
+
+    def on_storage_changes(self, events: list):
+        """Nanosi zapisane zmiany na tabele głównego okna - zmieniane są tylko dotknięte wiersze."""
+        for event in events:
+            if event.entity == INVENTORY:
+                self._apply_inventory_change(event)
+            elif event.entity == TRANSACTION:
+                self._apply_history_change(event)
+
+    def poll_storage_changes(self):
+        """Nanosi zmiany zapisane przez inne stanowiska i planuje następne sprawdzenie."""
+        self.db.poll_changes()
+        self.root.after(self.change_poll_ms, self.poll_storage_changes)
+
+    def _apply_inventory_change(self, event):
+        """Odświeża zmienione pozycje magazynu w miejscu."""
+        if event.action in (INSERT, RELOAD):
+            self.invalidate_gold_type_index()
+        sort_by = SORT_MAPPING_INVENTORY.get(self.sort_combo.get(), "category")
+        # Nowy typ złota, nieznane pozycje lub kolejność zależna od stanu - tabela magazynu jest wczytywana ponownie
+        if event.action != UPDATE or not event.ids or sort_by in ("quantity", "weight"):
+            self.refresh_inventory()
+            return
+        for item in self.db.get_inventory_by_ids(list(event.ids)).values():
+            tree_item = self._inventory_items.get(inventory_key(item))
+            if tree_item is None:
+                continue  # Pozycja poza wczytanym fragmentem (limit magazynu)
+            self.tree.item(tree_item, values=self.inventory_formats(item)[0])
+            self.inventory_sorter.update(tree_item, item)
+
+    def _apply_history_change(self, event):
+        """Wstawia, poprawia lub usuwa zmienione transakcje na liście historii."""
+        if self._history_query is None:
+            return
+        if event.action not in (INSERT, UPDATE, DELETE) or not event.ids:
+            self.refresh_transaction_history()
+            return
+
+        if event.action == DELETE:
+            self._remove_history_rows(list(event.ids))
+            return
+
+        sort_by, date_from, date_to = self._history_query
+        order_key = HISTORY_ORDER_KEYS.get(sort_by, HISTORY_ORDER_KEYS["date"])
+        moved = []
+        for row in self.db.get_transactions_by_ids(list(event.ids)):
+            tree_item = self._history_items.get(row.id)
+            if tree_item is not None:
+                old_row = self.history_sorter.row(tree_item)
+                if order_key(old_row) == order_key(row) and in_date_range(row.date, date_from, date_to):
+                    self.history_tree.item(tree_item, values=self.history_formats(row)[0])
+                    self.history_sorter.update(tree_item, row)
+                    continue
+                self._remove_history_rows([row.id])
+            if in_date_range(row.date, date_from, date_to):
+                moved.append(row)
+
+        if moved and sort_by != "date":
+            # Pozycję nowego wiersza wyznacza tylko kolejność według daty - pozostałe sortowania wczytują stronę od nowa
+            self.refresh_transaction_history(sort_by)
+            return
+        for row in moved:
+            index = self.history_sorter.index_for(row, order_key)
+            if index == len(self.history_sorter) and not self._history_complete:
+                continue  # Transakcja należy do jeszcze niewczytanej strony
+            if not self._history_items:
+                self.history_tree.delete(*self.history_tree.get_children())  # Komunikat o braku transakcji
+            tree_item = self.history_tree.insert("", index, values=self.history_formats(row)[0], tags=(row.id,))
+            self.history_sorter.insert(index, tree_item, row)
+            self._history_items[row.id] = tree_item
+            self._history_loaded += 1
+
+    def _remove_history_rows(self, transaction_ids: List[int]):
+        """Usuwa wczytane transakcje z listy historii (przesuwa też początek następnej strony)."""
+        tree_items = [self._history_items.pop(transaction_id) for transaction_id in transaction_ids
+                      if transaction_id in self._history_items]
+        if not tree_items:
+            return
+        self.history_tree.delete(*tree_items)
+        self.history_sorter.remove(tree_items)
+        self._history_loaded -= len(tree_items)
+        if not self._history_items and self._history_complete:
+            self._populate_treeview(self.history_tree, [], ">>> BRAK TRANSAKCJI <<<", self.history_formats,
+                                    self.history_sorter)
+
+    def undo(self, event=None):
+        """Cofa ostatni zapis transakcji (Ctrl+Z); tabele poprawiają się przez zdarzenia zmian."""
+        if self.undo_history is None or not self.undo_history.can_undo():
+            self.root.bell()
+        elif not self.undo_history.undo():
+            messagebox.showwarning("Cofnij", "Nie można cofnąć operacji - transakcje zmieniono w międzyczasie\n"
+                                             "lub stan magazynu byłby ujemny.")
+
+    def redo(self, event=None):
+        """Ponawia ostatnio cofnięty zapis transakcji (Ctrl+Y)."""
+        if self.undo_history is None or not self.undo_history.can_redo():
+            self.root.bell()
+        elif not self.undo_history.redo():
+            messagebox.showwarning("Ponów", "Nie można ponowić operacji - transakcje zmieniono w międzyczasie\n"
+                                            "lub stan magazynu byłby ujemny.")
+
     def add_gold_type(self):
         """Otwiera dialog dodawania nowego typu złota."""
-        dialog = AddGoldTypeDialog(self.root, self.db, self)
-        if dialog.result:
-            self.refresh_inventory()
+        from gold_dialogs import AddGoldTypeDialog
+        AddGoldTypeDialog(self.root, self.db, self)
+    
+    def get_gold_type_index(self):
+        """Zwraca indeks typów złota dla list wyboru w dialogach (budowany raz, do czasu dodania typu)."""
+        if self._gold_type_index is None:
+            from gold_type_index import GoldTypeIndex
+            self._gold_type_index = GoldTypeIndex(self.db.get_gold_types())
+        return self._gold_type_index
+    
+    def invalidate_gold_type_index(self):
+        """Unieważnia indeks typów złota po zmianie listy typów."""
+        self._gold_type_index = None
     
     def buy_gold(self):
         """Otwiera dialog kupna złota."""
+        from gold_dialogs import TransactionDialog
         # Sprawdź czy są dostępne typy złota
-        if not self.db.get_gold_types():
+        if not self.get_gold_type_index().names:
             messagebox.showwarning("Uwaga", "Najpierw dodaj typy złota do bazy danych!")
             return
         
-        dialog = TransactionDialog(self.root, self.db, "Kupno", self)
-        if dialog.result:
-            self.refresh_inventory()
-            self.refresh_transaction_history()
+        TransactionDialog(self.root, self.db, "Kupno", self)
     
     def sell_gold(self):
         """Otwiera dialog sprzedaży złota."""
+        from gold_dialogs import TransactionDialog
         # Sprawdź czy są dostępne typy złota
-        if not self.db.get_gold_types():
+        if not self.get_gold_type_index().names:
             messagebox.showwarning("Uwaga", "Najpierw dodaj typy złota do bazy danych!")
             return
         
-        dialog = TransactionDialog(self.root, self.db, "Sprzedaż", self)
-        if dialog.result:
-            self.refresh_inventory()
-            self.refresh_transaction_history()
+        TransactionDialog(self.root, self.db, "Sprzedaż", self)
     
     def show_transactions(self):
         """Otwiera okno historii transakcji."""
+        from gold_dialogs import TransactionHistoryWindow
         TransactionHistoryWindow(self.root, self.db, self)
     
+    def show_dashboard(self):
+        """Otwiera panel statystyk (kupno i sprzedaż w miesiącach, ceny, stan według kategorii)."""
+        from gold_dialogs import DashboardWindow
+        DashboardWindow(self.root, self.db)
+    
+    def show_diagnostics(self):
+        """Otwiera okno ze statystykami wywołań bazy danych."""
+        profiler = getattr(self.db, "profiler", None)
+        if profiler is None:
+            if not hasattr(self.db, "set_profiler"):
+                messagebox.showinfo("Diagnostyka", "Profilowanie jest dostępne tylko dla bazy SQLite.")
+                return
+            if not messagebox.askyesno("Diagnostyka", "Profilowanie bazy danych jest wyłączone.\n"
+                                       "Włączyć je do zamknięcia programu?\n\n"
+                                       "Na stałe: plik gold_vault.ini, [profiler] enabled = yes"):
+                return
+            profiler = profiler_from_config(self.config if self.config is not None else load_config())
+            self.db.set_profiler(profiler)
+        from gold_dialogs import DiagnosticsWindow
+        DiagnosticsWindow(self.root, profiler, self.db)
+    
+    def show_backups(self):
+        """Otwiera okno kopii zapasowych (tylko dla bazy w pliku lokalnym)."""
+        db_path = getattr(self.db, "db_name", None)
+        if not db_path or db_path == ":memory:":
+            messagebox.showinfo("Kopia zapasowa", "Kopie zapasowe wykonuje się na komputerze z plikiem bazy:\n"
+                                "python -m gold_cli backup")
+            return
+        from gold_dialogs import BackupWindow
+        BackupWindow(self.root, db_path, self, self.config)
+    
     def create_history_sort_options(self, parent):
         """Tworzy opcje sortowania historii transakcji."""
         # Konfiguracja siatki
@@ -422,7 +782,8 @@ class GoldVaultApp:
         ttk.Label(history_sort_frame, text="Sortuj według:", font=("Arial", 11, "bold")).grid(row=0, column=0, sticky=tk.W, padx=(0, 10))
         
         # Combo box z opcjami sortowania
-        self.history_sort_combo = ttk.Combobox(history_sort_frame, width=15, state="readonly", font=("Arial", 10))
+        self.history_sort_combo = self._storage_action(ttk.Combobox(history_sort_frame, width=15, state="readonly",
+                                                                    font=("Arial", 10)), "readonly")
         self.history_sort_combo['values'] = list(SORT_MAPPING_HISTORY.keys())
         self.history_sort_combo.set("Data")  # Domyślne sortowanie
         self.history_sort_combo.grid(row=0, column=1, sticky=tk.W, padx=(0, 10))
@@ -436,7 +797,7 @@ class GoldVaultApp:
         ]
         
         for i, (text, command) in enumerate(history_sort_buttons):
-            btn = ttk.Button(history_sort_frame, text=text, command=command, width=10)
+            btn = self._storage_action(ttk.Button(history_sort_frame, text=text, command=command, width=10))
             btn.grid(row=0, column=i+2, padx=2)
         
         # Bind dla combo box
@@ -467,781 +828,37 @@ class GoldVaultApp:
             transaction_id = int(tags[0])
             
             # Otwórz okno edycji pojedynczej transakcji
-            dialog = SingleTransactionEditDialog(self.root, self.db, transaction_id, self)
-            if dialog.result:
-                self.refresh_inventory()
-                self.refresh_transaction_history()
+            from gold_dialogs import SingleTransactionEditDialog
+            SingleTransactionEditDialog(self.root, self.db, transaction_id, self)
     
     def run(self):
         """Uruchamia aplikację."""
         self.root.mainloop()
 
 
-class TransactionHistoryWindow:
-    """Okno wyświetlające pełną historię transakcji z opcjami filtrowania."""
-    
-    def __init__(self, parent, db: GoldDatabase, main_app_ref):
-        self.db = db
-        self.main_app_ref = main_app_ref
-        
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title("Pełna Historia Transakcji")
-        self.dialog.geometry("1600x800")
-        self.dialog.minsize(1200, 600)
-        self.dialog.grab_set()
-        
-        self.dialog.transient(parent)
-        self.center_window()
-        
-        self.create_widgets()
-        self.load_transactions()
-
-    def center_window(self):
-        """Centruje okno na ekranie."""
-        self.dialog.update_idletasks()
-        width = self.dialog.winfo_width()
-        height = self.dialog.winfo_height()
-        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
-        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
-        self.dialog.geometry(f"{width}x{height}+{x}+{y}")
-
-    def create_widgets(self):
-        """Tworzy interfejs okna historii."""
-        main_frame = ttk.Frame(self.dialog, padding="15")
-        main_frame.pack(fill=tk.BOTH, expand=True)
-        main_frame.columnconfigure(0, weight=1)
-        main_frame.rowconfigure(1, weight=1)
-
-        # --- Ramka z filtrami ---
-        filter_frame = ttk.LabelFrame(main_frame, text="Filtry i Opcje", padding="10")
-        filter_frame.grid(row=0, column=0, sticky="ew", pady=(0, 10))
-        
-        # Filtry daty
-        ttk.Label(filter_frame, text="Od:").grid(row=0, column=0, padx=(0, 5), pady=5)
-        self.date_from_entry = ttk.Entry(filter_frame, width=12)
-        self.date_from_entry.insert(0, "RRRR-MM-DD")
-        self.date_from_entry.grid(row=0, column=1, padx=(0, 15), pady=5)
-        
-        ttk.Label(filter_frame, text="Do:").grid(row=0, column=2, padx=(0, 5), pady=5)
-        self.date_to_entry = ttk.Entry(filter_frame, width=12)
-        self.date_to_entry.insert(0, "RRRR-MM-DD")
-        self.date_to_entry.grid(row=0, column=3, padx=(0, 15), pady=5)
-        
-        # Filtr kategorii
-        ttk.Label(filter_frame, text="Kategoria:").grid(row=0, column=4, padx=(0, 5), pady=5)
-        categories = ["Wszystkie"] + self.db.get_gold_categories()
-        self.category_combo = ttk.Combobox(filter_frame, values=categories, state="readonly", width=15)
-        self.category_combo.set("Wszystkie")
-        self.category_combo.grid(row=0, column=5, padx=(0, 15), pady=5)
-        
-        # Filtr typu transakcji
-        ttk.Label(filter_frame, text="Typ transakcji:").grid(row=0, column=6, padx=(0, 5), pady=5)
-        trans_types = ["Wszystkie", "Kupno", "Sprzedaż"]
-        self.trans_type_combo = ttk.Combobox(filter_frame, values=trans_types, state="readonly", width=15)
-        self.trans_type_combo.set("Wszystkie")
-        self.trans_type_combo.grid(row=0, column=7, padx=(0, 15), pady=5)
-        
-        # Przyciski
-        ttk.Button(filter_frame, text="Filtruj", command=self.load_transactions).grid(row=0, column=8, padx=10, pady=5)
-        ttk.Button(filter_frame, text="Wyczyść filtry", command=self.clear_filters).grid(row=0, column=9, padx=10, pady=5)
-
-        # --- Tabela z historią ---
-        table_frame = ttk.Frame(main_frame)
-        table_frame.grid(row=1, column=0, sticky="nsew")
-        table_frame.columnconfigure(0, weight=1)
-        table_frame.rowconfigure(0, weight=1)
-
-        columns = ("date", "type", "trans_type", "quantity", "unit", "weight_total", "price_unit", "price_gram", "total_value", "desc")
-        self.tree = ttk.Treeview(table_frame, columns=columns, show="headings")
-        
-        self.tree.heading("date", text="Data")
-        self.tree.heading("type", text="Typ Złota")
-        self.tree.heading("trans_type", text="Transakcja")
-        self.tree.heading("quantity", text="Ilość")
-        self.tree.heading("unit", text="Jedn.")
-        self.tree.heading("weight_total", text="Waga Całk. (g)")
-        self.tree.heading("price_unit", text="Cena/Jedn. (zł)")
-        self.tree.heading("price_gram", text="Cena/Gram (zł)")
-        self.tree.heading("total_value", text="Wartość (zł)")
-        self.tree.heading("desc", text="Opis")
-
-        for col in columns:
-            self.tree.column(col, anchor="center", width=120)
-        self.tree.column("type", width=200, anchor="w")
-        self.tree.column("desc", width=250, anchor="w")
-
-        v_scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self.tree.yview)
-        h_scrollbar = ttk.Scrollbar(table_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
-        
-        self.tree.grid(row=0, column=0, sticky="nsew")
-        v_scrollbar.grid(row=0, column=1, sticky="ns")
-        h_scrollbar.grid(row=1, column=0, sticky="ew")
-        
-        self.tree.bind('<Double-1>', self.on_transaction_double_click)
-
-    def load_transactions(self):
-        """Ładuje transakcje do tabeli na podstawie filtrów."""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        filters = {
-            "date_from": self.date_from_entry.get(),
-            "date_to": self.date_to_entry.get(),
-            "category": self.category_combo.get(),
-            "trans_type": self.trans_type_combo.get()
-        }
-        
-        transactions = self.db.get_all_transactions_for_history(filters=filters)
-        
-        if not transactions:
-            self.tree.insert("", "end", values=([""] * 9 + ["Brak transakcji spełniających kryteria"]))
-            return
-        
-        for trans in transactions:
-            trans_id, date, category, gold_type, purity, trans_type, quantity, unit, weight_total, price_unit, price_gram, total_value, desc = trans
-            
-            display_type = f"{category} - {gold_type} ({purity:.1f}%)"
-            
-            formatted_trans = (
-                date.split(" ")[0],
-                display_type,
-                trans_type,
-                f"{quantity:.2f}",
-                unit,
-                f"{weight_total:.2f}" if weight_total is not None else "N/A",
-                f"{price_unit:.2f}",
-                f"{price_gram:.2f}" if price_gram is not None else "N/A",
-                f"{total_value:.2f}",
-                desc or ""
-            )
-            self.tree.insert("", "end", values=formatted_trans, tags=(trans_id,))
-
-    def clear_filters(self):
-        """Czyści wszystkie filtry i ładuje dane od nowa."""
-        self.date_from_entry.delete(0, tk.END)
-        self.date_from_entry.insert(0, "RRRR-MM-DD")
-        self.date_to_entry.delete(0, tk.END)
-        self.date_to_entry.insert(0, "RRRR-MM-DD")
-        self.category_combo.set("Wszystkie")
-        self.trans_type_combo.set("Wszystkie")
-        self.load_transactions()
-
-    def on_transaction_double_click(self, event):
-        """Obsługuje podwójne kliknięcie na transakcji."""
-        selection = self.tree.selection()
-        if not selection:
-            return
-        
-        item = self.tree.item(selection[0])
-        transaction_id = item['tags'][0]
-        
-        dialog = SingleTransactionEditDialog(self.dialog, self.db, transaction_id, self.main_app_ref)
-        if dialog.result:
-            self.load_transactions()
-            self.main_app_ref.refresh_inventory()
-            self.main_app_ref.refresh_transaction_history()
-
-class AddGoldTypeDialog:
-    """Dialog dodawania nowego typu złota."""
-    
-    def __init__(self, parent, db: GoldDatabase, main_app=None):
-        self.db = db
-        self.result = False
-        self.main_app = main_app  # Referencja do głównej aplikacji
-        
-        # Tworzenie okna
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title("Dodaj Nowy Typ Złota")
-        self.dialog.geometry("750x650")
-        self.dialog.resizable(True, True)
-        self.dialog.grab_set()
-        
-        # Konfiguracja czcionek dla dialogu
-        self.dialog.option_add('*Font', 'Arial 11')
-        
-        # Centrowanie okna
-        self.dialog.transient(parent)
-        self.center_window()
-        
-        self.create_widgets()
-    
-    def center_window(self):
-        """Centruje okno na ekranie."""
-        self.dialog.update_idletasks()
-        width = 850
-        height = 850
-        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
-        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
-        self.dialog.geometry(f"{width}x{height}+{x}+{y}")
-    
-    def create_widgets(self):
-        """Tworzy interfejs dialogu."""
-        main_frame = ttk.Frame(self.dialog, padding="25")
-        main_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Konfiguracja siatki
-        main_frame.columnconfigure(1, weight=1)
-        
-        # Kategoria złota
-        ttk.Label(main_frame, text="Kategoria:", font=("Arial", 12)).grid(row=0, column=0, sticky=tk.W, pady=20)
-        self.category_combo = ttk.Combobox(main_frame, width=45, font=("Arial", 11), state="readonly")
-        self.category_combo['values'] = ("Złom", "Moneta", "Sztabka", "Biżuteria", "Inne")
-        self.category_combo.set("Złom")  # Domyślna wartość
-        self.category_combo.grid(row=0, column=1, pady=20, padx=(15, 0), sticky="ew")
-        
-        # Pola wprowadzania z większymi czcionkami i odstępami
-        ttk.Label(main_frame, text="Typ Złota:", font=("Arial", 12)).grid(row=1, column=0, sticky=tk.W, pady=20)
-        self.type_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
-        self.type_entry.grid(row=1, column=1, pady=20, padx=(15, 0), sticky="ew")
-        
-        ttk.Label(main_frame, text="Waga Jednostkowa (g):", font=("Arial", 12)).grid(row=2, column=0, sticky=tk.W, pady=20)
-        self.weight_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
-        self.weight_entry.grid(row=2, column=1, pady=20, padx=(15, 0), sticky="ew")
-        
-        ttk.Label(main_frame, text="Czystość (%):", font=("Arial", 12)).grid(row=3, column=0, sticky=tk.W, pady=20)
-        self.purity_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
-        self.purity_entry.grid(row=3, column=1, pady=20, padx=(15, 0), sticky="ew")
-        
-        # Jednostka
-        ttk.Label(main_frame, text="Jednostka:", font=("Arial", 12)).grid(row=4, column=0, sticky=tk.W, pady=20)
-        self.unit_combo = ttk.Combobox(main_frame, width=45, font=("Arial", 11), state="readonly")
-        self.unit_combo['values'] = ("szt", "g", "oz")
-        self.unit_combo.set("szt")  # Domyślna wartość
-        self.unit_combo.grid(row=4, column=1, pady=20, padx=(15, 0), sticky="ew")
-        
-        # Notatki
-        ttk.Label(main_frame, text="Notatki:", font=("Arial", 12)).grid(row=5, column=0, sticky=tk.W, pady=20)
-        self.notes_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
-        self.notes_entry.grid(row=5, column=1, pady=20, padx=(15, 0), sticky="ew")
-        
-        # Przyciski z większymi czcionkami
-        button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=6, column=0, columnspan=2, pady=25)
-        
-        ttk.Button(button_frame, text="DODAJ", command=self.add_gold, 
-                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
-        ttk.Button(button_frame, text="ANULUJ", command=self.dialog.destroy, 
-                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
-        
-        # Focus na pierwszym polu
-        self.category_combo.focus()
-        
-        # Obsługa klawisza Enter
-        self.dialog.bind('<Return>', lambda event: self.add_gold())
-        self.dialog.bind('<Escape>', lambda event: self.dialog.destroy())
-    
-    def add_gold(self):
-        """Dodaje nowy typ złota."""
-        try:
-            # Walidacja danych
-            category = self.category_combo.get().strip()
-            if not category:
-                messagebox.showerror("Błąd", "Wybierz kategorię!")
-                return
-            
-            gold_type = self.type_entry.get().strip()
-            if not gold_type:
-                messagebox.showerror("Błąd", "Typ złota nie może być pusty!")
-                return
-            
-            unit_weight = float(self.weight_entry.get())
-            if unit_weight <= 0:
-                messagebox.showerror("Błąd", "Waga jednostkowa musi być dodatnia!")
-                return
-            
-            purity = float(self.purity_entry.get())
-            if not (0 < purity <= 100):
-                messagebox.showerror("Błąd", "Czystość musi być między 0 a 100%!")
-                return
-            
-            unit = self.unit_combo.get().strip()
-            if not unit:
-                messagebox.showerror("Błąd", "Wybierz jednostkę!")
-                return
-            
-            notes = self.notes_entry.get().strip()
-            
-            # Dodawanie do bazy
-            if self.db.add_gold_type(category, gold_type, unit_weight, purity, unit, notes):
-                messagebox.showinfo("Sukces", f"Typ złota '{gold_type}' został dodany!")
-                self.result = True
-                
-                # Odśwież główne okno natychmiast po dodaniu typu złota
-                if self.main_app:
-                    self.main_app.refresh_inventory()
-                
-                self.dialog.destroy()
-            else:
-                messagebox.showerror("Błąd", "Typ złota o tej kombinacji (kategoria, typ, czystość) już istnieje!")
-        
-        except ValueError:
-            messagebox.showerror("Błąd", "Waga i czystość muszą być liczbami!")
-
-
-class TransactionDialog:
-    """Dialog transakcji (kupno/sprzedaż)."""
-    
-    def __init__(self, parent, db: GoldDatabase, transaction_type: str, main_app=None):
-        self.db = db
-        self.transaction_type = transaction_type
-        self.result = False
-        self.main_app = main_app  # Referencja do głównej aplikacji
-        
-        # Tworzenie okna
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title(f"{transaction_type} Złota")
-        self.dialog.geometry("750x550")
-        self.dialog.resizable(True, True)
-        self.dialog.grab_set()
-        
-        # Konfiguracja czcionek dla dialogu
-        self.dialog.option_add('*Font', 'Arial 11')
-        
-        # Centrowanie okna
-        self.dialog.transient(parent)
-        self.center_window()
-        
-        self.create_widgets()
-    
-    def center_window(self):
-        """Centruje okno na ekranie."""
-        self.dialog.update_idletasks()
-        width = 850
-        height = 850
-        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
-        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
-        self.dialog.geometry(f"{width}x{height}+{x}+{y}")
-    
-    def create_widgets(self):
-        """Tworzy interfejs dialogu."""
-        main_frame = ttk.Frame(self.dialog, padding="20")
-        main_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Konfiguracja siatki
-        main_frame.columnconfigure(1, weight=1)
-        
-        # Typ złota
-        ttk.Label(main_frame, text="Typ Złota:").grid(row=0, column=0, sticky=tk.W, pady=15)
-        self.gold_combo = ttk.Combobox(main_frame, width=55, state="readonly")
-        self.gold_combo.grid(row=0, column=1, pady=15, padx=(10, 0), sticky="ew")
-        
-        # Pobierz typy złota
-        gold_types = self.db.get_gold_types()
-        type_names = []
-        self.gold_data = {}
-        
-        for gold_id, category, gold_type, purity, unit in gold_types:
-            display_name = f"{category} - {gold_type} ({purity:.1f}%)"
-            type_names.append(display_name)
-            self.gold_data[display_name] = gold_id
-        
-        self.gold_combo['values'] = type_names
-        
-        # Ilość
-        ttk.Label(main_frame, text="Ilość:").grid(row=1, column=0, sticky=tk.W, pady=15)
-        self.quantity_entry = ttk.Entry(main_frame, width=55)
-        self.quantity_entry.grid(row=1, column=1, pady=15, padx=(10, 0), sticky="ew")
-        
-        # Cena za jednostkę
-        ttk.Label(main_frame, text="Cena za Jednostkę (zł):").grid(row=2, column=0, sticky=tk.W, pady=15)
-        self.price_entry = ttk.Entry(main_frame, width=55)
-        self.price_entry.grid(row=2, column=1, pady=15, padx=(10, 0), sticky="ew")
-        
-        # Data transakcji
-        ttk.Label(main_frame, text="Data Transakcji:").grid(row=3, column=0, sticky=tk.W, pady=15)
-        self.date_entry = ttk.Entry(main_frame, width=55)
-        self.date_entry.grid(row=3, column=1, pady=15, padx=(10, 0), sticky="ew")
-        self.date_entry.insert(0, datetime.now().strftime("%Y-%m-%d"))
-        
-        # Opis
-        ttk.Label(main_frame, text="Opis:").grid(row=4, column=0, sticky=tk.W, pady=15)
-        self.description_entry = ttk.Entry(main_frame, width=55)
-        self.description_entry.grid(row=4, column=1, pady=15, padx=(10, 0), sticky="ew")
-        
-        # Informacja o dostępności (tylko dla sprzedaży)
-        if self.transaction_type == "Sprzedaż":
-            self.info_label = ttk.Label(main_frame, text="", foreground="blue", font=("Arial", 11, "bold"))
-            self.info_label.grid(row=5, column=0, columnspan=2, pady=10)
-            self.gold_combo.bind('<<ComboboxSelected>>', self.update_availability_info)
-            
-            # Dodaj również aktualizację przy zmianie ilości
-            self.quantity_entry.bind('<KeyRelease>', self.update_availability_info)
-        
-        # Przyciski z większymi czcionkami
-        button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=6, column=0, columnspan=2, pady=25)
-        
-        ttk.Button(button_frame, text=self.transaction_type.upper(), command=self.process_transaction, 
-                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
-        ttk.Button(button_frame, text="ANULUJ", command=self.dialog.destroy, 
-                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
-        
-        # Focus na pierwszym polu
-        self.gold_combo.focus()
-        
-        # Obsługa klawiszy
-        self.dialog.bind('<Return>', lambda event: self.process_transaction())
-        self.dialog.bind('<Escape>', lambda event: self.dialog.destroy())
-    
-    def update_availability_info(self, event=None):
-        """Aktualizuje informację o dostępności złota."""
-        if self.transaction_type == "Sprzedaż":
-            gold_type = self.gold_combo.get()
-            if gold_type and gold_type in self.gold_data:
-                gold_id = self.gold_data[gold_type]
-                available = self.db.get_gold_quantity(gold_id)
-                
-                # Sprawdź ile użytkownik chce sprzedać
-                try:
-                    quantity_str = self.quantity_entry.get().strip()
-                    if quantity_str:
-                        requested = float(quantity_str)
-                        if requested > available:
-                            self.info_label.config(text=f"⚠️ Dostępne: {available:.1f} - NIEWYSTARCZAJĄCE!", 
-                                                  foreground="red")
-                        else:
-                            remaining = available - requested
-                            self.info_label.config(text=f"✓ Dostępne: {available:.1f} - Po sprzedaży zostanie: {remaining:.1f}", 
-                                                  foreground="green")
-                    else:
-                        self.info_label.config(text=f"Dostępne w magazynie: {available:.1f}", 
-                                              foreground="blue")
-                except ValueError:
-                    self.info_label.config(text=f"Dostępne w magazynie: {available:.1f}", 
-                                          foreground="blue")
-    
-    def process_transaction(self):
-        """Przetwarza transakcję."""
-        try:
-            # Walidacja danych
-            gold_type = self.gold_combo.get()
-            if not gold_type:
-                messagebox.showerror("Błąd", "Wybierz typ złota!")
-                return
-            
-            quantity_str = self.quantity_entry.get().strip()
-            if not quantity_str:
-                messagebox.showerror("Błąd", "Wprowadź ilość!")
-                return
-            
-            quantity = float(quantity_str)  # Zmiana na float dla elastyczności
-            if quantity <= 0:
-                messagebox.showerror("Błąd", "Ilość musi być dodatnia!")
-                return
-            
-            price_str = self.price_entry.get().strip()
-            if not price_str:
-                messagebox.showerror("Błąd", "Wprowadź cenę!")
-                return
-            
-            price = float(price_str)
-            if price <= 0:
-                messagebox.showerror("Błąd", "Cena musi być dodatnia!")
-                return
-            
-            date = self.date_entry.get().strip()
-            if not date:
-                messagebox.showerror("Błąd", "Wprowadź datę!")
-                return
-            
-            description = self.description_entry.get().strip()
-            gold_id = self.gold_data[gold_type]
-            
-            # Walidacja formatu daty
-            try:
-                datetime.strptime(date, "%Y-%m-%d")
-            except ValueError:
-                messagebox.showerror("Błąd", "Data musi być w formacie YYYY-MM-DD!")
-                return
-            
-            description = self.description_entry.get().strip()
-            gold_id = self.gold_data[gold_type]
-            
-            # Dodatkowa walidacja dla sprzedaży
-            if self.transaction_type == "Sprzedaż":
-                available = self.db.get_gold_quantity(gold_id)
-                if available < quantity:
-                    messagebox.showerror("Błąd", f"Niewystarczająca ilość w magazynie!\nDostępne: {available}, Wymagane: {quantity}")
-                    return
-            
-            # Dodawanie transakcji
-            if self.db.add_transaction(gold_id, self.transaction_type, quantity, price, date, description):
-                total_value = quantity * price
-                messagebox.showinfo("Sukces", 
-                    f"Transakcja {self.transaction_type.lower()} została zapisana!\n"
-                    f"Ilość: {quantity} szt.\n"
-                    f"Cena jednostkowa: {price:.2f} zł\n"
-                    f"Wartość całkowita: {total_value:.2f} zł")
-                self.result = True
-                
-                # Odśwież główne okno natychmiast po transakcji
-                if self.main_app:
-                    self.main_app.refresh_inventory()
-                    self.main_app.refresh_transaction_history()
-                
-                self.dialog.destroy()
-            else:
-                messagebox.showerror("Błąd", "Błąd podczas zapisywania transakcji!")
-        
-        except ValueError as e:
-            if "invalid literal for int()" in str(e):
-                messagebox.showerror("Błąd", "Ilość musi być liczbą całkowitą!")
-            else:
-                messagebox.showerror("Błąd", "Cena musi być liczbą!")
-        except Exception as e:
-            messagebox.showerror("Błąd", f"Wystąpił błąd: {str(e)}")
-
-
-class SingleTransactionEditDialog:
-    """Dialog edycji pojedynczej transakcji."""
-    
-    def __init__(self, parent, db: GoldDatabase, transaction_id: int, main_app=None):
-        self.db = db
-        self.transaction_id = transaction_id
-        self.result = False
-        self.main_app = main_app
-        
-        # Tworzenie okna
-        self.dialog = tk.Toplevel(parent)
-        self.dialog.title("Edytuj Transakcję")
-        self.dialog.geometry("750x600")
-        self.dialog.resizable(True, True)
-        
-        # Konfiguracja czcionek dla dialogu
-        self.dialog.option_add('*Font', 'Arial 11')
-        
-        # Centrowanie okna
-        self.dialog.transient(parent)
-        self.center_window()
-        
-        # Wczytaj dane transakcji
-        self.transaction_data = self.db.get_transaction_by_id(transaction_id)
-        if not self.transaction_data:
-            messagebox.showerror("Błąd", "Nie można wczytać danych transakcji!")
-            self.dialog.destroy()
-            return
-        
-        self.create_widgets()
-        self.load_transaction_data()
-        
-        # Grab set dopiero po pełnym utworzeniu okna
-        self.dialog.grab_set()
-    
-    def center_window(self):
-        """Centruje okno na ekranie."""
-        self.dialog.update_idletasks()
-        width = 950
-        height = 800
-        x = (self.dialog.winfo_screenwidth() // 2) - (width // 2)
-        y = (self.dialog.winfo_screenheight() // 2) - (height // 2)
-        self.dialog.geometry(f"{width}x{height}+{x}+{y}")
-    
-    def create_widgets(self):
-        """Tworzy interfejs dialogu."""
-        main_frame = ttk.Frame(self.dialog, padding="25")
-        main_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Konfiguracja siatki
-        main_frame.columnconfigure(1, weight=1)
-        
-        # Informacja o transakcji
-        _, _, category, gold_type, purity, trans_type, quantity, price, date, description = self.transaction_data
-        info_text = f"Edytuj transakcję: {trans_type} - {category} {gold_type} ({purity:.1f}%)"
-        ttk.Label(main_frame, text=info_text, font=("Arial", 12, "bold"), 
-                 foreground="blue").grid(row=0, column=0, columnspan=2, pady=(0, 20))
-        
-        # Typ złota (tylko do wyświetlenia)
-        ttk.Label(main_frame, text="Typ Złota:", font=("Arial", 12)).grid(row=1, column=0, sticky=tk.W, pady=15)
-        self.gold_combo = ttk.Combobox(main_frame, width=45, state="readonly", font=("Arial", 11))
-        self.gold_combo.grid(row=1, column=1, pady=15, padx=(15, 0), sticky="ew")
-        
-        # Pobierz typy złota
-        gold_types = self.db.get_gold_types()
-        type_names = []
-        self.gold_data = {}
-        
-        for gold_id, cat, gt, pur, unit in gold_types:
-            display_name = f"{cat} - {gt} ({pur:.1f}%)"
-            type_names.append(display_name)
-            self.gold_data[display_name] = gold_id
-        
-        self.gold_combo['values'] = type_names
-        
-        # Typ transakcji (tylko do wyświetlenia)
-        ttk.Label(main_frame, text="Typ Transakcji:", font=("Arial", 12)).grid(row=2, column=0, sticky=tk.W, pady=15)
-        self.trans_type_combo = ttk.Combobox(main_frame, width=45, state="readonly", font=("Arial", 11))
-        self.trans_type_combo['values'] = ("Kupno", "Sprzedaż")
-        self.trans_type_combo.grid(row=2, column=1, pady=15, padx=(15, 0), sticky="ew")
-        
-        # Ilość
-        ttk.Label(main_frame, text="Ilość:", font=("Arial", 12)).grid(row=3, column=0, sticky=tk.W, pady=15)
-        self.quantity_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
-        self.quantity_entry.grid(row=3, column=1, pady=15, padx=(15, 0), sticky="ew")
-        
-        # Cena za jednostkę
-        ttk.Label(main_frame, text="Cena za Jednostkę (zł):", font=("Arial", 12)).grid(row=4, column=0, sticky=tk.W, pady=15)
-        self.price_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
-        self.price_entry.grid(row=4, column=1, pady=15, padx=(15, 0), sticky="ew")
-        
-        # Data transakcji
-        ttk.Label(main_frame, text="Data Transakcji:", font=("Arial", 12)).grid(row=5, column=0, sticky=tk.W, pady=15)
-        self.date_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
-        self.date_entry.grid(row=5, column=1, pady=15, padx=(15, 0), sticky="ew")
-        
-        # Opis
-        ttk.Label(main_frame, text="Opis:", font=("Arial", 12)).grid(row=6, column=0, sticky=tk.W, pady=15)
-        self.description_entry = ttk.Entry(main_frame, width=45, font=("Arial", 11))
-        self.description_entry.grid(row=6, column=1, pady=15, padx=(15, 0), sticky="ew")
-        
-        # Informacja o dostępności (dla sprzedaży)
-        self.info_label = ttk.Label(main_frame, text="", font=("Arial", 11, "bold"))
-        self.info_label.grid(row=7, column=0, columnspan=2, pady=15)
-        
-        # Przyciski
-        button_frame = ttk.Frame(main_frame)
-        button_frame.grid(row=8, column=0, columnspan=2, pady=25)
-        
-        ttk.Button(button_frame, text="ZAPISZ ZMIANY", command=self.save_changes, 
-                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
-        ttk.Button(button_frame, text="USUŃ", command=self.delete_transaction, 
-                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
-        ttk.Button(button_frame, text="ANULUJ", command=self.dialog.destroy, 
-                  width=15, style="Big.TButton").pack(side=tk.LEFT, padx=10)
-        
-        # Obsługa klawiszy
-        self.dialog.bind('<Return>', lambda event: self.save_changes())
-        self.dialog.bind('<Escape>', lambda event: self.dialog.destroy())
-        
-        # Bind dla sprawdzania dostępności
-        self.trans_type_combo.bind('<<ComboboxSelected>>', self.update_availability_info)
-        self.quantity_entry.bind('<KeyRelease>', self.update_availability_info)
-        self.gold_combo.bind('<<ComboboxSelected>>', self.update_availability_info)
-    
-    def load_transaction_data(self):
-        """Wczytuje dane transakcji do formularza."""
-        _, gold_type_id, category, gold_type, purity, trans_type, quantity, price, date, description = self.transaction_data
-        
-        # Ustaw typ złota
-        display_name = f"{category} - {gold_type} ({purity:.1f}%)"
-        self.gold_combo.set(display_name)
-        
-        # Ustaw typ transakcji
-        self.trans_type_combo.set(trans_type)
-        
-        # Ustaw pozostałe pola
-        self.quantity_entry.insert(0, str(quantity))
-        self.price_entry.insert(0, str(price))
-        self.date_entry.insert(0, date)
-        self.description_entry.insert(0, description or "")
-        
-        # Aktualizuj informację o dostępności
-        self.update_availability_info()
-    
-    def update_availability_info(self, event=None):
-        """Aktualizuje informację o dostępności złota."""
-        trans_type = self.trans_type_combo.get()
-        gold_type = self.gold_combo.get()
-        
-        if trans_type == "Sprzedaż" and gold_type and gold_type in self.gold_data:
-            gold_id = self.gold_data[gold_type]
-            available = self.db.get_gold_quantity(gold_id)
-            
-            # Sprawdź ile użytkownik chce sprzedać
-            try:
-                quantity_str = self.quantity_entry.get().strip()
-                if quantity_str:
-                    requested = float(quantity_str)
-                    if requested > available:
-                        self.info_label.config(text=f"⚠️ Dostępne: {available:.1f} - NIEWYSTARCZAJĄCE!", 
-                                              foreground="red")
-                    else:
-                        remaining = available - requested
-                        self.info_label.config(text=f"✓ Dostępne: {available:.1f} - Po sprzedaży zostanie: {remaining:.1f}", 
-                                              foreground="green")
-                else:
-                    self.info_label.config(text=f"Dostępne w magazynie: {available:.1f}", 
-                                          foreground="blue")
-            except ValueError:
-                self.info_label.config(text=f"Dostępne w magazynie: {available:.1f}", 
-                                      foreground="blue")
-        else:
-            self.info_label.config(text="", foreground="black")
-    
-    def save_changes(self):
-        """Zapisuje zmiany w transakcji."""
-        try:
-            # Walidacja danych
-            gold_type = self.gold_combo.get()
-            if not gold_type:
-                messagebox.showerror("Błąd", "Wybierz typ złota!")
-                return
-            
-            trans_type = self.trans_type_combo.get()
-            if not trans_type:
-                messagebox.showerror("Błąd", "Wybierz typ transakcji!")
-                return
-            
-            quantity = float(self.quantity_entry.get())
-            if quantity <= 0:
-                messagebox.showerror("Błąd", "Ilość musi być dodatnia!")
-                return
-            
-            price = float(self.price_entry.get())
-            if price <= 0:
-                messagebox.showerror("Błąd", "Cena musi być dodatnia!")
-                return
-            
-            date = self.date_entry.get().strip()
-            if not date:
-                messagebox.showerror("Błąd", "Wprowadź datę!")
-                return
-            
-            description = self.description_entry.get().strip()
-            gold_id = self.gold_data[gold_type]
-            
-            # Aktualizuj transakcję
-            if self.db.update_transaction(self.transaction_id, gold_id, trans_type, quantity, price, date, description):
-                messagebox.showinfo("Sukces", "Transakcja została zaktualizowana!")
-                self.result = True
-                
-                # Odśwież główne okno
-                if self.main_app:
-                    self.main_app.refresh_inventory()
-                    self.main_app.refresh_transaction_history()
-                
-                self.dialog.destroy()
-            else:
-                messagebox.showerror("Błąd", "Nie można zaktualizować transakcji!\nSprawdź czy masz wystarczającą ilość w magazynie.")
-        
-        except ValueError:
-            messagebox.showerror("Błąd", "Ilość i cena muszą być liczbami!")
-        except Exception as e:
-            messagebox.showerror("Błąd", f"Wystąpił błąd: {str(e)}")
-    
-    def delete_transaction(self):
-        """Usuwa transakcję."""
-        if messagebox.askyesno("Potwierdzenie", 
-                              "Czy na pewno chcesz usunąć tę transakcję?\nTa operacja jest nieodwracalna!"):
-            if self.db.delete_transaction(self.transaction_id):
-                messagebox.showinfo("Sukces", "Transakcja została usunięta!")
-                self.result = True
-                
-                # Odśwież główne okno
-                if self.main_app:
-                    self.main_app.refresh_inventory()
-                    self.main_app.refresh_transaction_history()
-                
-                self.dialog.destroy()
-            else:
-                messagebox.showerror("Błąd", "Nie można usunąć transakcji!")
-
-
-def main():
+def main(argv: Optional[List[str]] = None):
     """Główna funkcja programu."""
+    parser = argparse.ArgumentParser(description="Magazyn Złota")
+    parser.add_argument("--fast-start", action="store_true",
+                        help="pokaż okno od razu, a bazę i dane wczytaj po jego wyświetleniu")
+    parser.add_argument("--profile-startup", action="store_true", help="wypisz czas poszczególnych faz startu")
+    parser.add_argument("--dump-query-stats", metavar="PLIK",
+                        help="zapisz statystyki zapytań do pliku JSON przy zamknięciu")
+    args = parser.parse_args(argv)
+    
+    timer = StartupTimer(args.profile_startup, start=_MODULE_START)
+    timer.mark("importy")
     try:
-        app = GoldVaultApp()
+        config = load_config()
+        fast_start = args.fast_start or config.getboolean("ui", "fast_start")
+        dump_path = args.dump_query_stats or config.get("profiler", "dump_on_exit")
+        # Statystyki do pliku wymagają profilowania, nawet gdy w konfiguracji jest wyłączone
+        app = GoldVaultApp(config=config, fast_start=fast_start, startup_timer=timer, profile_queries=bool(dump_path))
         app.run()
+        
+        profiler = getattr(app.db, "profiler", None)
+        if dump_path and profiler is not None:
+            profiler.dump_json(dump_path)
     except Exception as e:
         messagebox.showerror("Błąd krytyczny", f"Wystąpił nieoczekiwany błąd:\n{str(e)}")
         print(f"Błąd: {e}")
@@ -0,0 +1,130 @@
+"""
+Kolumnowa migawka historii transakcji do obliczeń zbiorczych (sumy, średnie, sumy per kategoria).
+
+Zamiast listy krotek każda kolumna jest jedną tablicą array.array liczb maszynowych,
+wypełnianą porcjami wprost z kursora (GoldDatabase.load_history_columns). Milion
+transakcji zajmuje kilkadziesiąt MB, a sumy liczą iteratory w C (sum, map, compress).
+Rodzaj transakcji jest zapisany jako bajt 1 (Kupno) / 0 (Sprzedaż), więc maska
+zakupów to gotowy bufor dla itertools.compress.
+
+Ilości i ceny są liczbami całkowitymi (tysięczne części jednostki, grosze - patrz
+units), więc sumy są dokładne niezależnie od liczby transakcji.
+
+NumPy nie jest wymagany; to_numpy() udostępnia kolumny jako tablice NumPy bez kopiowania.
+"""
+import math
+from array import array
+from itertools import compress, repeat
+from operator import add, floordiv, mul
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from units import QUANTITY_SCALE, line_value
+
+# Kolumny migawki i typy tablic array.array; kolejność odpowiada kolumnom zapytania.
+# Waga i cena za gram mogą być nieznane (NULL w starych transakcjach) - są trzymane jako "d" z NaN.
+HISTORY_COLUMN_TYPES = (
+    ("id", "q"),
+    ("gold_type_id", "q"),
+    ("type_code", "b"),
+    ("quantity", "q"),
+    ("weight_total", "d"),
+    ("price_per_unit", "q"),
+    ("price_per_gram", "d"),
+    ("date", "q"),
+)
+
+# Kod rodzaju transakcji w kolumnie type_code
+BUY = 1
+SELL = 0
+
+# Liczba wierszy pobieranych z kursora naraz przy wypełnianiu kolumn
+FETCH_SIZE = 10000
+
+
+def _line_values(quantities: Iterable[int], prices: Iterable[int]) -> Iterable[int]:
+    """Wartości transakcji w groszach (jak units.line_value), liczone iteratorami w C."""
+    products = map(mul, quantities, prices)
+    return map(floordiv, map(add, products, repeat(QUANTITY_SCALE // 2)), repeat(QUANTITY_SCALE))
+
+
+class HistoryColumns:
+    """
+    Kolumny historii transakcji: id, gold_type_id, type_code (BUY/SELL), quantity, weight_total,
+    price_per_unit, price_per_gram (brak wartości - NaN) oraz date (sekundy od 1970-01-01).
+    Jednostki jak w bazie: ilość w tysięcznych częściach jednostki, waga w miligramach, ceny w groszach.
+    categories mapuje gold_type_id na kategorię typu złota.
+    """
+
+    def __init__(self, categories: Optional[Dict[int, str]] = None):
+        for name, typecode in HISTORY_COLUMN_TYPES:
+            setattr(self, name, array(typecode))
+        self.categories: Dict[int, str] = categories or {}
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def extend(self, rows: List[Tuple]):
+        """Dopisuje porcję wierszy (krotki w kolejności HISTORY_COLUMN_TYPES)."""
+        if not rows:
+            return
+        for (name, typecode), values in zip(HISTORY_COLUMN_TYPES, zip(*rows)):
+            if typecode == "d" and None in values:
+                values = [math.nan if value is None else value for value in values]
+            getattr(self, name).extend(values)
+
+    def summary(self) -> dict:
+        """
+        Sumy i średnie całej migawki: liczba transakcji, ilości i wartości kupna/sprzedaży (w groszach,
+        suma wartości zaokrąglonych do grosza transakcji), stan netto oraz średnie ceny jednostkowe
+        (ważone ilością, w groszach za jednostkę).
+        """
+        # Maska zakupów; sprzedaż to różnica sumy wszystkich transakcji i zakupów
+        buys = self.type_code.tobytes()
+        purchases = buys.count(BUY)
+        bought_quantity = sum(compress(self.quantity, buys))
+        bought_value = sum(_line_values(compress(self.quantity, buys), compress(self.price_per_unit, buys)))
+        sold_quantity = sum(self.quantity) - bought_quantity
+        sold_value = sum(_line_values(self.quantity, self.price_per_unit)) - bought_value
+        return {
+            "transactions": len(self),
+            "purchases": purchases,
+            "sales": len(self) - purchases,
+            "bought_quantity": bought_quantity,
+            "sold_quantity": sold_quantity,
+            "net_quantity": bought_quantity - sold_quantity,
+            "bought_value": bought_value,
+            "sold_value": sold_value,
+            "avg_buy_price": bought_value * QUANTITY_SCALE / bought_quantity if bought_quantity else None,
+            "avg_sell_price": sold_value * QUANTITY_SCALE / sold_quantity if sold_quantity else None,
+        }
+
+    def totals_by_category(self) -> Dict[str, dict]:
+        """Ilości i wartości kupna/sprzedaży w podziale na kategorie typów złota."""
+        per_type: Dict[int, List[int]] = {}
+        for gold_type_id, code, quantity, price in zip(self.gold_type_id, self.type_code,
+                                                       self.quantity, self.price_per_unit):
+            totals = per_type.get(gold_type_id)
+            if totals is None:
+                totals = per_type[gold_type_id] = [0, 0, 0, 0]
+            if code == BUY:
+                totals[0] += quantity
+                totals[2] += line_value(quantity, price)
+            else:
+                totals[1] += quantity
+                totals[3] += line_value(quantity, price)
+
+        result: Dict[str, dict] = {}
+        for gold_type_id, totals in per_type.items():
+            category = result.setdefault(self.categories.get(gold_type_id, ""), {
+                "bought_quantity": 0, "sold_quantity": 0, "bought_value": 0, "sold_value": 0})
+            category["bought_quantity"] += totals[0]
+            category["sold_quantity"] += totals[1]
+            category["bought_value"] += totals[2]
+            category["sold_value"] += totals[3]
+        return dict(sorted(result.items()))
+
+    def to_numpy(self) -> Dict[str, "numpy.ndarray"]:
+        """Kolumny jako tablice NumPy współdzielące pamięć z array.array (wymaga pakietu numpy)."""
+        import numpy
+        return {name: numpy.frombuffer(getattr(self, name), dtype=numpy.dtype(typecode))
+                for name, typecode in HISTORY_COLUMN_TYPES}
@@ -0,0 +1,307 @@
+"""Klient usługi gold_server implementujący interfejs GoldStorage."""
+import http.client
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from database import (ARCHIVE_COLUMNS, AUDIT_COLUMNS, BALANCE_MISMATCH_COLUMNS, GOLD_TYPE_COLUMNS,
+                      INVENTORY_COLUMNS, LEDGER_COLUMNS, MONTHLY_COLUMNS, TRANSACTION_DETAIL_COLUMNS,
+                      VALUATION_COLUMNS)
+from change_events import ChangeBus, ChangeEvent, INVENTORY, TRANSACTION, INSERT, UPDATE, DELETE, RELOAD
+from records import GoldType, InventoryItem, TransactionRow
+from storage import GoldStorage
+
+HISTORY_PAGE_SIZE = 1000
+
+
+class HttpGoldStorage(GoldStorage):
+    """
+    Magazyn danych działający przez HTTP/JSON na centralnym serwerze (gold_server.py).
+    Powiadomienia o zmianach dotyczą zapisów tego klienta; id nadane przez serwer (nowe transakcje,
+    nowe typy złota) oraz poprzedni typ złota edytowanej transakcji nie są znane - zdarzenia mają wtedy puste ids.
+    """
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8765", timeout: float = 10.0):
+        """Zapamiętuje adres serwera; połączenie jest otwierane przy pierwszym żądaniu."""
+        url = urlsplit(base_url)
+        self.base_url = base_url
+        self.host = url.hostname or "127.0.0.1"
+        self.port = url.port or 80
+        self.timeout = timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+        self.changes = ChangeBus()
+        self._audit_seen: Optional[int] = None
+        self._last_write: Tuple[int, ...] = ()
+
+    def _request(self, method: str, path: str, params: Optional[dict] = None, body: Any = None) -> Tuple[int, Any]:
+        """Wysyła żądanie przez podtrzymywane połączenie (z jednym ponowieniem po zerwaniu)."""
+        if params:
+            path += "?" + urlencode({key: value for key, value in params.items() if value is not None})
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+
+        for attempt in range(2):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._conn.request(method, path, body=payload, headers=headers)
+                response = self._conn.getresponse()
+                return response.status, json.loads(response.read().decode("utf-8"))
+            except (http.client.HTTPException, ConnectionError):
+                self._conn.close()
+                self._conn = None
+                if attempt:
+                    raise
+
+    def _get_rows(self, path: str, columns: Tuple[str, ...], params: Optional[dict] = None,
+                  error_message: str = "Błąd pobierania danych", record_class=None) -> List[Tuple]:
+        """
+        Pobiera listę obiektów JSON i zamienia je na krotki w kolejności kolumn
+        albo na rekordy record_class (tak jak zwraca je GoldDatabase).
+        """
+        try:
+            status, data = self._request("GET", path, params)
+            if status != 200:
+                print(f"{error_message}: {data.get('error', status)}")
+                return []
+            if record_class is not None:
+                return [record_class.from_dict(item) for item in data]
+            return [tuple(item[column] for column in columns) for item in data]
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            print(f"{error_message}: {e}")
+            return []
+
+    def _write(self, method: str, path: str, body: Any = None, error_message: str = "Błąd zapisu",
+               events: Optional[List[ChangeEvent]] = None) -> bool:
+        """
+        Wykonuje operację zapisu; zwraca True, jeśli serwer ją przyjął (wtedy publikuje events).
+        Wpisy dziennika zapisu zwrócone przez serwer (audit_ids) są dostępne przez take_last_write.
+        """
+        try:
+            status, data = self._request(method, path, body=body)
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            print(f"{error_message}: {e}")
+            return False
+        if status not in (200, 201):
+            return False
+        self._last_write = tuple(data.get("audit_ids", ())) if isinstance(data, dict) else ()
+        self.changes.publish(events or [])
+        return True
+
+    def add_gold_type(self, category: str, gold_type: str, unit_weight: int, purity: float,
+                      unit: str = "szt", notes: str = "") -> bool:
+        """Dodaje nowy typ złota."""
+        return self._write("POST", "/gold-types", {"category": category, "type": gold_type, "unit_weight": unit_weight,
+                                                   "purity": purity, "unit": unit, "notes": notes},
+                           "Błąd dodawania typu złota", [ChangeEvent(INVENTORY, INSERT)])
+
+    def get_inventory(self, sort_by: str = "category", limit: Optional[int] = None) -> List[InventoryItem]:
+        """Pobiera aktualny stan magazynu."""
+        params = {"sort": sort_by}
+        if limit is not None:
+            params["limit"] = limit
+        return self._get_rows("/inventory", INVENTORY_COLUMNS, params, "Błąd pobierania magazynu", InventoryItem)
+
+    def get_inventory_by_ids(self, gold_type_ids: List[int]) -> Dict[int, InventoryItem]:
+        """Pobiera pozycje stanu magazynu wskazanych typów złota (id typu -> pozycja)."""
+        if not gold_type_ids:
+            return {}
+        try:
+            status, data = self._request("GET", "/inventory", {"ids": ",".join(str(value) for value in gold_type_ids)})
+            if status != 200:
+                print(f"Błąd pobierania magazynu: {data.get('error', status)}")
+                return {}
+            return {item["id"]: InventoryItem.from_dict(item) for item in data}
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            print(f"Błąd pobierania magazynu: {e}")
+            return {}
+
+    def get_gold_types(self) -> List[GoldType]:
+        """Pobiera listę typów złota."""
+        return self._get_rows("/gold-types", GOLD_TYPE_COLUMNS, error_message="Błąd pobierania typów złota",
+                              record_class=GoldType)
+
+    def get_gold_quantity(self, gold_type_id: int) -> int:
+        """Pobiera dostępną ilość danego typu złota."""
+        try:
+            status, data = self._request("GET", f"/gold-types/{gold_type_id}/quantity")
+            return data["quantity"] if status == 200 else 0
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            print(f"Błąd pobierania ilości złota: {e}")
+            return 0
+
+    def get_gold_categories(self) -> List[str]:
+        """Pobiera listę unikalnych kategorii złota."""
+        try:
+            status, data = self._request("GET", "/categories")
+            return data if status == 200 else []
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            print(f"Błąd pobierania kategorii złota: {e}")
+            return []
+
+    def add_transaction(self, gold_type_id: int, transaction_type: str, quantity: int,
+                        price_per_unit: int, transaction_date: str, description: str = "") -> bool:
+        """Dodaje transakcję i aktualizuje stan magazynu."""
+        return self._write("POST", "/transactions", {
+            "gold_type_id": gold_type_id, "transaction_type": transaction_type, "quantity": quantity,
+            "price_per_unit": price_per_unit, "transaction_date": transaction_date, "description": description,
+        }, "Błąd dodawania transakcji", [ChangeEvent(TRANSACTION, INSERT), ChangeEvent(INVENTORY, UPDATE, [gold_type_id])])
+
+    def get_transaction_by_id(self, transaction_id: int) -> Optional[Tuple]:
+        """Pobiera szczegóły transakcji po ID."""
+        try:
+            status, data = self._request("GET", f"/transactions/{transaction_id}")
+            if status != 200:
+                return None
+            return tuple(data[column] for column in TRANSACTION_DETAIL_COLUMNS)
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            print(f"Błąd pobierania transakcji: {e}")
+            return None
+
+    def get_transactions_with_id(self, sort_by: str = "date", date_from: Optional[str] = None,
+                                 date_to: Optional[str] = None, limit: Optional[int] = None,
+                                 offset: int = 0) -> List[TransactionRow]:
+        """
+        Pobiera transakcje dla głównego okna (opcjonalnie jedną stronę: limit/offset).
+        Serwer zwraca kolumny LEDGER_COLUMNS - pozostałe pola rekordów mają wartość None.
+        """
+        params = {"sort": sort_by, "date_from": date_from, "date_to": date_to, "limit": limit,
+                  "offset": offset if limit is not None else None}
+        return self._get_rows("/ledger", LEDGER_COLUMNS, params, "Błąd pobierania transakcji", TransactionRow)
+
+    def get_transactions_by_ids(self, transaction_ids: List[int]) -> List[TransactionRow]:
+        """Pobiera wskazane transakcje (od najnowszych)."""
+        if not transaction_ids:
+            return []
+        return self._get_rows("/ledger", TransactionRow._fields,
+                              {"ids": ",".join(str(value) for value in transaction_ids)},
+                              "Błąd pobierania transakcji", TransactionRow)
+
+    def get_all_transactions_for_history(self, sort_by: str = "date", filters: Optional[dict] = None,
+                                         limit: Optional[int] = None, offset: int = 0) -> List[TransactionRow]:
+        """
+        Pobiera transakcje dla okna historii.
+        Serwer zwraca dane stronami, więc bez limitu pobierane są kolejne strony aż do końca.
+        """
+        params = {"sort": sort_by}
+        params.update({key: value for key, value in (filters or {}).items() if value})
+
+        rows: List[TransactionRow] = []
+        try:
+            while limit is None or len(rows) < limit:
+                page_size = HISTORY_PAGE_SIZE if limit is None else min(HISTORY_PAGE_SIZE, limit - len(rows))
+                status, data = self._request("GET", "/transactions",
+                                             dict(params, offset=offset + len(rows), page_size=page_size))
+                if status != 200:
+                    print(f"Błąd pobierania historii transakcji: {data.get('error', status)}")
+                    break
+                items = data["items"]
+                rows.extend(TransactionRow.from_dict(item) for item in items)
+                if len(items) < page_size:
+                    break
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            print(f"Błąd pobierania historii transakcji: {e}")
+        return rows
+
+    def update_transaction(self, transaction_id: int, gold_type_id: int, transaction_type: str, quantity: int,
+                           price_per_unit: int, transaction_date: str, description: str) -> bool:
+        """Aktualizuje istniejącą transakcję (także typ złota i rodzaj transakcji)."""
+        return self._write("PUT", f"/transactions/{transaction_id}", {
+            "gold_type_id": gold_type_id, "transaction_type": transaction_type, "quantity": quantity,
+            "price_per_unit": price_per_unit,
+            "transaction_date": transaction_date, "description": description,
+        }, "Błąd aktualizacji transakcji", [ChangeEvent(TRANSACTION, UPDATE, [transaction_id]), ChangeEvent(INVENTORY, UPDATE)])
+
+    def delete_transaction(self, transaction_id: int) -> bool:
+        """Usuwa transakcję i przywraca stan magazynu."""
+        return self._write("DELETE", f"/transactions/{transaction_id}", error_message="Błąd usuwania transakcji",
+                           events=[ChangeEvent(TRANSACTION, DELETE, [transaction_id]), ChangeEvent(INVENTORY, UPDATE)])
+
+    def delete_transactions(self, transaction_ids: List[int]) -> bool:
+        """Usuwa wiele transakcji atomowo."""
+        return self._write("POST", "/transactions/batch-delete", {"ids": list(transaction_ids)},
+                           "Błąd usuwania transakcji",
+                           [ChangeEvent(TRANSACTION, DELETE, transaction_ids), ChangeEvent(INVENTORY, UPDATE)])
+
+    def update_transactions(self, transaction_ids: List[int], transaction_date: Optional[str] = None,
+                            description: Optional[str] = None, price_per_unit: Optional[int] = None) -> bool:
+        """Zmienia wspólne pola wielu transakcji atomowo."""
+        return self._write("POST", "/transactions/batch-update", {
+            "ids": list(transaction_ids), "transaction_date": transaction_date, "description": description,
+            "price_per_unit": price_per_unit}, "Błąd aktualizacji transakcji",
+            [ChangeEvent(TRANSACTION, UPDATE, transaction_ids)])
+
+    def get_valuation(self) -> List[Tuple]:
+        """Pobiera wycenę magazynu w podziale na kategorie."""
+        try:
+            status, data = self._request("GET", "/valuation")
+            if status != 200:
+                return []
+            return [tuple(item[column] for column in VALUATION_COLUMNS) for item in data["categories"]]
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            print(f"Błąd wyceny magazynu: {e}")
+            return []
+
+    def get_audit_log(self, entity: Optional[str] = None, entity_id: Optional[int] = None,
+                      period: Optional[str] = None, limit: Optional[int] = 100) -> List[Tuple]:
+        """Pobiera wpisy dziennika zmian, od najnowszych."""
+        params = {"entity": entity, "entity_id": entity_id, "period": period, "limit": limit}
+        return self._get_rows("/audit", AUDIT_COLUMNS, {key: value for key, value in params.items() if value is not None},
+                              "Błąd pobierania dziennika zmian")
+
+    def archive_year(self, year: int) -> Optional[int]:
+        """Przenosi transakcje zamkniętego roku do archiwum na serwerze."""
+        try:
+            status, data = self._request("POST", "/archives", body={"year": year})
+            if status != 200:
+                print(f"Błąd archiwizacji roku {year}: {data.get('error', status)}")
+                return None
+            self.changes.publish([ChangeEvent(TRANSACTION, RELOAD)])
+            return data["archived"]
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            print(f"Błąd archiwizacji roku {year}: {e}")
+            return None
+
+    def take_last_write(self) -> Tuple[int, ...]:
+        """Zwraca (i zapomina) wpisy dziennika ostatniego zapisu tego klienta."""
+        audit_ids, self._last_write = self._last_write, ()
+        return audit_ids
+
+    def revert_changes(self, audit_ids: Sequence[int]) -> bool:
+        """Cofa zapis opisany wpisami dziennika (na serwerze, w jednej transakcji bazy)."""
+        return self._write("POST", "/changes/revert", {"audit_ids": list(audit_ids)}, "Błąd cofania zmian",
+                           [ChangeEvent(TRANSACTION, UPDATE), ChangeEvent(INVENTORY, UPDATE)])
+
+    def poll_changes(self) -> bool:
+        """
+        Pobiera z serwera zdarzenia zapisane od poprzedniego wywołania (GET /changes) i publikuje je.
+        Serwer nie odróżnia stanowisk, więc własne zapisy wracają tu drugi raz - z id, których
+        zdarzenia zapisu nie miały. Pierwsze wywołanie ustala tylko punkt odniesienia.
+        """
+        try:
+            status, data = self._request("GET", "/changes", {"after": self._audit_seen})
+            if status != 200:
+                print(f"Błąd odczytu zmian: {data.get('error', status)}")
+                return False
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            print(f"Błąd odczytu zmian: {e}")
+            return False
+        events = [ChangeEvent.from_dict(event) for event in data["events"]]
+        self._audit_seen = data["last_id"]
+        self.changes.publish(events)
+        return bool(events)
+
+    def get_archives(self) -> List[Tuple]:
+        """Pobiera listę archiwów rocznych."""
+        return self._get_rows("/archives", ARCHIVE_COLUMNS, None, "Błąd pobierania listy archiwów")
+
+    def get_monthly_totals(self) -> List[Tuple]:
+        """Pobiera podsumowania miesięczne transakcji."""
+        return self._get_rows("/monthly", MONTHLY_COLUMNS, None, "Błąd pobierania podsumowań miesięcznych")
+
+    def verify_balances(self) -> List[Tuple]:
+        """Zwraca rozbieżności między stanem magazynu a historią transakcji."""
+        status, data = self._request("GET", "/verify")
+        if status != 200:
+            raise RuntimeError(f"Błąd weryfikacji stanów magazynowych: {data.get('error', status)}")
+        return [tuple(item[column] for column in BALANCE_MISMATCH_COLUMNS) for item in data["mismatches"]]
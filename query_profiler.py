@@ -0,0 +1,167 @@
+"""
+Profilowanie metod GoldDatabase.
+
+Dla każdej metody zbierana jest liczba wywołań, łączny i maksymalny czas,
+liczba zwróconych wierszy oraz ostatnio wykonane zapytania SQL (przechwytywane
+przez sqlite3 trace callback). Wywołania wolniejsze niż próg trafiają do
+dziennika wolnych zapytań (logger "gold_vault.slow_queries").
+"""
+import functools
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Nazwa loggera wolnych zapytań; logging jest importowany dopiero przez QueryProfiler (szybszy start CLI)
+SLOW_QUERY_LOGGER = "gold_vault.slow_queries"
+
+MAX_SQL_LENGTH = 500
+
+
+class MethodStats:
+    """Statystyki wywołań jednej metody."""
+
+    __slots__ = ("name", "calls", "total_time", "max_time", "rows", "last_sql")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.rows = 0
+        self.last_sql: List[str] = []
+
+    @property
+    def avg_time(self) -> float:
+        """Średni czas wywołania w sekundach."""
+        return self.total_time / self.calls if self.calls else 0.0
+
+    def to_dict(self) -> dict:
+        """Zwraca statystyki w postaci słownika (czasy w milisekundach)."""
+        return {
+            "method": self.name,
+            "calls": self.calls,
+            "total_ms": round(self.total_time * 1000, 3),
+            "avg_ms": round(self.avg_time * 1000, 3),
+            "max_ms": round(self.max_time * 1000, 3),
+            "rows": self.rows,
+            "last_sql": self.last_sql,
+        }
+
+
+class _Call:
+    """Aktywne wywołanie metody - zbiera zapytania SQL wykonane w jego trakcie."""
+
+    __slots__ = ("name", "statements")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.statements: List[str] = []
+
+
+def _count_rows(result) -> int:
+    """Szacuje liczbę wierszy zwróconych przez metodę."""
+    if result is None or result is False:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
+
+
+class QueryProfiler:
+    """Zbiera statystyki wywołań metod bazy danych."""
+
+    def __init__(self, slow_query_ms: float = 100.0, slow_log_path: Optional[str] = None):
+        self.slow_query_seconds = slow_query_ms / 1000.0
+        self._stats: Dict[str, MethodStats] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        import logging
+        self.slow_query_logger = logging.getLogger(SLOW_QUERY_LOGGER)
+        if slow_log_path:
+            handler = logging.FileHandler(slow_log_path, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.slow_query_logger.addHandler(handler)
+            self.slow_query_logger.setLevel(logging.WARNING)
+
+    def _stack(self) -> List[_Call]:
+        """Stos aktywnych wywołań bieżącego wątku (metody mogą wywoływać inne metody)."""
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def trace(self, sql: str):
+        """Callback dla sqlite3.Connection.set_trace_callback - przypisuje SQL do bieżącego wywołania."""
+        stack = self._stack()
+        if stack:
+            stack[-1].statements.append(" ".join(sql.split())[:MAX_SQL_LENGTH])
+
+    def call(self, name: str, func: Callable, *args, **kwargs):
+        """Wywołuje func, mierząc czas i zapisując statystyki pod nazwą name."""
+        stack = self._stack()
+        call = _Call(name)
+        stack.append(call)
+        start = time.perf_counter()
+        rows = 0
+        try:
+            result = func(*args, **kwargs)
+            rows = _count_rows(result)
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            self.record(name, elapsed, rows, call.statements)
+
+    def record(self, name: str, elapsed: float, rows: int, statements: List[str]):
+        """Dopisuje pojedyncze wywołanie do statystyk."""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = MethodStats(name)
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.rows += rows
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+            if statements:
+                stats.last_sql = statements
+        if elapsed >= self.slow_query_seconds:
+            self.slow_query_logger.warning("Wolne wywołanie %s: %.1f ms, wierszy: %d, SQL: %s",
+                                           name, elapsed * 1000, rows, " | ".join(statements) or "-")
+
+    def top(self, limit: int = 20, key: str = "total_time") -> List[MethodStats]:
+        """Zwraca metody o największej wartości wskazanej statystyki."""
+        with self._lock:
+            stats = list(self._stats.values())
+        stats.sort(key=lambda item: getattr(item, key), reverse=True)
+        return stats[:limit]
+
+    def snapshot(self) -> List[dict]:
+        """Zwraca wszystkie statystyki jako listę słowników, od najbardziej kosztownych."""
+        return [stats.to_dict() for stats in self.top(limit=len(self._stats))]
+
+    def reset(self):
+        """Zeruje zebrane statystyki."""
+        with self._lock:
+            self._stats.clear()
+
+    def dump_json(self, path: str):
+        """Zapisuje statystyki do pliku JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"slow_query_ms": self.slow_query_seconds * 1000, "methods": self.snapshot()},
+                      f, ensure_ascii=False, indent=2)
+
+
+def profiled(method: Callable) -> Callable:
+    """Dekorator metod GoldDatabase - mierzy wywołanie, jeśli obiekt ma przypisany profiler."""
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = self.profiler
+        if profiler is None:
+            return method(self, *args, **kwargs)
+        return profiler.call(name, method, self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,130 @@
+"""
+Lekkie rekordy wierszy zwracanych przez GoldDatabase (magazyn, typy złota, transakcje).
+
+Klasy mają __slots__, więc wiersz nie ma słownika atrybutów, a kod wywołujący
+czyta pola po nazwie (transaction.quantity) zamiast rozpakowywać krotki po pozycji.
+Rekordy tworzy bezpośrednio row_factory kursora (record_factory). Kolumny
+o niewielu różnych wartościach (kategoria, typ, jednostka, rodzaj transakcji)
+wskazują w obrębie jednego wyniku na te same obiekty - przy milionie wierszy
+to większość oszczędności pamięci.
+
+Kwoty, wagi i ilości są liczbami całkowitymi w jednostkach podstawowych
+(grosze, miligramy, tysięczne części jednostki - patrz units); na złote
+i gramy zamieniają je dopiero formatery widoków.
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class Record:
+    """Baza rekordów: nazwy pól (_fields), porównywanie, iteracja po wartościach i zamiana na słownik."""
+
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+    # Pola współdzielone między wierszami jednego wyniku (patrz record_factory)
+    _shared: Tuple[str, ...] = ()
+
+    def __iter__(self):
+        """Wartości pól w kolejności _fields (zapis do CSV, wypisywanie w CLI)."""
+        return (getattr(self, name) for name in self._fields)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({values})"
+
+    def as_dict(self, columns: Optional[Tuple[str, ...]] = None) -> Dict[str, Any]:
+        """Słownik pól (wszystkich lub podanych kolumn) do serializacji JSON."""
+        return {name: getattr(self, name) for name in (columns or self._fields)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        """Tworzy rekord ze słownika (np. odpowiedzi JSON); brakujące pola mają wartość None."""
+        return cls(*(data.get(name) for name in cls._fields))
+
+
+class InventoryItem(Record):
+    """Pozycja stanu magazynu (get_inventory); wagi w miligramach, ilość w tysięcznych częściach jednostki."""
+
+    __slots__ = ("category", "type", "unit_weight", "purity", "quantity", "unit", "total_weight", "notes")
+    _fields = __slots__
+    _shared = ("category", "unit")
+
+    def __init__(self, category: str, type: str, unit_weight: int, purity: float, quantity: int, unit: str,
+                 total_weight: int, notes: Optional[str]):
+        self.category = category
+        self.type = type
+        self.unit_weight = unit_weight
+        self.purity = purity
+        self.quantity = quantity
+        self.unit = unit
+        self.total_weight = total_weight
+        self.notes = notes
+
+
+class GoldType(Record):
+    """Typ złota z listy wyboru (get_gold_types)."""
+
+    __slots__ = ("id", "category", "type", "purity", "unit")
+    _fields = __slots__
+    _shared = ("category", "unit")
+
+    def __init__(self, id: int, category: str, type: str, purity: float, unit: str):
+        self.id = id
+        self.category = category
+        self.type = type
+        self.purity = purity
+        self.unit = unit
+
+
+class TransactionRow(Record):
+    """
+    Transakcja z danymi typu złota (historia i lista transakcji głównego okna).
+    Ceny i wartość w groszach (cena za gram - grosze za gram), waga w miligramach.
+    """
+
+    __slots__ = ("id", "date", "category", "type", "purity", "transaction_type", "quantity", "unit",
+                 "weight_total", "price_per_unit", "price_per_gram", "total_value", "description", "gold_type_id")
+    _fields = __slots__
+    _shared = ("category", "type", "purity", "transaction_type", "unit")
+
+    def __init__(self, id: int, date: str, category: str, type: str, purity: float, transaction_type: str,
+                 quantity: int, unit: str, weight_total: Optional[int], price_per_unit: int,
+                 price_per_gram: Optional[int], total_value: int, description: Optional[str], gold_type_id: int):
+        self.id = id
+        self.date = date
+        self.category = category
+        self.type = type
+        self.purity = purity
+        self.transaction_type = transaction_type
+        self.quantity = quantity
+        self.unit = unit
+        self.weight_total = weight_total
+        self.price_per_unit = price_per_unit
+        self.price_per_gram = price_per_gram
+        self.total_value = total_value
+        self.description = description
+        self.gold_type_id = gold_type_id
+
+
+def record_factory(record_class) -> Callable:
+    """
+    Zwraca row_factory tworzące rekordy record_class z wierszy kursora (kolumny w kolejności _fields).
+    Wartości pól _shared są zapamiętywane, więc równe wartości w kolejnych wierszach to jeden obiekt.
+    Fabryka jest używana dla jednego zapytania - zapamiętane wartości znikają razem z kursorem.
+    """
+    shared = [(record_class._fields.index(name), {}.setdefault) for name in record_class._shared]
+
+    def factory(cursor, row):
+        row = list(row)
+        for position, setdefault in shared:
+            value = row[position]
+            row[position] = setdefault(value, value)
+        return record_class(*row)
+
+    return factory
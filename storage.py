@@ -0,0 +1,171 @@
+"""
+Interfejs magazynu danych aplikacji oraz wybór implementacji na podstawie konfiguracji.
+
+Dostępne implementacje:
+    sqlite  - GoldDatabase, plik bazy SQLite (domyślnie)
+    memory  - InMemoryGoldDatabase, baza SQLite w pamięci (np. do testów wydajności GUI)
+    http    - HttpGoldStorage, klient usługi gold_server
+"""
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from change_events import ChangeBus
+from records import GoldType, InventoryItem, TransactionRow
+
+
+class GoldStorage(ABC):
+    """
+    Operacje na magazynie złota, z których korzysta interfejs użytkownika.
+    Implementacje ustawiają atrybut changes (ChangeBus) i publikują w nim zdarzenia po każdym zapisie
+    oraz - przy wywołaniu poll_changes - zmiany zapisane przez inne procesy lub stanowiska.
+    Kwoty, wagi i ilości są liczbami całkowitymi: grosze, miligramy i tysięczne części jednostki (units).
+    """
+
+    changes: ChangeBus
+
+    @abstractmethod
+    def add_gold_type(self, category: str, gold_type: str, unit_weight: int, purity: float,
+                      unit: str = "szt", notes: str = "") -> bool:
+        """Dodaje nowy typ złota."""
+
+    @abstractmethod
+    def get_inventory(self, sort_by: str = "category", limit: Optional[int] = None) -> List[InventoryItem]:
+        """Pobiera aktualny stan magazynu (opcjonalnie tylko pierwsze limit pozycji)."""
+
+    @abstractmethod
+    def get_inventory_by_ids(self, gold_type_ids: List[int]) -> Dict[int, InventoryItem]:
+        """Pobiera pozycje stanu magazynu wskazanych typów złota (id typu -> pozycja)."""
+
+    @abstractmethod
+    def get_gold_types(self) -> List[GoldType]:
+        """Pobiera listę typów złota (id, kategoria, typ, czystość, jednostka)."""
+
+    @abstractmethod
+    def get_gold_quantity(self, gold_type_id: int) -> int:
+        """Pobiera dostępną ilość danego typu złota."""
+
+    @abstractmethod
+    def get_gold_categories(self) -> List[str]:
+        """Pobiera listę unikalnych kategorii złota."""
+
+    @abstractmethod
+    def add_transaction(self, gold_type_id: int, transaction_type: str, quantity: int,
+                        price_per_unit: int, transaction_date: str, description: str = "") -> bool:
+        """Dodaje transakcję i aktualizuje stan magazynu."""
+
+    @abstractmethod
+    def get_transaction_by_id(self, transaction_id: int) -> Optional[Tuple]:
+        """Pobiera szczegóły transakcji po ID."""
+
+    @abstractmethod
+    def get_transactions_with_id(self, sort_by: str = "date", date_from: Optional[str] = None,
+                                 date_to: Optional[str] = None, limit: Optional[int] = None,
+                                 offset: int = 0) -> List[TransactionRow]:
+        """Pobiera transakcje dla głównego okna (opcjonalnie jedną stronę: limit/offset)."""
+
+    @abstractmethod
+    def get_transactions_by_ids(self, transaction_ids: List[int]) -> List[TransactionRow]:
+        """Pobiera wskazane transakcje (w postaci wierszy list transakcji); brakujące są pomijane."""
+
+    @abstractmethod
+    def get_all_transactions_for_history(self, sort_by: str = "date", filters: Optional[dict] = None,
+                                         limit: Optional[int] = None, offset: int = 0) -> List[TransactionRow]:
+        """Pobiera transakcje dla okna historii."""
+
+    @abstractmethod
+    def update_transaction(self, transaction_id: int, gold_type_id: int, transaction_type: str, quantity: int,
+                           price_per_unit: int, transaction_date: str, description: str) -> bool:
+        """Aktualizuje istniejącą transakcję (także typ złota i rodzaj) atomowo, z netto zmianą stanów magazynu."""
+
+    @abstractmethod
+    def delete_transaction(self, transaction_id: int) -> bool:
+        """Usuwa transakcję i przywraca stan magazynu."""
+
+    @abstractmethod
+    def delete_transactions(self, transaction_ids: List[int]) -> bool:
+        """Usuwa wiele transakcji atomowo, z zagregowaną zmianą stanów magazynu."""
+
+    @abstractmethod
+    def update_transactions(self, transaction_ids: List[int], transaction_date: Optional[str] = None,
+                            description: Optional[str] = None, price_per_unit: Optional[int] = None) -> bool:
+        """Zmienia datę, opis lub cenę wielu transakcji atomowo (None - bez zmian)."""
+
+    @abstractmethod
+    def take_last_write(self) -> Tuple[int, ...]:
+        """Zwraca (i zapomina) wpisy dziennika ostatniego zapisu - do cofnięcia go przez revert_changes."""
+
+    @abstractmethod
+    def revert_changes(self, audit_ids: Sequence[int]) -> bool:
+        """Cofa zapis transakcji opisany wpisami dziennika (atomowo); cofnięcie cofnięcia ponawia zapis."""
+
+    @abstractmethod
+    def get_audit_log(self, entity: Optional[str] = None, entity_id: Optional[int] = None,
+                      period: Optional[str] = None, limit: Optional[int] = 100) -> List[Tuple]:
+        """Pobiera wpisy dziennika zmian, od najnowszych."""
+
+    @abstractmethod
+    def archive_year(self, year: int) -> Optional[int]:
+        """Przenosi transakcje zamkniętego roku do archiwum; zwraca liczbę przeniesionych transakcji."""
+
+    @abstractmethod
+    def get_archives(self) -> List[Tuple]:
+        """Pobiera listę archiwów rocznych (rok, plik, liczba transakcji, data archiwizacji)."""
+
+    @abstractmethod
+    def get_valuation(self) -> List[Tuple]:
+        """Pobiera wycenę magazynu w podziale na kategorie."""
+
+    @abstractmethod
+    def get_monthly_totals(self) -> List[Tuple]:
+        """Pobiera podsumowania miesięczne transakcji (miesiąc, rodzaj, liczba, ilość, waga, wartość)."""
+
+    @abstractmethod
+    def poll_changes(self) -> bool:
+        """Publikuje w changes zmiany zapisane przez inne stanowiska od poprzedniego wywołania."""
+
+    @abstractmethod
+    def verify_balances(self) -> List[Tuple]:
+        """Zwraca rozbieżności między stanem magazynu a historią transakcji."""
+
+
+def open_storage(backend: str = "sqlite", path: str = "gold_vault.db", url: Optional[str] = None,
+                 seed: Optional[str] = None, profiler=None) -> GoldStorage:
+    """
+    Tworzy implementację GoldStorage dla wskazanego backendu.
+    Moduły implementacji są importowane dopiero tutaj, aby nie ładować zbędnych zależności.
+    Profiler (QueryProfiler) jest używany przez backendy oparte na SQLite.
+    """
+    backend = backend.strip().lower()
+    if backend == "sqlite":
+        from database import GoldDatabase
+        return GoldDatabase(path, profiler)
+    if backend == "memory":
+        from database import InMemoryGoldDatabase
+        return InMemoryGoldDatabase(seed_from=seed or None, profiler=profiler)
+    if backend == "http":
+        from http_storage import HttpGoldStorage
+        return HttpGoldStorage(url or "http://127.0.0.1:8765")
+    raise ValueError(f"Nieznany backend magazynu danych: {backend}")
+
+
+def profiler_from_config(config):
+    """Tworzy QueryProfiler z ustawieniami sekcji [profiler] (bez sprawdzania, czy profilowanie jest włączone)."""
+    from query_profiler import QueryProfiler
+    return QueryProfiler(config.getfloat("profiler", "slow_query_ms", fallback=100.0),
+                         config.get("profiler", "slow_log", fallback="") or None)
+
+
+def storage_from_config(config=None, profile: bool = False) -> GoldStorage:
+    """
+    Tworzy magazyn danych na podstawie sekcji [storage] konfiguracji.
+    profile=True włącza profilowanie także wtedy, gdy w sekcji [profiler] jest wyłączone.
+    """
+    if config is None:
+        from vault_config import load_config
+        config = load_config()
+    section = config["storage"]
+    profiler = None
+    if profile or config.getboolean("profiler", "enabled", fallback=False):
+        profiler = profiler_from_config(config)
+    return open_storage(section.get("backend", "sqlite"), section.get("path", "gold_vault.db"),
+                        section.get("url"), section.get("seed"), profiler)
@@ -0,0 +1,56 @@
+"""
+Testy usuwania transakcji (pojedynczo i wsadowo) na bazie w pamięci (InMemoryGoldDatabase).
+
+    python -m unittest discover tests
+"""
+import unittest
+
+from database import AUDIT_COLUMNS, InMemoryGoldDatabase
+from units import QUANTITY_SCALE
+
+UNIT = QUANTITY_SCALE
+DATE = "2024-05-01 10:00:00"
+
+
+class DeleteTransactionTest(unittest.TestCase):
+    """Usunięcie zakupu już sprzedanego złota jest odrzucane w obu ścieżkach, bez zmian w bazie."""
+
+    def setUp(self):
+        self.db = InMemoryGoldDatabase()
+        self.assertTrue(self.db.add_gold_type("Monety", "Krugerrand", 33_930, 91.67))
+        self.gold_type_id = self.db.get_gold_types()[0].id
+        self.purchase_id = self.add("Kupno", 5 * UNIT)
+        self.sale_id = self.add("Sprzedaż", 3 * UNIT)
+
+    def add(self, transaction_type: str, quantity: int) -> int:
+        self.assertTrue(self.db.add_transaction(self.gold_type_id, transaction_type, quantity, 1_000_000, DATE, ""))
+        return self.db.get_audit_log("transaction", limit=1)[0][AUDIT_COLUMNS.index("entity_id")]
+
+    def assert_unchanged(self):
+        self.assertEqual(self.db.get_gold_quantity(self.gold_type_id), 2 * UNIT)
+        self.assertIsNotNone(self.db.get_transaction_by_id(self.purchase_id))
+        self.assertEqual(len(self.db.get_audit_log("transaction")), 2)
+
+    def test_single_delete_refuses_negative_stock(self):
+        self.assertFalse(self.db.delete_transaction(self.purchase_id))
+        self.assert_unchanged()
+
+    def test_batch_delete_refuses_negative_stock(self):
+        self.assertFalse(self.db.delete_transactions([self.purchase_id]))
+        self.assert_unchanged()
+
+    def test_single_delete_of_sale_restores_stock(self):
+        self.assertTrue(self.db.delete_transaction(self.sale_id))
+        self.assertEqual(self.db.get_gold_quantity(self.gold_type_id), 5 * UNIT)
+        self.assertIsNone(self.db.get_transaction_by_id(self.sale_id))
+        self.assertTrue(self.db.delete_transaction(self.purchase_id))
+        self.assertEqual(self.db.get_gold_quantity(self.gold_type_id), 0)
+        self.assertEqual(self.db.verify_balances(), [])
+
+    def test_missing_transaction(self):
+        self.assertFalse(self.db.delete_transaction(self.sale_id + 100))
+        self.assert_unchanged()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+Testy pamięci sformatowanych wierszy (FormatCache).
+
+    python -m unittest discover tests
+"""
+import unittest
+from collections import namedtuple
+
+from format_cache import FormatCache
+
+Row = namedtuple("Row", "id name quantity")
+
+
+class FormatCacheTest(unittest.TestCase):
+    """Trafienia, ponowne formatowanie zmienionych wierszy i liczniki."""
+
+    def setUp(self):
+        self.calls = []
+        self.cache = FormatCache(self.format_row, "id", ("name", "quantity"))
+
+    def format_row(self, row):
+        self.calls.append(row.id)
+        return row.name.upper(), f"{row.quantity} szt"
+
+    def test_unchanged_rows_are_hits(self):
+        rows = [Row(1, "Krugerrand", 2), Row(2, "Sztabka", 5)]
+        self.assertEqual([self.cache(row) for row in rows], [("KRUGERRAND", "2 szt"), ("SZTABKA", "5 szt")])
+        self.assertEqual([self.cache(row) for row in rows], [("KRUGERRAND", "2 szt"), ("SZTABKA", "5 szt")])
+        self.assertEqual(self.calls, [1, 2])
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 2))
+
+    def test_changed_row_is_formatted_again(self):
+        self.cache(Row(1, "Krugerrand", 2))
+        self.assertEqual(self.cache(Row(1, "Krugerrand", 3)), ("KRUGERRAND", "3 szt"))
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 2))
+
+    def test_key_function_and_clear(self):
+        cache = FormatCache(self.format_row, lambda row: (row.name, row.quantity), ("name",))
+        cache(Row(1, "Krugerrand", 2))
+        cache(Row(7, "Krugerrand", 2))
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (1, 1, 1))
+        cache.clear()
+        self.assertEqual((cache.hits, cache.misses, len(cache)), (0, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+Testy sprawdzania danych zapisywanych transakcji (transaction_input_error) w GoldDatabase.
+
+    python -m unittest discover tests
+"""
+import unittest
+
+from database import InMemoryGoldDatabase, transaction_input_error
+from units import QUANTITY_SCALE
+
+UNIT = QUANTITY_SCALE
+DATE = "2024-05-01 10:00:00"
+
+
+class TransactionInputErrorTest(unittest.TestCase):
+    """Rodzaj, ilość, cena i data transakcji."""
+
+    def test_valid_fields(self):
+        self.assertIsNone(transaction_input_error("Kupno", UNIT, 100, "2024-05-01"))
+        self.assertIsNone(transaction_input_error("Sprzedaż", 1, 1, DATE))
+        self.assertIsNone(transaction_input_error())
+
+    def test_invalid_fields(self):
+        for fields in (("Wymiana", UNIT, 100, DATE), ("Kupno", 0, 100, DATE), ("Kupno", -UNIT, 100, DATE),
+                       ("Kupno", UNIT, 0, DATE), ("Kupno", UNIT, -100, DATE), ("Kupno", UNIT, 100, "not-a-date"),
+                       ("Kupno", UNIT, 100, "2024-5-1"), ("Kupno", UNIT, 100, "2024-02-30"),
+                       ("Kupno", UNIT, 100, "2024-05-01 25:00:00"), ("Kupno", UNIT, 100, 20240501)):
+            with self.subTest(fields=fields):
+                self.assertIsNotNone(transaction_input_error(*fields))
+
+
+class AddTransactionInputTest(unittest.TestCase):
+    """Niepoprawne transakcje nie zmieniają stanu magazynu ani historii."""
+
+    def setUp(self):
+        self.db = InMemoryGoldDatabase()
+        self.assertTrue(self.db.add_gold_type("Monety", "Krugerrand", 33_930, 91.67))
+        self.gold_id = self.db.get_gold_types()[0].id
+        self.assertTrue(self.db.add_transaction(self.gold_id, "Kupno", 2 * UNIT, 1_000_000, DATE))
+
+    def test_negative_purchase_is_rejected(self):
+        self.assertFalse(self.db.add_transaction(self.gold_id, "Kupno", -5 * UNIT, 1_000_000, DATE))
+        self.assertEqual(self.db.get_gold_quantity(self.gold_id), 2 * UNIT)
+
+    def test_negative_sale_is_rejected(self):
+        self.assertFalse(self.db.add_transaction(self.gold_id, "Sprzedaż", -5 * UNIT, 1_000_000, DATE))
+        self.assertEqual(self.db.get_gold_quantity(self.gold_id), 2 * UNIT)
+
+    def test_malformed_date_and_price_are_rejected(self):
+        self.assertFalse(self.db.add_transaction(self.gold_id, "Kupno", UNIT, 1_000_000, "not-a-date"))
+        self.assertFalse(self.db.add_transaction(self.gold_id, "Kupno", UNIT, 0, DATE))
+        self.assertEqual(len(self.db.get_transactions_with_id()), 1)
+
+    def test_batch_update_rejects_malformed_date_and_price(self):
+        transaction_id = self.db.get_transactions_with_id()[0].id
+        self.assertFalse(self.db.update_transactions([transaction_id], transaction_date="not-a-date"))
+        self.assertFalse(self.db.update_transactions([transaction_id], price_per_unit=-1))
+        self.assertEqual(self.db.get_transactions_with_id()[0].date, DATE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Testy GoldDatabase.update_transaction na bazie w pamięci (InMemoryGoldDatabase).
+
+    python -m unittest discover tests
+"""
+import json
+import unittest
+
+from database import AUDIT_COLUMNS, TRANSACTION_DETAIL_COLUMNS, InMemoryGoldDatabase
+from units import QUANTITY_SCALE
+
+UNIT = QUANTITY_SCALE
+DATE = "2024-05-01 10:00:00"
+
+
+def audit_field(entry, field: str):
+    """Pole wpisu dziennika zmian (AUDIT_COLUMNS)."""
+    return entry[AUDIT_COLUMNS.index(field)]
+
+
+def transaction_field(transaction, field: str):
+    """Pole szczegółów transakcji (TRANSACTION_DETAIL_COLUMNS)."""
+    return transaction[TRANSACTION_DETAIL_COLUMNS.index(field)]
+
+
+class UpdateTransactionTest(unittest.TestCase):
+    """Edycja transakcji: stany magazynu, odrzucenie bez częściowego zapisu i dziennik zmian."""
+
+    def setUp(self):
+        self.db = InMemoryGoldDatabase()
+        self.assertTrue(self.db.add_gold_type("Monety", "Krugerrand", 33_930, 91.67))
+        self.assertTrue(self.db.add_gold_type("Sztabki", "Sztabka 10g", 10_000, 99.99))
+        self.first, self.second = sorted(gold_type.id for gold_type in self.db.get_gold_types())
+        self.assertTrue(self.db.add_transaction(self.first, "Kupno", 5 * UNIT, 1_000_000, DATE, "zapas"))
+        self.assertTrue(self.db.add_transaction(self.first, "Kupno", 2 * UNIT, 1_000_000, DATE, "edycja"))
+        self.transaction_id = self.last_audit()[AUDIT_COLUMNS.index("entity_id")]
+
+    def last_audit(self):
+        return self.db.get_audit_log("transaction", limit=1)[0]
+
+    def quantities(self) -> tuple:
+        return self.db.get_gold_quantity(self.first), self.db.get_gold_quantity(self.second)
+
+    def update(self, gold_type_id: int, transaction_type: str, quantity: int, price: int = 1_000_000,
+               date: str = DATE, description: str = "edycja") -> bool:
+        return self.db.update_transaction(self.transaction_id, gold_type_id, transaction_type, quantity,
+                                          price, date, description)
+
+    def test_purchase_changed_to_sale_moves_stock_by_net_change(self):
+        self.assertEqual(self.quantities(), (7 * UNIT, 0))
+        self.assertTrue(self.update(self.first, "Sprzedaż", 3 * UNIT))
+        self.assertEqual(self.quantities(), (2 * UNIT, 0))
+        transaction = self.db.get_transaction_by_id(self.transaction_id)
+        self.assertEqual(transaction_field(transaction, "transaction_type"), "Sprzedaż")
+        self.assertEqual(transaction_field(transaction, "quantity"), 3 * UNIT)
+        self.assertEqual(self.db.verify_balances(), [])
+
+    def test_gold_type_change_moves_stock_between_types(self):
+        self.assertTrue(self.update(self.second, "Kupno", 4 * UNIT))
+        self.assertEqual(self.quantities(), (5 * UNIT, 4 * UNIT))
+        self.assertEqual(transaction_field(self.db.get_transaction_by_id(self.transaction_id), "gold_type_id"),
+                         self.second)
+        self.assertEqual(self.db.verify_balances(), [])
+
+    def test_edit_driving_stock_negative_is_rejected_without_partial_write(self):
+        self.assertTrue(self.update(self.second, "Kupno", 4 * UNIT))
+        self.assertTrue(self.db.add_transaction(self.second, "Sprzedaż", 3 * UNIT, 1_100_000, DATE, "sprzedaż"))
+        before = self.db.get_transaction_by_id(self.transaction_id)
+        audit = self.last_audit()
+
+        # Przeniesienie zakupu z powrotem odjęłoby od drugiego typu więcej, niż zostało
+        self.assertFalse(self.update(self.first, "Kupno", 4 * UNIT))
+        # Sprzedaż większa niż stan pierwszego typu
+        self.assertFalse(self.update(self.first, "Sprzedaż", 6 * UNIT))
+
+        self.assertEqual(self.quantities(), (5 * UNIT, UNIT))
+        self.assertEqual(self.db.get_transaction_by_id(self.transaction_id), before)
+        self.assertEqual(self.last_audit(), audit)
+        self.assertEqual(self.db.verify_balances(), [])
+
+    def test_missing_transaction_or_gold_type_is_rejected(self):
+        self.assertFalse(self.db.update_transaction(-1, self.first, "Kupno", UNIT, 1_000_000, DATE, ""))
+        self.assertFalse(self.update(-1, "Kupno", UNIT))
+        self.assertFalse(self.update(self.first, "Wymiana", UNIT))
+        self.assertEqual(self.quantities(), (7 * UNIT, 0))
+
+    def test_audit_entry_records_changed_fields_only(self):
+        self.assertTrue(self.update(self.first, "Sprzedaż", UNIT))
+        self.assertTrue(self.update(self.second, "Kupno", UNIT, price=900_000))
+        updates = self.db.get_audit_log("transaction", self.transaction_id)
+        self.assertEqual([audit_field(entry, "action") for entry in updates], ["update", "update", "insert"])
+        self.assertEqual(json.loads(audit_field(updates[1], "changes")), {
+            "transaction_type": ["Kupno", "Sprzedaż"],
+            "quantity": [2 * UNIT, UNIT],
+        })
+        self.assertEqual(json.loads(audit_field(updates[0], "changes")), {
+            "gold_type_id": [self.first, self.second],
+            "transaction_type": ["Sprzedaż", "Kupno"],
+            "price_per_unit": [1_000_000, 900_000],
+        })
+
+    def test_date_only_edit_keeps_time_of_day(self):
+        self.assertTrue(self.update(self.first, "Kupno", 2 * UNIT, date="2024-06-02"))
+        self.assertEqual(transaction_field(self.db.get_transaction_by_id(self.transaction_id), "date"),
+                         "2024-06-02 10:00:00")
+        self.assertEqual(json.loads(audit_field(self.last_audit(), "changes")),
+                         {"transaction_date": [DATE, "2024-06-02 10:00:00"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
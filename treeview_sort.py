@@ -0,0 +1,177 @@
+"""
+Sortowanie wierszy Treeview po kliknięciu nagłówka kolumny, bez ponownego odpytywania bazy.
+
+Klucze sortowania są liczone z surowych danych (liczby, daty), a nie ze
+sformatowanych napisów typu "123.00 g", raz na kolumnę po każdym wczytaniu
+danych. Zmiana kolejności to jedno wywołanie Treeview.set_children, a zmiana
+pojedynczego wiersza - jedno Treeview.move.
+"""
+from bisect import bisect_left, insort
+from tkinter import ttk
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ARROW_ASC = " ▲"
+ARROW_DESC = " ▼"
+
+
+def none_last(value) -> Tuple[bool, Any]:
+    """Klucz dla wartości, które mogą być None (np. brak wagi) - takie wiersze trafiają na koniec."""
+    return (value is None, 0 if value is None else value)
+
+
+class TreeviewSorter:
+    """
+    Sortuje już wczytane wiersze Treeview według kolumny klikniętego nagłówka.
+
+    Wiersze są trzymane w słowniku id elementu -> surowe dane, a dla każdej użytej funkcji klucza
+    (kolumny lub kolejności z bazy w index_for) - rosnąca lista (klucz, numer wczytania, id elementu).
+    Listy są budowane przy pierwszym użyciu i poprawiane przez bisect przy zmianie pojedynczych
+    wierszy, więc wstawienie lub zmiana wiersza przesuwa tylko ten wiersz (Treeview.move)
+    zamiast sortować całą tabelę.
+    """
+
+    def __init__(self, tree: ttk.Treeview, column_keys: Dict[str, Callable[[Tuple], Any]]):
+        """
+        column_keys mapuje nazwę kolumny Treeview na funkcję zwracającą klucz sortowania
+        dla surowego wiersza danych (tego samego, który trafił do formattera).
+        """
+        self.tree = tree
+        self.column_keys = column_keys
+        self.headings = {column: tree.heading(column, "text") for column in column_keys}
+        self._rows: Dict[str, Tuple] = {}
+        # Numer wczytania wiersza - przy równych kluczach zachowuje kolejność z bazy
+        self._sequence: Dict[str, int] = {}
+        self._next_sequence = 0
+        self._indexes: Dict[Callable[[Tuple], Any], List[Tuple[Any, int, str]]] = {}
+        self.sort_column: Optional[str] = None
+        self.descending = False
+
+        for column in column_keys:
+            tree.heading(column, command=lambda c=column: self.sort(c))
+
+    def load(self, items: List[Tuple[str, Tuple]]):
+        """Zapamiętuje wstawione wiersze (id elementu Treeview, surowe dane) i czyści klucze oraz strzałki."""
+        self._rows = {}
+        self._sequence = {}
+        self._next_sequence = 0
+        self._indexes.clear()
+        self._add(items)
+        self.sort_column = None
+        self.descending = False
+        self._update_headings()
+
+    def extend(self, items: List[Tuple[str, Tuple]]):
+        """Dopisuje kolejne wczytane wiersze (np. następną stronę); zachowuje bieżące sortowanie."""
+        self._add(items)
+        self._indexes.clear()
+        if self.sort_column is not None:
+            self.sort(self.sort_column, self.descending)
+
+    def _add(self, items: List[Tuple[str, Tuple]]):
+        """Zapisuje wiersze i nadaje im kolejne numery wczytania."""
+        for item_id, row in items:
+            self._rows[item_id] = row
+            self._sequence[item_id] = self._next_sequence
+            self._next_sequence += 1
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _index(self, key: Callable[[Tuple], Any]) -> List[Tuple[Any, int, str]]:
+        """Rosnąca lista (klucz, numer wczytania, id elementu) dla funkcji klucza - budowana przy pierwszym użyciu."""
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = sorted((key(row), self._sequence[item_id], item_id)
+                                                for item_id, row in self._rows.items())
+        return index
+
+    def index_for(self, row: Tuple, key: Callable[[Tuple], Any]) -> int:
+        """
+        Pozycja nowego wiersza wśród wczytanych wierszy uporządkowanych malejąco według key
+        (kolejność z bazy, np. od najnowszych); nowe transakcje trafiają zwykle na początek listy.
+        Za wierszem są wszystkie wiersze o mniejszym kluczu - ich liczbę daje bisect na liście rosnącej.
+        """
+        return len(self._rows) - bisect_left(self._index(key), (key(row),))
+
+    def row(self, item_id: str) -> Tuple:
+        """Zwraca surowe dane wczytanego wiersza."""
+        return self._rows[item_id]
+
+    def insert(self, index: int, item_id: str, row: Tuple):
+        """
+        Zapamiętuje wiersz wstawiony do Treeview na pozycji index (kolejność z bazy);
+        przy wybranym sortowaniu przesuwa go na miejsce według klikniętej kolumny.
+        """
+        self._rows[item_id] = row
+        self._sequence[item_id] = self._next_sequence
+        self._next_sequence += 1
+        for key, entries in self._indexes.items():
+            insort(entries, (key(row), self._sequence[item_id], item_id))
+        self._move_to_sorted_position(item_id)
+
+    def update(self, item_id: str, row: Tuple):
+        """Podmienia surowe dane zmienionego wiersza; zachowuje bieżące sortowanie (przesuwa tylko ten wiersz)."""
+        if self.sort_column is not None:
+            self._index(self.column_keys[self.sort_column])  # lista klikniętej kolumny mogła zostać wyczyszczona
+        old_row = self._rows[item_id]
+        self._rows[item_id] = row
+        sequence = self._sequence[item_id]
+        moved = False
+        for key, entries in self._indexes.items():
+            old_key, new_key = key(old_row), key(row)
+            if old_key == new_key:
+                continue
+            del entries[bisect_left(entries, (old_key, sequence, item_id))]
+            insort(entries, (new_key, sequence, item_id))
+            moved = True
+        if moved:
+            self._move_to_sorted_position(item_id)
+
+    def remove(self, item_ids):
+        """Zapomina wiersze usunięte z Treeview."""
+        removed = [item_id for item_id in dict.fromkeys(item_ids) if item_id in self._rows]
+        # Przy usunięciu dużej części wierszy taniej zbudować listy kluczy od nowa przy następnym użyciu
+        if len(removed) * 16 > len(self._rows):
+            self._indexes.clear()
+        for item_id in removed:
+            row = self._rows.pop(item_id)
+            sequence = self._sequence.pop(item_id)
+            for key, entries in self._indexes.items():
+                del entries[bisect_left(entries, (key(row), sequence, item_id))]
+
+    def _move_to_sorted_position(self, item_id: str):
+        """Przesuwa jeden wiersz Treeview na miejsce wynikające z bieżącego sortowania (jeśli jest wybrane)."""
+        if self.sort_column is None:
+            return
+        key = self.column_keys[self.sort_column]
+        entries = self._index(key)
+        position = bisect_left(entries, (key(self._rows[item_id]), self._sequence[item_id], item_id))
+        if self.descending:
+            position = len(entries) - 1 - position
+        # Odłączony wiersz - pozycja liczona wśród pozostałych wierszy niezależnie od tego, gdzie był
+        self.tree.detach(item_id)
+        self.tree.move(item_id, "", position)
+
+    def sort(self, column: str, descending: Optional[bool] = None):
+        """Sortuje wiersze według kolumny; ponowne kliknięcie tej samej kolumny odwraca kierunek."""
+        if column not in self.column_keys or not self._rows:
+            return
+        if descending is None:
+            descending = not self.descending if column == self.sort_column else False
+
+        entries = self._index(self.column_keys[column])
+        order = [item_id for _, _, item_id in entries]
+        if descending:
+            order.reverse()
+        self.tree.set_children("", *order)
+
+        self.sort_column = column
+        self.descending = descending
+        self._update_headings()
+
+    def _update_headings(self):
+        """Oznacza strzałką kolumnę i kierunek sortowania."""
+        for column, text in self.headings.items():
+            if column == self.sort_column:
+                text += ARROW_DESC if self.descending else ARROW_ASC
+            self.tree.heading(column, text=text)
@@ -0,0 +1,85 @@
+"""
+Cofanie i ponawianie ostatnich zapisów transakcji (Ctrl+Z / Ctrl+Y w głównym oknie).
+
+Zapis nie jest kopiowany: wystarczą id jego wpisów w dzienniku zmian (audit_log),
+który przechowuje poprzednie wartości zmienionych pól i pełny obraz usuniętych
+wierszy. Cofnięcie (GoldStorage.revert_changes) jest zwykłym zapisem w jednej
+transakcji bazy z własnymi wpisami dziennika - te wpisy trafiają na stos ponowień,
+bo cofnięcie cofnięcia ponawia pierwotny zapis. Tabele okien poprawiają się same
+przez zdarzenia zmian (GoldStorage.changes), bez wczytywania ich od nowa.
+"""
+from collections import deque
+from typing import Deque, List, Tuple
+
+from change_events import ChangeEvent, RELOAD, TRANSACTION
+from storage import GoldStorage
+
+DEFAULT_UNDO_LIMIT = 50
+
+
+class UndoHistory:
+    """Stosy zapisów do cofnięcia i ponowienia (każdy zapis to krotka id wpisów dziennika)."""
+
+    def __init__(self, db: GoldStorage, limit: int = DEFAULT_UNDO_LIMIT):
+        """Subskrybuje zmiany magazynu danych; pamiętanych jest limit ostatnich zapisów."""
+        self.db = db
+        self._undo: Deque[Tuple[int, ...]] = deque(maxlen=limit)
+        self._redo: List[Tuple[int, ...]] = []
+        self._reverting = False
+        self._reverted: Tuple[int, ...] = ()
+        db.changes.subscribe(self.on_storage_changes)
+
+    def on_storage_changes(self, events: List[ChangeEvent]):
+        """Zapamiętuje zapis transakcji wykonany w tej aplikacji (zmiany innych stanowisk są pomijane)."""
+        audit_ids = self.db.take_last_write()
+        if any(event.action == RELOAD for event in events):
+            # Archiwizacja lub przywrócenie kopii - zapamiętane zapisy mogą już nie pasować do bazy
+            self.clear()
+            return
+        if not audit_ids or not any(event.entity == TRANSACTION for event in events):
+            return
+        if self._reverting:
+            self._reverted = audit_ids
+            return
+        self._undo.append(audit_ids)
+        self._redo.clear()
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo(self) -> bool:
+        """Cofa ostatni zapis; False - nic do cofnięcia lub cofnięcie niemożliwe (zapis jest wtedy zapominany)."""
+        if not self._undo:
+            return False
+        reverted = self._revert(self._undo.pop())
+        if reverted:
+            self._redo.append(reverted)
+        return bool(reverted)
+
+    def redo(self) -> bool:
+        """Ponawia ostatnio cofnięty zapis; False - nic do ponowienia lub ponowienie niemożliwe."""
+        if not self._redo:
+            return False
+        reverted = self._revert(self._redo.pop())
+        if reverted:
+            self._undo.append(reverted)
+        return bool(reverted)
+
+    def _revert(self, audit_ids: Tuple[int, ...]) -> Tuple[int, ...]:
+        """Cofa zapis w magazynie danych i zwraca wpisy dziennika cofnięcia (pusta krotka przy błędzie)."""
+        self._reverting = True
+        self._reverted = ()
+        try:
+            if not self.db.revert_changes(audit_ids):
+                return ()
+        finally:
+            self._reverting = False
+        return self._reverted
+
+    def clear(self):
+        """Zapomina wszystkie zapisy."""
+        self._undo.clear()
+        self._redo.clear()
@@ -0,0 +1,133 @@
+"""
+Jednostki kwot, wag i ilości zapisywanych w bazie.
+
+Wszystkie wartości są liczbami całkowitymi w jednostkach podstawowych, więc sumy
+liczone w SQL i w Pythonie są dokładne (bez błędów zaokrągleń liczb
+zmiennoprzecinkowych przy milionach transakcji) i szybsze niż na Decimal:
+
+    kwoty (ceny, wartości)   grosze                      1 zł  = GROSZE
+    wagi                     miligramy                   1 g   = MILLIGRAMS
+    ilości                   tysięczne części jednostki  1 szt = QUANTITY_SCALE (dla "g" - miligramy)
+    cena za gram             grosze za gram
+
+Czystość pozostaje procentem (liczba zmiennoprzecinkowa). Złote i gramy pojawiają
+się tylko w interfejsie: parse_* zamieniają tekst wpisany przez użytkownika na
+jednostki podstawowe, a format_* i display_value - jednostki podstawowe na tekst
+lub liczby do wyświetlenia i eksportu.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Optional, Union
+
+GROSZE = 100
+MILLIGRAMS = 1000
+QUANTITY_SCALE = 1000
+
+# Skala kolumn rekordów i wyników zapytań (nazwy jak w records i database.*_COLUMNS):
+# wartość w złotych, gramach lub jednostkach = wartość zapisana / skala
+COLUMN_SCALES = {
+    "quantity": QUANTITY_SCALE,
+    "expected": QUANTITY_SCALE,
+    "bought_quantity": QUANTITY_SCALE,
+    "sold_quantity": QUANTITY_SCALE,
+    "net_quantity": QUANTITY_SCALE,
+    "unit_weight": MILLIGRAMS,
+    "total_weight": MILLIGRAMS,
+    "weight_total": MILLIGRAMS,
+    "fine_weight": MILLIGRAMS,
+    "price_per_unit": GROSZE,
+    "price_per_gram": GROSZE,
+    "total_value": GROSZE,
+    "value": GROSZE,
+    "weighed_value": GROSZE,
+    "book_value": GROSZE,
+    "market_value": GROSZE,
+    "bought_value": GROSZE,
+    "sold_value": GROSZE,
+    "avg_buy_price": GROSZE,
+    "avg_sell_price": GROSZE,
+}
+
+
+def parse_scaled(text: Union[str, int, float], scale: int) -> int:
+    """
+    Zamienia liczbę wpisaną przez użytkownika (kropka lub przecinek dziesiętny) na jednostki podstawowe,
+    zaokrąglając połówki w górę. Tekst jest czytany jako Decimal, więc "0.1" to dokładnie 10 groszy.
+    ValueError - tekst nie jest liczbą.
+    """
+    try:
+        value = Decimal(str(text).strip().replace(" ", "").replace(",", "."))
+    except InvalidOperation:
+        raise ValueError(f"Niepoprawna liczba: {text!r}") from None
+    if not value.is_finite():
+        raise ValueError(f"Niepoprawna liczba: {text!r}")
+    return int((value * scale).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def parse_money(text: Union[str, int, float]) -> int:
+    """Kwota w złotych -> grosze."""
+    return parse_scaled(text, GROSZE)
+
+
+def parse_weight(text: Union[str, int, float]) -> int:
+    """Waga w gramach -> miligramy."""
+    return parse_scaled(text, MILLIGRAMS)
+
+
+def parse_quantity(text: Union[str, int, float]) -> int:
+    """Ilość w jednostkach typu złota -> tysięczne części jednostki."""
+    return parse_scaled(text, QUANTITY_SCALE)
+
+
+def format_scaled(value: int, scale: int, places: int) -> str:
+    """
+    Tekst wartości w jednostkach wyświetlanych z places miejscami po kropce (scale i 10**places to potęgi
+    dziesięciu, places nie większe niż liczba zer skali). Liczone na liczbach całkowitych, połówki w górę.
+    """
+    step = scale // 10 ** places
+    sign = "-" if value < 0 else ""
+    whole, fraction = divmod((abs(value) + step // 2) // step, 10 ** places)
+    return f"{sign}{whole}.{fraction:0{places}d}" if places else f"{sign}{whole}"
+
+
+def format_money(grosze: int, places: int = 2) -> str:
+    """Kwota w złotych, np. 845000 -> '8450.00'."""
+    return format_scaled(grosze, GROSZE, places)
+
+
+def format_weight(milligrams: int, places: int = 2) -> str:
+    """Waga w gramach, np. 31103 -> '31.10'."""
+    return format_scaled(milligrams, MILLIGRAMS, places)
+
+
+def format_quantity(quantity: int) -> str:
+    """Ilość bez zbędnych zer po kropce, np. 2000 -> '2', 1500 -> '1.5', 125 -> '0.125'."""
+    text = format_scaled(quantity, QUANTITY_SCALE, 3)
+    return text.rstrip("0").rstrip(".")
+
+
+def display_value(column: str, value):
+    """
+    Wartość kolumny z COLUMN_SCALES w złotych, gramach lub jednostkach (liczba do eksportu i wypisywania);
+    inne kolumny i None bez zmian.
+    """
+    scale = COLUMN_SCALES.get(column)
+    if scale is None or value is None:
+        return value
+    return value / scale
+
+
+def line_value(quantity: int, price_per_unit: int) -> int:
+    """Wartość transakcji w groszach: ilość × cena jednostkowa, zaokrąglona do grosza (jak w zapytaniach SQL)."""
+    return (quantity * price_per_unit + QUANTITY_SCALE // 2) // QUANTITY_SCALE
+
+
+def line_weight(quantity: int, unit_weight: int) -> int:
+    """Łączna waga transakcji lub pozycji magazynu w miligramach (ilość × waga jednostkowa)."""
+    return (quantity * unit_weight + QUANTITY_SCALE // 2) // QUANTITY_SCALE
+
+
+def price_per_gram(price_per_unit: int, unit_weight: Optional[int]) -> int:
+    """Cena za gram w groszach (cena jednostkowa / waga jednostkowa w gramach); 0 przy nieznanej wadze."""
+    if not unit_weight or unit_weight <= 0:
+        return 0
+    return (price_per_unit * MILLIGRAMS + unit_weight // 2) // unit_weight
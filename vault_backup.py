@@ -0,0 +1,242 @@
+"""
+Kopie zapasowe bazy Magazynu Złota wykonywane API backup SQLite.
+
+Kopia jest robiona z działającej bazy krokami po BACKUP_PAGES_PER_STEP stron,
+z krótką przerwą między krokami, więc aplikacja i serwer mogą w tym czasie
+czytać i zapisywać. Zapis z innego połączenia powoduje wznowienie kopiowania
+od początku; po BACKUP_MAX_RESTARTS wznowieniach reszta kopii jest robiona
+w jednym kroku (w trybie WAL zapisy nadal nie czekają, w trybie rollback czekają
+do końca kopii). Każda kopia jest sprawdzana (PRAGMA integrity_check i zgodność
+stanów magazynu z historią), a najstarsze kopie ponad limit są usuwane.
+
+    python -m gold_cli backup --dir backups --keep 7
+    python -m gold_cli restore backups/gold_vault_20250101_120000.db
+"""
+import os
+import re
+import shutil
+import sqlite3
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from database import balance_mismatch_sql
+
+# Liczba stron bazy kopiowanych w jednym kroku i przerwa między krokami (s)
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_SLEEP = 0.005
+
+# Liczba wznowień kopii krokowej (po zapisie do bazy), po której kopia jest kończona w jednym kroku
+BACKUP_MAX_RESTARTS = 3
+
+DEFAULT_BACKUP_DIR = "backups"
+DEFAULT_KEEP = 7
+
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# Tolerancja porównania stanów w kopiach ze starszych wersji (ilości REAL);
+# różnice ilości zapisanych liczbami całkowitymi są zawsze od niej większe
+LEGACY_BALANCE_TOLERANCE = 1e-6
+
+# Postęp kopiowania: (skopiowane strony, wszystkie strony)
+ProgressCallback = Callable[[int, int], None]
+
+
+def backup_name(db_path: str, moment: Optional[datetime] = None) -> str:
+    """Nazwa pliku kopii, np. gold_vault_20250101_120000.db."""
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return f"{stem}_{(moment or datetime.now()).strftime(TIMESTAMP_FORMAT)}.db"
+
+
+def list_backups(db_path: str, backup_dir: str = DEFAULT_BACKUP_DIR) -> List[Tuple[str, int, str]]:
+    """Zwraca kopie bazy (ścieżka, rozmiar w bajtach, data wykonania), od najnowszej."""
+    if not os.path.isdir(backup_dir):
+        return []
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    pattern = re.compile(rf"^{re.escape(stem)}_(\d{{8}}_\d{{6}})\.db$")
+    backups = []
+    for name in os.listdir(backup_dir):
+        match = pattern.match(name)
+        if match:
+            path = os.path.join(backup_dir, name)
+            created = datetime.strptime(match.group(1), TIMESTAMP_FORMAT).isoformat(sep=" ")
+            backups.append((path, os.path.getsize(path), created))
+    backups.sort(key=lambda backup: backup[2], reverse=True)
+    return backups
+
+
+class _BackupRestarted(Exception):
+    """Kopia krokowa była wznawiana od początku zbyt wiele razy."""
+
+
+def _copy(source: sqlite3.Connection, target: sqlite3.Connection, pages: int,
+          progress: Optional[ProgressCallback]):
+    """
+    Kopiuje bazę krokami po pages stron, zgłaszając postęp. Gdy częste zapisy do bazy
+    wznawiają kopię od początku, reszta jest kopiowana w jednym kroku.
+    """
+    state = {"remaining": None, "restarts": 0}
+
+    def report(status, remaining, total):
+        if state["remaining"] is not None and remaining > state["remaining"]:
+            state["restarts"] += 1
+            if state["restarts"] > BACKUP_MAX_RESTARTS:
+                raise _BackupRestarted()
+        state["remaining"] = remaining
+        if progress is not None:
+            progress(total - remaining, total)
+
+    try:
+        source.backup(target, pages=pages, progress=report, sleep=BACKUP_STEP_SLEEP if pages > 0 else 0)
+    except _BackupRestarted:
+        source.backup(target, pages=-1, progress=report)
+
+
+def _open_read_only(path: str) -> sqlite3.Connection:
+    """Otwiera plik bazy tylko do odczytu - bez migracji schematu i innych zapisów GoldDatabase."""
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def _table_names(conn: sqlite3.Connection) -> set:
+    """Nazwy tabel bazy."""
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def _archive_names(path: str) -> List[str]:
+    """Nazwy plików archiwów rocznych zapisane w bazie path (odczyt bez zmian w pliku)."""
+    try:
+        conn = _open_read_only(path)
+        try:
+            if "archives" not in _table_names(conn):
+                return []
+            return [row[0] for row in conn.execute("SELECT path FROM archives ORDER BY year")]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Błąd pobierania listy archiwów: {e}")
+        return []
+
+
+def verify_backup(path: str) -> List[str]:
+    """
+    Sprawdza plik kopii. Zwraca listę problemów (pusta lista - kopia poprawna).
+    Kopia jest tylko czytana, więc sprawdzenie nie zmienia jej zawartości ani daty modyfikacji.
+    """
+    if not os.path.exists(path):
+        return [f"Brak pliku kopii: {path}"]
+    try:
+        conn = _open_read_only(path)
+        try:
+            problems = [row[0] for row in conn.execute("PRAGMA integrity_check") if row[0] != "ok"]
+            if problems:
+                return [f"integrity_check: {problem}" for problem in problems]
+            query = balance_mismatch_sql(LEGACY_BALANCE_TOLERANCE, "transaction_rollups" in _table_names(conn))
+            return [f"Niezgodny stan typu {row[0]} ({row[1]} {row[2]}): {row[3]} zamiast {row[4]}"
+                    for row in conn.execute(query)]
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        return [f"Błąd odczytu kopii: {e}"]
+
+
+def rotate_backups(db_path: str, backup_dir: str = DEFAULT_BACKUP_DIR, keep: int = DEFAULT_KEEP) -> List[str]:
+    """Usuwa najstarsze kopie ponad limit keep; zwraca ścieżki usuniętych plików."""
+    removed = []
+    for path, _, _ in list_backups(db_path, backup_dir)[max(keep, 1):]:
+        os.remove(path)
+        removed.append(path)
+    return removed
+
+
+def _backup_archives(db_path: str, backup_dir: str):
+    """
+    Kopiuje pliki archiwów rocznych, których jeszcze nie ma w katalogu kopii.
+    Archiwa zmieniają się tylko przy archiwizacji, więc wystarcza jedna kopia każdej wersji.
+    """
+    for name in _archive_names(db_path):
+        source = os.path.join(os.path.dirname(db_path), name)
+        target = os.path.join(backup_dir, name)
+        if os.path.exists(source) and (not os.path.exists(target)
+                                       or os.path.getmtime(target) < os.path.getmtime(source)):
+            src = _open_read_only(source)
+            dst = sqlite3.connect(target)
+            try:
+                src.backup(dst)
+            finally:
+                dst.close()
+                src.close()
+
+
+def backup_database(db_path: str, backup_dir: str = DEFAULT_BACKUP_DIR, keep: int = DEFAULT_KEEP,
+                    pages: int = BACKUP_PAGES_PER_STEP, progress: Optional[ProgressCallback] = None) -> Optional[str]:
+    """
+    Wykonuje sprawdzoną kopię bazy db_path w katalogu backup_dir i usuwa kopie ponad limit keep.
+    Zwraca ścieżkę kopii lub None, jeśli kopii nie udało się wykonać albo nie przeszła weryfikacji.
+    """
+    if not os.path.exists(db_path):
+        print(f"Brak pliku bazy danych: {db_path}")
+        return None
+    os.makedirs(backup_dir, exist_ok=True)
+    path = os.path.join(backup_dir, backup_name(db_path))
+    partial = path + ".part"
+    try:
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(partial)
+        try:
+            _copy(source, target, pages, progress)
+            # Kopia bazy w trybie WAL też byłaby w trybie WAL - kopia ma być jednym plikiem
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+            source.close()
+    except sqlite3.Error as e:
+        print(f"Błąd wykonywania kopii zapasowej: {e}")
+        if os.path.exists(partial):
+            os.remove(partial)
+        return None
+
+    problems = verify_backup(partial)
+    if problems:
+        print("Kopia zapasowa nie przeszła weryfikacji:")
+        for problem in problems:
+            print(f"  {problem}")
+        os.remove(partial)
+        return None
+
+    os.replace(partial, path)
+    _backup_archives(db_path, backup_dir)
+    rotate_backups(db_path, backup_dir, keep)
+    return path
+
+
+def restore_backup(backup_path: str, db_path: str, pages: int = BACKUP_PAGES_PER_STEP,
+                   progress: Optional[ProgressCallback] = None) -> bool:
+    """
+    Przywraca bazę db_path z kopii po jej weryfikacji. Kopia jest zapisywana do bazy
+    przez API backup, więc inne połączenia widzą całą zmianę naraz.
+    Brakujące pliki archiwów rocznych są kopiowane z katalogu kopii.
+    """
+    problems = verify_backup(backup_path)
+    if problems:
+        print("Kopia zapasowa nie przeszła weryfikacji - przywracanie przerwane:")
+        for problem in problems:
+            print(f"  {problem}")
+        return False
+    try:
+        source = _open_read_only(backup_path)
+        target = sqlite3.connect(db_path)
+        try:
+            _copy(source, target, pages, progress)
+        finally:
+            target.close()
+            source.close()
+    except sqlite3.Error as e:
+        print(f"Błąd przywracania kopii zapasowej: {e}")
+        return False
+
+    backup_dir = os.path.dirname(backup_path)
+    for name in _archive_names(backup_path):
+        target = os.path.join(os.path.dirname(db_path), name)
+        source = os.path.join(backup_dir, name)
+        if not os.path.exists(target) and os.path.exists(source):
+            shutil.copyfile(source, target)
+    return True
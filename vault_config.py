@@ -0,0 +1,70 @@
+"""
+Konfiguracja aplikacji Magazyn Złota.
+
+Ustawienia są czytane z pliku gold_vault.ini (lub pliku wskazanego zmienną
+środowiskową GOLD_VAULT_CONFIG). Brak pliku oznacza wartości domyślne:
+
+    [storage]
+    backend = sqlite            ; sqlite | memory | http
+    path = gold_vault.db        ; plik bazy dla backendu sqlite
+    seed =                      ; opcjonalny plik bazy kopiowany do pamięci (backend memory)
+    url = http://127.0.0.1:8765 ; adres gold_server (backend http)
+
+    [ui]
+    fast_start = no             ; pokaż okno przed otwarciem bazy i wczytaniem danych
+    inventory_limit = 0         ; maksymalna liczba pozycji w tabeli magazynu (0 - wszystkie)
+    history_page_size = 200     ; transakcje wczytywane naraz do historii w głównym oknie (0 - wszystkie)
+    change_poll_ms = 2000       ; co ile ms sprawdzać zmiany zapisane przez inne stanowiska (0 - wcale)
+    undo_limit = 50             ; liczba ostatnich zapisów transakcji do cofnięcia (Ctrl+Z / Ctrl+Y)
+
+    [backup]
+    dir = backups               ; katalog kopii zapasowych (przycisk KOPIA ZAPASOWA)
+    keep = 7                    ; liczba przechowywanych kopii
+    pages_per_step = 1024       ; stron bazy kopiowanych w jednym kroku
+
+    [profiler]
+    enabled = no                ; statystyki wywołań GoldDatabase (okno DIAGNOSTYKA; można je też tam włączyć)
+    slow_query_ms = 100         ; próg dziennika wolnych zapytań
+    slow_log =                  ; plik dziennika wolnych zapytań (puste - tylko logger)
+    dump_on_exit =              ; plik JSON ze statystykami zapisywany przy zamknięciu
+"""
+import configparser
+import os
+from typing import Optional
+
+DEFAULT_CONFIG_FILE = "gold_vault.ini"
+
+DEFAULTS = {
+    "storage": {
+        "backend": "sqlite",
+        "path": "gold_vault.db",
+        "seed": "",
+        "url": "http://127.0.0.1:8765",
+    },
+    "ui": {
+        "fast_start": "no",
+        "inventory_limit": "0",
+        "history_page_size": "200",
+        "change_poll_ms": "2000",
+        "undo_limit": "50",
+    },
+    "backup": {
+        "dir": "backups",
+        "keep": "7",
+        "pages_per_step": "1024",
+    },
+    "profiler": {
+        "enabled": "no",
+        "slow_query_ms": "100",
+        "slow_log": "",
+        "dump_on_exit": "",
+    },
+}
+
+
+def load_config(path: Optional[str] = None) -> configparser.ConfigParser:
+    """Wczytuje konfigurację, uzupełniając brakujące wartości domyślnymi."""
+    config = configparser.ConfigParser(inline_comment_prefixes=(";", "#"))
+    config.read_dict(DEFAULTS)
+    config.read(path or os.environ.get("GOLD_VAULT_CONFIG", DEFAULT_CONFIG_FILE), encoding="utf-8")
+    return config
@@ -0,0 +1,66 @@
+"""
+Dane panelu statystyk: kupno i sprzedaż (waga, wartość) w kolejnych miesiącach,
+średnia cena za gram oraz stan magazynu w podziale na kategorie.
+
+Źródłem są podsumowania miesięczne (monthly_rollups, utrzymywane wyzwalaczami
+razem z transakcjami) i stan typów złota, więc czas obliczeń nie zależy od
+liczby transakcji w historii. Moduł nie importuje Tkintera - dane liczy wątek
+w tle, a okno (gold_dialogs.DashboardWindow) tylko je rysuje. Serie są już
+w gramach i złotych (magazyn danych zwraca miligramy i grosze).
+"""
+from typing import Dict, List, Optional, Tuple
+
+from storage import GoldStorage
+from units import GROSZE, MILLIGRAMS
+
+
+class DashboardStats:
+    """
+    Serie miesięczne (wspólna oś months, RRRR-MM) oraz stan magazynu według kategorii:
+    stock to lista (kategoria, waga w gramach, waga czystego złota), od największej wagi.
+    """
+
+    def __init__(self, monthly: List[Tuple], inventory: list):
+        per_month: Dict[str, Dict[str, Tuple]] = {}
+        for month, transaction_type, _, _, weight_total, value, weighed_value in monthly:
+            per_month.setdefault(month, {})[transaction_type] = (weight_total, value, weighed_value)
+
+        empty = (0, 0, 0)
+        self.months: List[str] = sorted(per_month)
+        self.bought_weight: List[float] = []
+        self.sold_weight: List[float] = []
+        self.bought_value: List[float] = []
+        self.sold_value: List[float] = []
+        # Średnia cena za gram (wartość transakcji o znanej wadze / ich waga); None - brak kupna w miesiącu
+        self.buy_price_per_gram: List[Optional[float]] = []
+        for month in self.months:
+            bought = per_month[month].get("Kupno", empty)
+            sold = per_month[month].get("Sprzedaż", empty)
+            self.bought_weight.append(bought[0] / MILLIGRAMS)
+            self.sold_weight.append(sold[0] / MILLIGRAMS)
+            self.bought_value.append(bought[1] / GROSZE)
+            self.sold_value.append(sold[1] / GROSZE)
+            self.buy_price_per_gram.append(bought[2] * MILLIGRAMS / (bought[0] * GROSZE) if bought[0] > 0 else None)
+
+        stock: Dict[str, List[float]] = {}
+        for item in inventory:
+            totals = stock.setdefault(item.category, [0.0, 0.0])
+            weight = (item.total_weight or 0) / MILLIGRAMS
+            totals[0] += weight
+            totals[1] += weight * item.purity / 100
+        self.stock: List[Tuple[str, float, float]] = sorted(
+            ((category, weight, fine) for category, (weight, fine) in stock.items()),
+            key=lambda entry: entry[1], reverse=True)
+
+    def last_months(self, count: int) -> "DashboardStats":
+        """Kopia serii ograniczona do ostatnich count miesięcy (stan magazynu bez zmian)."""
+        trimmed = DashboardStats.__new__(DashboardStats)
+        for name in ("months", "bought_weight", "sold_weight", "bought_value", "sold_value", "buy_price_per_gram"):
+            setattr(trimmed, name, getattr(self, name)[-count:])
+        trimmed.stock = self.stock
+        return trimmed
+
+
+def load_dashboard_stats(db: GoldStorage) -> DashboardStats:
+    """Pobiera dane panelu statystyk z magazynu danych (można wywołać w wątku w tle)."""
+    return DashboardStats(db.get_monthly_totals(), db.get_inventory())